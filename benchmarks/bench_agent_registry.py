@@ -0,0 +1,182 @@
+# benchmarks/bench_agent_registry.py
+r"""Agent listing, port checks and heartbeats: a query per call vs. the registry index.
+
+In a scratch schema (migrations applied) registers --agents agents, starts an
+AgentRegistry (core/a2a/registry.py) on it and compares, over --repeats calls each:
+  * listing every agent: SELECT ... ORDER BY registered_unix DESC (the former GET
+    /api/agents) vs. the registry index, status included;
+  * the port check: SELECT 1 ... WHERE port = %s (the former scripts/port_guard.py) vs.
+    an index lookup;
+  * heartbeats: an UPDATE per heartbeat vs. AgentRegistry.heartbeat, which coalesces
+    repeats;
+  * how long a change made by another connection takes to reach the index via NOTIFY.
+The scratch schema is dropped afterwards unless --keep is given.
+
+Usage:
+  DATABASE_URL=... python benchmarks/bench_agent_registry.py --agents 1000 \
+      --repeats 2000
+"""
+import sys
+import time
+import random
+import asyncio
+import pathlib
+import argparse
+from typing import List
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import psycopg  # noqa: E402
+from psycopg.conninfo import make_conninfo  # noqa: E402
+from agent_runner import DATABASE_URL  # noqa: E402
+from core.a2a.registry import AgentRegistry, REGISTRY_COLUMNS  # noqa: E402
+from ui.dispatcher.migrations import apply_migrations  # noqa: E402
+
+SCHEMA = "bench_agent_registry"
+BASE_PORT = 20000
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return (
+        ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+        if ordered
+        else 0.0
+    )
+
+
+def report(label: str, latencies: List[float]):
+    print(
+        f"{label:<44} p50 {percentile(latencies, 50) * 1000:8.3f} ms   p99 "
+        f"{percentile(latencies, 99) * 1000:8.3f} ms"
+    )
+
+
+async def timed(repeats: int, call) -> List[float]:
+    latencies = []
+    for i in range(repeats):
+        started = time.perf_counter()
+        await call(i)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+async def run(dsn: str, agents: int, repeats: int):
+    async with await psycopg.AsyncConnection.connect(dsn) as conn:
+        await conn.execute(
+            "INSERT INTO registry_services (service_name, description, host, port, "
+            "registered_unix) "
+            "SELECT 'agent-' || g, 'benchmark agent', 'localhost', %s + g, %s + g FROM "
+            "generate_series(1, %s) AS g",
+            (BASE_PORT, int(time.time()) - agents, agents),
+        )
+        await conn.commit()
+
+        registry = AgentRegistry(dsn)
+        await registry.start()
+        try:
+            print(f"{len(registry.index)} agents loaded")
+            ports = [BASE_PORT + random.randint(1, 2 * agents) for _ in range(repeats)]
+
+            async def list_from_db(_):
+                async with conn.cursor() as cursor:
+                    await cursor.execute(
+                        f"SELECT {REGISTRY_COLUMNS} FROM registry_services ORDER BY "
+                        "registered_unix DESC"
+                    )
+                    await cursor.fetchall()
+
+            async def list_from_index(_):
+                now = time.time()
+                [
+                    (record, registry.status_of(record, now))
+                    for record in registry.list_agents()
+                ]
+
+            async def port_from_db(i):
+                async with conn.cursor() as cursor:
+                    await cursor.execute(
+                        "SELECT 1 FROM registry_services WHERE port = %s", (ports[i],)
+                    )
+                    await cursor.fetchone()
+
+            async def port_from_index(i):
+                registry.port_available(ports[i])
+
+            report(
+                f"list {agents} agents, database", await timed(repeats, list_from_db)
+            )
+            report(
+                f"list {agents} agents, in-memory index",
+                await timed(repeats, list_from_index),
+            )
+            report("port check, database", await timed(repeats, port_from_db))
+            report("port check, in-memory index", await timed(repeats, port_from_index))
+
+            names = [f"agent-{1 + i % agents}" for i in range(repeats)]
+
+            async def heartbeat_update(i):
+                await conn.execute(
+                    "UPDATE registry_services SET last_heartbeat_unix = %s WHERE "
+                    "service_name = %s",
+                    (int(time.time()), names[i]),
+                )
+                await conn.commit()
+
+            async def heartbeat_registry(i):
+                await registry.heartbeat(conn, names[i % min(agents, 50)], "idle")
+
+            report("heartbeat, UPDATE each", await timed(repeats, heartbeat_update))
+            report(
+                "heartbeat, registry (50 agents beating)",
+                await timed(repeats, heartbeat_registry),
+            )
+
+            lags = []
+            for i in range(min(repeats, 200)):
+                port = BASE_PORT + 3 * agents + i
+                async with await psycopg.AsyncConnection.connect(
+                    dsn, autocommit=True
+                ) as other:
+                    started = time.perf_counter()
+                    await other.execute(
+                        "UPDATE registry_services SET port = %s WHERE service_name = "
+                        "'agent-1'",
+                        (port,),
+                    )
+                    while registry.port_available(port):
+                        await asyncio.sleep(0.0005)
+                    lags.append(time.perf_counter() - started)
+            report("change by another connection visible after", lags)
+        finally:
+            await registry.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--agents", type=int, default=1000)
+    parser.add_argument("--repeats", type=int, default=2000)
+    parser.add_argument(
+        "--keep", action="store_true", help=f"Keep the '{SCHEMA}' schema afterwards."
+    )
+    args = parser.parse_args()
+
+    dsn = make_conninfo(DATABASE_URL, options=f"-c search_path={SCHEMA}")
+    with psycopg.connect(dsn, autocommit=True) as admin:
+        admin.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        admin.execute(f"CREATE SCHEMA {SCHEMA}")
+    try:
+        asyncio.run(apply_migrations(dsn))
+        asyncio.run(run(dsn, args.agents, args.repeats))
+    finally:
+        if not args.keep:
+            with psycopg.connect(dsn, autocommit=True) as admin:
+                admin.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+
+
+if __name__ == "__main__":
+    main()
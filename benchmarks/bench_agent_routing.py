@@ -0,0 +1,166 @@
+# benchmarks/bench_agent_routing.py
+"""Subtask queue time with random, power-of-two-choices and least-loaded routing.
+
+A discrete-event simulation (no database or dispatcher needed). --agents agents with
+mean service times spread over [--min-latency, --max-latency] seconds each work one task
+at a time; --gpu-agents of them also carry a "gpu" tag that --gpu-share of the tasks
+require. Tasks arrive as a Poisson stream at --utilization of the pool's total capacity.
+The router sees the same state the dispatcher's registry receives from
+agent_load_events: per-agent queued and in-flight counts and the moving average of
+completion times (updated here without notification lag). Every policy gets the same
+arrivals and the same work per task. Reports queue time (arrival to start) and the time
+each routing decision takes.
+
+Usage:
+  python benchmarks/bench_agent_routing.py --agents 50 --tasks 200000 --utilization 0.85
+"""
+import sys
+import time
+import heapq
+import random
+import pathlib
+import argparse
+import dataclasses
+from collections import deque
+from typing import Dict, List
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from core.a2a.registry import AgentLoad, AgentRecord, AgentRegistry  # noqa: E402
+from core.a2a.router import AgentRouter  # noqa: E402
+
+NOW = 1_000_000  # heartbeat time of every simulated agent, so all of them stay live
+EWMA_WEIGHT = (
+    0.2  # as in apply_agent_load_deltas (sql/migrations/0006_agent_load_routing.sql)
+)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return (
+        ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+        if ordered
+        else 0.0
+    )
+
+
+def make_pool(args) -> Dict[str, float]:
+    rng = random.Random(args.seed)
+    return {
+        f"agent-{i}": rng.uniform(args.min_latency, args.max_latency)
+        for i in range(args.agents)
+    }
+
+
+def make_tasks(args, pool: Dict[str, float]):
+    # (arrival time, work, needs gpu); an agent takes work * its mean latency to finish
+    # a task.
+    rng = random.Random(args.seed + 1)
+    capacity = sum(1 / latency for latency in pool.values())
+    clock, tasks = 0.0, []
+    for _ in range(args.tasks):
+        clock += rng.expovariate(args.utilization * capacity)
+        tasks.append((clock, rng.expovariate(1.0), rng.random() < args.gpu_share))
+    return tasks
+
+
+def simulate(policy: str, pool: Dict[str, float], tasks, args):
+    registry = AgentRegistry("postgresql://unused")
+    for i, name in enumerate(pool):
+        capabilities = frozenset({"gpu"}) if i < args.gpu_agents else frozenset()
+        registry.index.upsert(
+            AgentRecord(
+                i + 1,
+                name,
+                None,
+                "localhost",
+                10000 + i,
+                NOW,
+                NOW,
+                "idle",
+                capabilities,
+            )
+        )
+    router = AgentRouter(registry, policy=policy, rng=random.Random(args.seed + 2))
+
+    def update(name: str, **deltas):
+        load = registry.load_of(name)
+        registry.loads[name] = dataclasses.replace(
+            load, **{k: getattr(load, k) + v for k, v in deltas.items()}
+        )
+
+    waiting: Dict[str, deque] = {name: deque() for name in pool}
+    busy: Dict[str, bool] = {name: False for name in pool}
+    events: list = []
+    queue_times: List[float] = []
+    decisions: List[float] = []
+
+    def start(name: str, clock: float):
+        arrival, work = waiting[name].popleft()
+        busy[name] = True
+        update(name, queued=-1, in_flight=1)
+        queue_times.append(clock - arrival)
+        heapq.heappush(events, (clock + work * pool[name], 1, name, clock))
+
+    for arrival, work, needs_gpu in tasks:
+        while events and events[0][0] <= arrival:
+            clock, _, name, started = heapq.heappop(events)
+            busy[name] = False
+            load = registry.load_of(name)
+            sample = clock - started
+            ewma = (
+                sample
+                if load.latency_ewma is None
+                else (1 - EWMA_WEIGHT) * load.latency_ewma + EWMA_WEIGHT * sample
+            )
+            registry.loads[name] = AgentLoad(
+                load.queued, load.in_flight - 1, load.completed + 1, ewma
+            )
+            if waiting[name]:
+                start(name, clock)
+        began = time.perf_counter()
+        name = router.choose(
+            ("gpu",) if needs_gpu else (), now=NOW
+        )  # counts the task as queued
+        decisions.append(time.perf_counter() - began)
+        waiting[name].append((arrival, work))
+        if not busy[name]:
+            start(name, arrival)
+    return queue_times, decisions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--agents", type=int, default=50)
+    parser.add_argument("--tasks", type=int, default=200_000)
+    parser.add_argument("--utilization", type=float, default=0.85)
+    parser.add_argument("--min-latency", type=float, default=5.0)
+    parser.add_argument("--max-latency", type=float, default=60.0)
+    parser.add_argument("--gpu-agents", type=int, default=10)
+    parser.add_argument("--gpu-share", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    pool = make_pool(args)
+    tasks = make_tasks(args, pool)
+    print(
+        f"{args.agents} agents, {args.tasks} tasks at {args.utilization:.0%} "
+        "utilization"
+    )
+    for policy in ("random", "p2c", "least_loaded"):
+        queue_times, decisions = simulate(policy, pool, tasks, args)
+        print(
+            f"{policy:<13} queue time mean "
+            f"{sum(queue_times) / len(queue_times):9.1f}s  p50 "
+            f"{percentile(queue_times, 50):8.1f}s"
+            f"  p99 {percentile(queue_times, 99):9.1f}s   decision p50 "
+            f"{percentile(decisions, 50) * 1e6:5.1f} µs"
+            f"  p99 {percentile(decisions, 99) * 1e6:6.1f} µs"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# benchmarks/bench_embedding_backends.py
+r"""Throughput (docs/sec) and memory footprint of each embedding backend on CPU.
+
+Every backend runs in its own subprocess so its memory is measured in isolation: RSS
+after imports, after loading the model and peak after embedding --docs chunks of the
+docs/ corpus (repeated if the corpus is smaller). Backends whose dependencies or model
+files are missing are reported as unavailable.
+
+Usage:
+  python benchmarks/bench_embedding_backends.py --docs 2000 --batch-size 32 \
+      --threads 0 1 4
+"""
+import sys
+import json
+import time
+import pathlib
+import argparse
+import subprocess
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+BACKENDS = ["sentence-transformers", "onnx-int8", "hashing"]
+
+
+def rss_mb() -> float:
+    import psutil
+
+    return psutil.Process().memory_info().rss / 1024 / 1024
+
+
+def child(backend_name: str, num_docs: int, batch_size: int, threads: int):
+    import resource
+    from core.rag.loader import chunk_markdown
+    from core.rag.embeddings import create_embedding_backend
+
+    texts = []
+    for p in sorted((ROOT / "docs").rglob("*.md")):
+        texts.extend(
+            c["text"]
+            for c in chunk_markdown(p.read_text(encoding="utf-8"), p.name, str(p))
+        )
+    texts = (texts * (num_docs // max(1, len(texts)) + 1))[:num_docs]
+    result = {"rss_imports_mb": rss_mb()}
+    backend = create_embedding_backend(
+        backend_name, batch_size=batch_size, num_threads=threads
+    )
+    started = time.perf_counter()
+    backend.load()
+    result["load_s"] = time.perf_counter() - started
+    result["rss_loaded_mb"] = rss_mb()
+    backend.embed(texts[:batch_size])  # first batch pays one-off allocation costs
+    started = time.perf_counter()
+    vectors = backend.embed(texts)
+    elapsed = time.perf_counter() - started
+    result.update(
+        docs_per_s=len(texts) / elapsed,
+        dim=int(vectors.shape[1]),
+        peak_rss_mb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    )
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--backends", nargs="+", default=BACKENDS)
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument(
+        "--threads",
+        type=int,
+        nargs="+",
+        default=[0],
+        help="Thread limits to try (0 = library default).",
+    )
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.docs, args.batch_size, args.threads[0])
+        raise SystemExit(0)
+
+    for backend_name in args.backends:
+        for threads in args.threads:
+            proc = subprocess.run(
+                [
+                    sys.executable,
+                    __file__,
+                    "--child",
+                    backend_name,
+                    "--docs",
+                    str(args.docs),
+                    "--batch-size",
+                    str(args.batch_size),
+                    "--threads",
+                    str(threads),
+                ],
+                capture_output=True,
+                text=True,
+            )
+            label = f"{backend_name} (threads={threads or 'default'})"
+            if proc.returncode != 0:
+                reason = (proc.stderr.strip().splitlines() or ["unknown error"])[-1]
+                print(f"{label:<36} unavailable: {reason[:120]}")
+                continue
+            r = json.loads(proc.stdout.strip().splitlines()[-1])
+            print(
+                f"{label:<36} {r['docs_per_s']:>9.1f} docs/s  dim={r['dim']:<4} "
+                f"load={r['load_s']:.2f}s  "
+                f"rss: imports={r['rss_imports_mb']:.0f}MB "
+                f"loaded={r['rss_loaded_mb']:.0f}MB peak={r['peak_rss_mb']:.0f}MB"
+            )
@@ -0,0 +1,98 @@
+# benchmarks/bench_embedding_cache.py
+"""Embedding cache effect on reindexing and on resubmitted task prompts.
+
+Indexes the docs/ chunks into a throwaway store twice (a full rebuild, as after a model
+or chunking change that keeps most text identical) and then runs a query workload in
+which --distinct prompts are resubmitted --queries times with whitespace variations.
+Each phase runs with and without the embedding cache; the cached run also reports hit
+rate and estimated embedding time saved.
+
+Usage:
+  python benchmarks/bench_embedding_cache.py --queries 200 --distinct 20
+"""
+import sys
+import time
+import random
+import shutil
+import pathlib
+import argparse
+import tempfile
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from core.rag.loader import chunk_markdown  # noqa: E402
+from core.rag.vector_store import VectorStore  # noqa: E402
+
+PROMPTS = [
+    "Refactor the dispatcher to use connection pooling",
+    "Add pagination to the task list endpoint",
+    "Write onboarding notes for a new agent",
+    "Which port should the registry service use?",
+    "Fix the Authelia redirect loop",
+]
+
+
+def load_chunks():
+    chunks = []
+    for p in sorted((ROOT / "docs").rglob("*.md")):
+        rel = str(p.relative_to(ROOT))
+        chunks.extend(chunk_markdown(p.read_text(encoding="utf-8"), p.name, rel))
+    return chunks
+
+
+def run(use_cache: bool, chunks, queries, embedding_model: str):
+    store_dir = tempfile.mkdtemp(prefix="bench_ef_cache_")
+    try:
+        timings = {}
+        for phase in ("index", "reindex"):
+            store = VectorStore(
+                path=store_dir,
+                collection_name=f"bench_{phase}",
+                embedding_model_name=embedding_model,
+                use_embedding_cache=use_cache,
+            )
+            start = time.perf_counter()
+            for i in range(0, len(chunks), 256):
+                batch = chunks[i : i + 256]
+                store.upsert_documents(
+                    [c["text"] for c in batch],
+                    [c["metadata"] for c in batch],
+                    [c["id"] for c in batch],
+                )
+            timings[phase] = time.perf_counter() - start
+        start = time.perf_counter()
+        for query in queries:
+            store.query([query], n_results=3)
+        timings["queries"] = time.perf_counter() - start
+        label = "cached" if use_cache else "uncached"
+        print(
+            f"{label:>9}: index={timings['index']:.2f}s "
+            f"reindex={timings['reindex']:.2f}s "
+            f"{len(queries)} queries={timings['queries']:.2f}s "
+            f"({timings['queries'] / len(queries) * 1000:.1f}ms/query)"
+        )
+        if use_cache:
+            print(f"           cache stats: {store.embedding_cache_stats()}")
+    finally:
+        shutil.rmtree(store_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--distinct", type=int, default=20)
+    parser.add_argument("--embedding-model", default="all-MiniLM-L6-v2")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    distinct = [f"{PROMPTS[i % len(PROMPTS)]} (task {i})" for i in range(args.distinct)]
+    queries = [
+        rng.choice(distinct).replace(" ", rng.choice([" ", "  ", "\n"]), 1)
+        for _ in range(args.queries)
+    ]
+    chunks = load_chunks()
+    run(False, chunks, queries, args.embedding_model)
+    run(True, chunks, queries, args.embedding_model)
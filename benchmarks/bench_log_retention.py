@@ -0,0 +1,168 @@
+# benchmarks/bench_log_retention.py
+r"""Insert and retention cost of the partitioned task_logs vs. the former single table.
+
+In a scratch schema (migrations applied, so task_logs is partitioned by day), builds a
+copy of the pre-partitioning layout next to it (primary key, task_id and timestamp
+indexes and the cascading foreign key). Then:
+  * COPYs --rows log rows spread over --days days into each and reports rows/sec;
+  * expires the older half: DELETE on the single table vs. detach (+ gzip export with
+    --archive-dir) + DROP of whole partitions via ui/dispatcher/log_partitions.py;
+  * deletes --delete-tasks tasks, which cascades into the single table only.
+The scratch schema is dropped afterwards unless --keep is given.
+
+Usage:
+  DATABASE_URL=... python benchmarks/bench_log_retention.py --rows 2000000 --days 20 \
+      --archive-dir /tmp/task_log_archive
+"""
+import io
+import sys
+import time
+import asyncio
+import pathlib
+import argparse
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import psycopg  # noqa: E402
+from psycopg.conninfo import make_conninfo  # noqa: E402
+from agent_runner import DATABASE_URL  # noqa: E402
+from ui.dispatcher.migrations import apply_migrations  # noqa: E402
+from ui.dispatcher.log_partitions import (  # noqa: E402
+    ensure_partitions,
+    apply_retention,
+    list_partitions,
+)
+
+SCHEMA = "bench_log_retention"
+DAY = 86400
+START = 1_750_000_000 - 1_750_000_000 % DAY
+
+LEGACY_TABLE = """
+CREATE TABLE task_logs_legacy (
+    id SERIAL PRIMARY KEY,
+    task_id INTEGER NOT NULL CONSTRAINT task_logs_legacy_task_fk
+        REFERENCES agent_tasks(id) ON DELETE CASCADE,
+    timestamp INTEGER NOT NULL,
+    level TEXT CHECK(level IN ('INFO', 'WARNING', 'ERROR', 'DEBUG'))
+        NOT NULL DEFAULT 'INFO',
+    message TEXT NOT NULL
+);
+CREATE INDEX ON task_logs_legacy(task_id);
+CREATE INDEX ON task_logs_legacy(timestamp);
+CREATE INDEX ON task_logs_legacy(task_id, timestamp, id);
+"""
+
+
+def copy_rows(
+    conn: psycopg.Connection, table: str, rows: int, days: int, tasks: int
+) -> float:
+    step = days * DAY / rows
+    started = time.perf_counter()
+    with conn.transaction(), conn.cursor() as cursor:
+        with cursor.copy(
+            f"COPY {table} (task_id, timestamp, level, message) FROM STDIN"
+        ) as copy:
+            for chunk_start in range(0, rows, 50000):
+                buffer = io.StringIO()
+                for i in range(chunk_start, min(rows, chunk_start + 50000)):
+                    buffer.write(
+                        f"{1 + i % tasks}\t{START + int(i * step)}\tINFO\tstep {i}: "
+                        "processed chunk of the input without errors\n"
+                    )
+                copy.write(buffer.getvalue())
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--days", type=int, default=20)
+    parser.add_argument("--tasks", type=int, default=20_000)
+    parser.add_argument("--delete-tasks", type=int, default=2_000)
+    parser.add_argument(
+        "--archive-dir",
+        default=None,
+        help="Export expired partitions here (gzip CSV) before dropping them.",
+    )
+    parser.add_argument(
+        "--keep", action="store_true", help=f"Keep the '{SCHEMA}' schema afterwards."
+    )
+    args = parser.parse_args()
+
+    dsn = make_conninfo(DATABASE_URL, options=f"-c search_path={SCHEMA}")
+    with psycopg.connect(dsn, autocommit=True) as admin:
+        admin.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        admin.execute(f"CREATE SCHEMA {SCHEMA}")
+    try:
+        asyncio.run(apply_migrations(dsn))
+        with psycopg.connect(dsn, autocommit=True) as conn:
+            conn.execute(LEGACY_TABLE)
+            conn.execute("ALTER TABLE agent_tasks DISABLE TRIGGER agent_tasks_notify")
+            conn.execute("ALTER TABLE task_logs DISABLE TRIGGER task_logs_notify")
+            conn.execute(
+                "INSERT INTO agent_tasks (id, title, prompt, status, created_unix) "
+                "SELECT g, 'task ' || g, 'p', 'done', %s FROM generate_series(1, %s) "
+                "AS g",
+                (START, args.tasks),
+            )
+            ensure_partitions(conn, now=START, ahead=args.days)
+            print(f"{len(list_partitions(conn))} daily partitions")
+
+            for label, table in (
+                ("single table (4 indexes + FK)", "task_logs_legacy"),
+                ("partitioned (2 indexes)", "task_logs"),
+            ):
+                seconds = copy_rows(conn, table, args.rows, args.days, args.tasks)
+                print(f"COPY into {label:<30} {args.rows / seconds:>10,.0f} rows/s")
+
+            retention_days = args.days // 2
+            now = START + args.days * DAY
+            cutoff = now - retention_days * DAY
+            started = time.perf_counter()
+            deleted = conn.execute(
+                "DELETE FROM task_logs_legacy WHERE timestamp < %s", (cutoff,)
+            ).rowcount
+            print(
+                f"expire older half, single table:  DELETE {deleted} rows in "
+                f"{time.perf_counter() - started:6.2f}s"
+            )
+            started = time.perf_counter()
+            removed = apply_retention(
+                conn, retention_days, now=now, archive_dir=args.archive_dir, mode="drop"
+            )
+            verb = "detach + export + drop" if args.archive_dir else "detach + drop"
+            print(
+                f"expire older half, partitioned:   {verb} {len(removed)} partitions "
+                f"in {time.perf_counter() - started:6.2f}s"
+            )
+
+            batch = args.delete_tasks
+            started = time.perf_counter()
+            conn.execute("DELETE FROM agent_tasks WHERE id <= %s", (batch,))
+            print(
+                f"delete {batch} tasks, cascading into the single table: "
+                f"{time.perf_counter() - started:6.2f}s"
+            )
+            conn.execute(
+                "ALTER TABLE task_logs_legacy DROP CONSTRAINT task_logs_legacy_task_fk"
+            )
+            started = time.perf_counter()
+            conn.execute(
+                "DELETE FROM agent_tasks WHERE id > %s AND id <= %s", (batch, 2 * batch)
+            )
+            print(
+                f"delete {batch} tasks, partitioned logs (no cascade):  "
+                f"{time.perf_counter() - started:6.2f}s"
+            )
+    finally:
+        if not args.keep:
+            with psycopg.connect(dsn, autocommit=True) as admin:
+                admin.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+
+
+if __name__ == "__main__":
+    main()
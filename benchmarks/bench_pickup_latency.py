@@ -0,0 +1,122 @@
+# benchmarks/bench_pickup_latency.py
+r"""Approval-to-pickup latency: LISTEN/NOTIFY wakeups vs. interval polling.
+
+Creates tasks in 'pending_approval', approves them one at a time (the same UPDATE the
+/approve endpoint performs) and measures how long it takes an idle worker to claim each
+one. The worker either sleeps on TaskWakeup (push) or re-checks every --poll-interval
+seconds (pull). Claims use claim_tasks(), so this exercises the real runner path.
+
+Usage:
+  DATABASE_URL=... python benchmarks/bench_pickup_latency.py --tasks 50 \
+      --poll-interval 5
+"""
+import sys
+import time
+import random
+import pathlib
+import argparse
+import threading
+from typing import Dict, List
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import psycopg2  # noqa: E402
+from agent_runner import (  # noqa: E402
+    DATABASE_URL,
+    TaskWakeup,
+    claim_tasks,
+    mark_status,
+)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return (
+        ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+        if ordered
+        else 0.0
+    )
+
+
+def measure(mode: str, num_tasks: int, poll_interval: float) -> List[float]:
+    conn = psycopg2.connect(DATABASE_URL)
+    worker_id = f"bench-pickup-{mode}"
+    approved_at: Dict[int, float] = {}
+    latencies: List[float] = []
+    done = threading.Event()
+    wakeup = TaskWakeup() if mode == "listen" else None
+    if wakeup is not None:
+        wakeup.start()
+        time.sleep(0.5)  # let the listener connect before the first approval
+
+    def worker():
+        while not done.is_set():
+            generation = wakeup.generation if wakeup is not None else 0
+            for task in claim_tasks(worker_id, limit=10):
+                if task["id"] in approved_at:
+                    latencies.append(time.perf_counter() - approved_at[task["id"]])
+                mark_status(task["id"], "done", worker_id=worker_id)
+            if len(latencies) >= num_tasks:
+                done.set()
+                break
+            if wakeup is not None:
+                wakeup.wait(generation, poll_interval)
+            else:
+                done.wait(poll_interval)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    try:
+        with conn.cursor() as cursor:
+            for i in range(num_tasks):
+                cursor.execute(
+                    "INSERT INTO agent_tasks(title, prompt, status, created_unix) "
+                    "VALUES (%s, %s, 'pending_approval', %s) RETURNING id",
+                    (
+                        f"pickup-bench-{mode}-{i}",
+                        "pickup latency benchmark",
+                        int(time.time()),
+                    ),
+                )
+                task_id = cursor.fetchone()[0]
+                conn.commit()
+                # Random spacing so approvals land at arbitrary points of the poll
+                # cycle.
+                time.sleep(random.uniform(0.05, 0.25))
+                cursor.execute(
+                    "UPDATE agent_tasks SET status = 'approved' WHERE id = %s",
+                    (task_id,),
+                )
+                approved_at[task_id] = time.perf_counter()
+                conn.commit()
+        thread.join(timeout=poll_interval * 2 + 30)
+    finally:
+        done.set()
+        if wakeup is not None:
+            wakeup.stop()
+        conn.close()
+    return latencies
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--tasks", type=int, default=50)
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=5.0,
+        help="Polling interval for the pull baseline (and fallback for listen).",
+    )
+    args = parser.parse_args()
+
+    for mode in ("poll", "listen"):
+        samples = measure(mode, args.tasks, args.poll_interval)
+        print(
+            f"{mode:>6}: n={len(samples)} p50={percentile(samples, 50) * 1000:.1f}ms "
+            f"p95={percentile(samples, 95) * 1000:.1f}ms "
+            f"max={max(samples, default=0) * 1000:.1f}ms"
+        )
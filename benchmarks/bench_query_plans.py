@@ -0,0 +1,237 @@
+# benchmarks/bench_query_plans.py
+"""Query plans for the hot agent_tasks / task_logs access paths on a million-row table.
+
+Applies the migrations into a scratch schema, seeds --tasks tasks (a mix of statuses,
+agents and parent/child trees) and --logs log rows, ANALYZEs, and then runs each query
+the dispatcher and the runner issue under EXPLAIN (ANALYZE, BUFFERS). For every query it
+prints the index the plan uses (or "SEQ SCAN") and the execution time, next to the time
+with index scans disabled. Exits non-zero if a query does not use its expected index.
+
+Usage:
+  DATABASE_URL=... python benchmarks/bench_query_plans.py --tasks 1000000 --logs 1000000
+"""
+import sys
+import time
+import asyncio
+import pathlib
+import argparse
+from typing import Any, Dict, List, Tuple
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import psycopg  # noqa: E402
+import psycopg2  # noqa: E402
+from psycopg2.extensions import make_dsn  # noqa: E402
+from agent_runner import DATABASE_URL  # noqa: E402
+from ui.dispatcher.app import TASK_LOG_SPAN_FILTER  # noqa: E402
+from ui.dispatcher.migrations import apply_migrations  # noqa: E402
+from ui.dispatcher.log_partitions import ensure_partitions  # noqa: E402
+
+SCHEMA = "bench_query_plans"
+NOW = 1_750_000_000
+
+# (label, SQL, expected index); %(parent)s and %(task_id)s are filled in from the seeded
+# data.
+QUERIES: List[Tuple[str, str, str]] = [
+    (
+        "claim (runner)",
+        "SELECT id FROM agent_tasks WHERE status = 'approved' AND "
+        "pending_dependency_count = 0 ORDER BY created_unix, id LIMIT 10 FOR UPDATE "
+        "SKIP LOCKED",
+        "idx_agent_tasks_ready",
+    ),
+    (
+        "lease expiry sweep (runner)",
+        "SELECT id FROM agent_tasks WHERE status = 'in_progress' AND "
+        f"lease_expires_unix < {NOW} FOR UPDATE SKIP LOCKED",
+        "idx_agent_tasks_lease",
+    ),
+    (
+        "subtasks_status",
+        "SELECT id, status, title FROM agent_tasks WHERE parent_task_id = %(parent)s "
+        "ORDER BY id ASC",
+        "idx_agent_tasks_parent",
+    ),
+    (
+        "list_tasks first page",
+        "SELECT id, title, status FROM agent_tasks ORDER BY created_unix DESC, id DESC "
+        "LIMIT 100",
+        "idx_agent_tasks_created_id",
+    ),
+    (
+        "list_tasks ?status=failed",
+        "SELECT id, title, status FROM agent_tasks WHERE status = 'failed' ORDER BY "
+        "created_unix DESC, id DESC LIMIT 100",
+        "idx_agent_tasks_status_created",
+    ),
+    (
+        "list_tasks ?assigned_agent=",
+        "SELECT id, title, status FROM agent_tasks WHERE assigned_agent = 'agent-7' "
+        "ORDER BY created_unix DESC, id DESC LIMIT 100",
+        "idx_agent_tasks_agent_created",
+    ),
+    (
+        "list_tasks ?parent_task_id=",
+        "SELECT id, title, status FROM agent_tasks WHERE parent_task_id = %(parent)s "
+        "ORDER BY created_unix DESC, id DESC LIMIT 100",
+        "idx_agent_tasks_parent_created",
+    ),
+    (
+        "task logs",
+        "SELECT id, task_id, timestamp, level, message FROM task_logs WHERE task_id = "
+        "%(task_id)s AND " + TASK_LOG_SPAN_FILTER + " ORDER BY timestamp ASC, id ASC",
+        "idx_task_logs_task_timestamp",
+    ),
+    (
+        "task logs tail",
+        "SELECT id, task_id, timestamp, level, message FROM task_logs WHERE task_id = "
+        "%(task_id)s AND " + TASK_LOG_SPAN_FILTER + " AND id > 0 ORDER BY id LIMIT 500",
+        "idx_task_logs_task_id_id",
+    ),
+]
+
+
+def seed(cursor, tasks: int, logs: int):
+    # NOTIFY per row (or per task) would queue a million notifications; nobody listens
+    # on this schema.
+    cursor.execute("ALTER TABLE agent_tasks DISABLE TRIGGER agent_tasks_notify")
+    cursor.execute("ALTER TABLE task_logs DISABLE TRIGGER task_logs_notify")
+    cursor.execute(
+        """
+        INSERT INTO agent_tasks (id, title, prompt, status, created_unix,
+                                 assigned_agent, parent_task_id, lease_expires_unix)
+        SELECT g,
+               'task ' || g,
+               'seeded prompt',
+               (ARRAY['done','done','done','done','done','done','failed','pending',
+                      'pending_approval','approved','in_progress'])[1 + g %% 11],
+               %(now)s - (%(tasks)s - g),
+               CASE WHEN g %% 4 = 0 THEN 'agent-' || (g %% 50) END,
+               CASE WHEN g > 1000 AND g %% 10 <> 0 THEN 1 + (g %% 1000) END,
+               CASE WHEN g %% 11 = 10 THEN %(now)s + (g %% 1200) - 600 END
+        FROM generate_series(1, %(tasks)s) AS g
+        """,
+        {"now": NOW, "tasks": tasks},
+    )
+    cursor.execute(
+        "SELECT setval(pg_get_serial_sequence('agent_tasks', 'id'), %s)", (tasks,)
+    )
+    cursor.execute(
+        """
+        INSERT INTO task_logs (task_id, timestamp, level, message)
+        SELECT 1 + (g %% %(tasks)s), %(now)s + g, 'INFO', 'seeded log line ' || g
+        FROM generate_series(1, %(logs)s) AS g
+        """,
+        {"now": NOW, "tasks": tasks, "logs": logs},
+    )
+    cursor.execute("ALTER TABLE agent_tasks ENABLE TRIGGER agent_tasks_notify")
+    cursor.execute("ALTER TABLE task_logs ENABLE TRIGGER task_logs_notify")
+
+
+def plan_indexes(node: Dict[str, Any]) -> List[str]:
+    # Scans that actually ran; partitions the executor pruned report zero loops.
+    found = []
+    if node.get("Actual Loops", 1):
+        if node.get("Index Name"):
+            found.append(node["Index Name"])
+        elif node.get("Node Type") == "Seq Scan":
+            found.append(f"SEQ SCAN on {node.get('Relation Name')}")
+    for child in node.get("Plans", []):
+        found.extend(plan_indexes(child))
+    return found
+
+
+def parent_index(cursor, name: str) -> str:
+    # A partition's index is reported under its own name; map it to the index created on
+    # task_logs.
+    cursor.execute(
+        "SELECT i.inhparent::regclass::text FROM pg_inherits i WHERE i.inhrelid = "
+        "%s::regclass",
+        (name,),
+    )
+    row = cursor.fetchone()
+    return row[0] if row else name
+
+
+def explain(cursor, sql: str, params: Dict[str, Any]) -> Tuple[List[str], float]:
+    cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", params)
+    plan = cursor.fetchone()[0][0]
+    used = [
+        name if name.startswith("SEQ SCAN") else parent_index(cursor, name)
+        for name in plan_indexes(plan["Plan"])
+    ]
+    return sorted(set(used), key=used.index), plan["Execution Time"]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--logs", type=int, default=1_000_000)
+    parser.add_argument(
+        "--keep", action="store_true", help=f"Keep the '{SCHEMA}' schema afterwards."
+    )
+    args = parser.parse_args()
+
+    admin = psycopg2.connect(DATABASE_URL)
+    admin.autocommit = True
+    with admin.cursor() as cursor:
+        cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        cursor.execute(f"CREATE SCHEMA {SCHEMA}")
+    scoped_dsn = make_dsn(DATABASE_URL, options=f"-c search_path={SCHEMA}")
+    failures = 0
+    try:
+        asyncio.run(apply_migrations(scoped_dsn))
+        with psycopg.connect(scoped_dsn, autocommit=True) as partition_conn:
+            ensure_partitions(partition_conn, now=NOW, ahead=args.logs // 86400 + 1)
+        conn = psycopg2.connect(scoped_dsn)
+        with conn.cursor() as cursor:
+            started = time.perf_counter()
+            seed(cursor, args.tasks, args.logs)
+            conn.commit()
+            print(
+                f"seeded {args.tasks} tasks and {args.logs} log rows in "
+                f"{time.perf_counter() - started:.1f}s"
+            )
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute("ANALYZE agent_tasks")
+            cursor.execute("ANALYZE task_logs")
+            cursor.execute(
+                "SELECT parent_task_id FROM agent_tasks WHERE parent_task_id IS NOT "
+                "NULL LIMIT 1"
+            )
+            params = {"parent": cursor.fetchone()[0], "task_id": args.tasks // 2}
+
+            print(f"{'query':<30} {'index used':<50} {'indexed':>10} {'no index':>10}")
+            for label, sql, expected in QUERIES:
+                used, indexed_ms = explain(cursor, sql, params)
+                cursor.execute(
+                    "SET enable_indexscan = off; SET enable_indexonlyscan = off; SET "
+                    "enable_bitmapscan = off"
+                )
+                _, scan_ms = explain(cursor, sql, params)
+                cursor.execute(
+                    "RESET enable_indexscan; RESET enable_indexonlyscan; RESET "
+                    "enable_bitmapscan"
+                )
+                ok = expected in used
+                failures += not ok
+                print(
+                    f"{label:<30} {', '.join(used):<50} {indexed_ms:>8.2f}ms "
+                    f"{scan_ms:>8.2f}ms{'' if ok else f'  <-- expected {expected}'}"
+                )
+        conn.close()
+    finally:
+        if not args.keep:
+            with admin.cursor() as cursor:
+                cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        admin.close()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
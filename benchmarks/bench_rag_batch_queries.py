@@ -0,0 +1,87 @@
+# benchmarks/bench_rag_batch_queries.py
+"""Latency of N single-query lookups vs. one get_relevant_lessons_batch call.
+
+Builds a throwaway RAGKernel over docs/ (embedding cache disabled, so every query is
+really embedded) and, for each N, times N calls to get_relevant_lessons against one
+call to get_relevant_lessons_batch with the same N distinct queries.
+
+Usage:
+  python benchmarks/bench_rag_batch_queries.py --sizes 1 10 100 --batch-size 64
+"""
+import os
+import sys
+import time
+import shutil
+import pathlib
+import argparse
+import tempfile
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+os.environ["RAG_EMBEDDING_CACHE"] = "0"
+from core.rag.kernel import RAGKernel  # noqa: E402
+
+TOPICS = [
+    "plan before acting",
+    "port availability",
+    "identity JSON",
+    "completion reports",
+    "placeholder files",
+    "ruleset validation",
+    "reverse proxy",
+    "login loop",
+    "task routing",
+    "escalation rules",
+]
+
+
+def best_of(repeats: int, fn) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--n-results", type=int, default=3)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    store_dir = tempfile.mkdtemp(prefix="bench_rag_batch_")
+    try:
+        kernel = RAGKernel(vector_store_path=store_dir, collection_name="bench_batch")
+        kernel.initialize_and_embed_lessons(force_reindex=True)
+        for n in args.sizes:
+            queries = [
+                f"How do agents handle {TOPICS[i % len(TOPICS)]}? (variant {i})"
+                for i in range(n)
+            ]
+            single = best_of(
+                args.repeats,
+                lambda: [
+                    kernel.get_relevant_lessons(q, n_results=args.n_results)
+                    for q in queries
+                ],
+            )
+            batched = best_of(
+                args.repeats,
+                lambda: kernel.get_relevant_lessons_batch(
+                    queries, n_results=args.n_results, batch_size=args.batch_size
+                ),
+            )
+            print(
+                f"N={n:<4} single={single * 1000:8.1f}ms "
+                f"({single / n * 1000:.2f}ms/query) "
+                f"batch={batched * 1000:8.1f}ms ({batched / n * 1000:.2f}ms/query) "
+                f"speedup={single / batched:.1f}x"
+            )
+    finally:
+        shutil.rmtree(store_dir, ignore_errors=True)
@@ -0,0 +1,207 @@
+# benchmarks/bench_rag_chunking.py
+"""Retrieval quality vs. latency for whole-file vs. chunked indexing of docs/.
+
+For each configuration a throwaway Chroma collection is built over docs/**/*.md and a
+set of labelled queries is run. Reported per configuration:
+  hit@k        - the expected file is among the top-k results
+  answer@k     - a returned passage contains the expected phrase (a whole file counts
+                 only if the phrase lies in the part the embedding model actually sees)
+  ctx chars    - characters of retrieved text that would be pasted into the plan prompt
+  index / p50 / p95 query latency
+
+Usage:
+  python benchmarks/bench_rag_chunking.py --k 3 --windows 100:20 150:30 250:50
+"""
+import sys
+import time
+import shutil
+import pathlib
+import argparse
+import tempfile
+from typing import List, Dict, Any
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from core.rag.loader import chunk_markdown  # noqa: E402
+from core.rag.vector_store import VectorStore  # noqa: E402
+
+DOCS = ROOT / "docs"
+# Roughly what all-MiniLM-L6-v2 embeds before truncating (256 word pieces).
+MODEL_VISIBLE_TOKENS = 190
+
+QUERIES = [
+    (
+        "How should an agent create a plan before acting?",
+        "AGENT_ONBOARDING.md",
+        "Generate `PLAN.md` **before** taking action",
+    ),
+    (
+        "Which script verifies a network port is available?",
+        "AGENT_ONBOARDING.md",
+        "port_guard.py",
+    ),
+    (
+        "What identity JSON does an agent send to the dispatcher?",
+        "AGENT_ONBOARDING.md",
+        "accepted_rules_version",
+    ),
+    (
+        "Where do module completion reports go?",
+        "AGENT_WORKFLOW_RULES_v1.3.2.md",
+        "progress_<component>.md",
+    ),
+    (
+        "How are placeholder and mockup files registered?",
+        "AGENT_WORKFLOW_RULES_v1.3.2.md",
+        "placeholders.md",
+    ),
+    (
+        "What does the MCP module validate?",
+        "AGENT_WORKFLOW_RULES_v1.3.2.md",
+        "Validates ruleset version",
+    ),
+    (
+        "Which reverse proxy and SSO provider does the platform use?",
+        "overview.md",
+        "Authelia",
+    ),
+    ("What is the Authelia login loop blocker?", "overview.md", "redirect loop"),
+    (
+        "What are the failure modes of misrouting shallow reasoning tasks?",
+        "Code Reasoning Taxonomy and Routing_.md",
+        "Failure Modes if Misrouted",
+    ),
+    (
+        "How does an LLM-as-a-judge classify coding tasks for routing?",
+        "Code Reasoning Taxonomy and Routing_.md",
+        "LLM-as-a-Judge",
+    ),
+    (
+        "What escalation rules apply when an agent fails a task?",
+        "Code Reasoning Taxonomy and Routing_.md",
+        "Escalation",
+    ),
+]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return (
+        ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+        if ordered
+        else 0.0
+    )
+
+
+def load_corpus() -> List[Dict[str, Any]]:
+    return [
+        {
+            "source": p.name,
+            "path": str(p.relative_to(ROOT)),
+            "content": p.read_text(encoding="utf-8"),
+        }
+        for p in sorted(DOCS.rglob("*.md"))
+    ]
+
+
+def build_entries(corpus, window) -> List[Dict[str, Any]]:
+    if window is None:
+        return [
+            {
+                "id": doc["path"],
+                "text": doc["content"],
+                "metadata": {"source": doc["source"], "path": doc["path"]},
+            }
+            for doc in corpus
+        ]
+    tokens, overlap = window
+    entries = []
+    for doc in corpus:
+        entries.extend(
+            chunk_markdown(
+                doc["content"],
+                doc["source"],
+                doc["path"],
+                chunk_tokens=tokens,
+                chunk_overlap=overlap,
+            )
+        )
+    return entries
+
+
+def evaluate(label: str, entries, k: int, embedding_model: str):
+    store_dir = tempfile.mkdtemp(prefix="bench_rag_")
+    try:
+        store = VectorStore(
+            path=store_dir,
+            collection_name="bench",
+            embedding_model_name=embedding_model,
+        )
+        start = time.perf_counter()
+        for i in range(0, len(entries), 256):
+            batch = entries[i : i + 256]
+            store.add_documents(
+                [e["text"] for e in batch],
+                [e["metadata"] for e in batch],
+                [e["id"] for e in batch],
+            )
+        index_seconds = time.perf_counter() - start
+
+        hits = answers = ctx_chars = 0
+        latencies = []
+        for query, expected_source, phrase in QUERIES:
+            start = time.perf_counter()
+            results = store.query([query], n_results=k)
+            latencies.append(time.perf_counter() - start)
+            documents = results.get("documents", [[]])[0]
+            metadatas = results.get("metadatas", [[]])[0]
+            hits += any(m.get("source") == expected_source for m in metadatas)
+            # Only the prefix the model embeds can have matched the query.
+            answers += any(
+                phrase in " ".join(doc.split()[:MODEL_VISIBLE_TOKENS])
+                for doc in documents
+            )
+            ctx_chars += sum(len(doc) for doc in documents)
+
+        n = len(QUERIES)
+        print(
+            f"{label:<18} entries={len(entries):<5} hit@{k}={hits / n:.2f} "
+            f"answer@{k}={answers / n:.2f} "
+            f"ctx_chars/query={ctx_chars / n:>8.0f} index={index_seconds:.2f}s "
+            f"p50={percentile(latencies, 50) * 1000:.1f}ms "
+            f"p95={percentile(latencies, 95) * 1000:.1f}ms"
+        )
+    finally:
+        shutil.rmtree(store_dir, ignore_errors=True)
+
+
+def parse_window(value: str):
+    tokens, overlap = value.split(":")
+    return int(tokens), int(overlap)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument(
+        "--windows",
+        type=parse_window,
+        nargs="+",
+        default=[(100, 20), (150, 30), (250, 50)],
+        help="Chunk windows as tokens:overlap.",
+    )
+    parser.add_argument("--embedding-model", default="all-MiniLM-L6-v2")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    evaluate("whole-file", build_entries(corpus, None), args.k, args.embedding_model)
+    for window in args.windows:
+        evaluate(
+            f"chunked {window[0]}:{window[1]}",
+            build_entries(corpus, window),
+            args.k,
+            args.embedding_model,
+        )
@@ -0,0 +1,110 @@
+# benchmarks/bench_rag_hybrid.py
+"""Recall@k and latency of vector-only vs. hybrid (vector + BM25, RRF) retrieval.
+
+Indexes docs/ into a throwaway RAGKernel and runs labelled queries, half of them built
+around exact identifiers (file names, status names, rule versions). A query counts as
+recalled when one of the top-k passages contains its expected phrase. Each mode is run
+--repeats times to get stable p50/p95 latencies.
+
+Usage:
+  python benchmarks/bench_rag_hybrid.py --k 3 --repeats 20
+"""
+import os
+import sys
+import time
+import shutil
+import pathlib
+import argparse
+import tempfile
+from typing import List
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("RAG_EMBEDDING_CACHE", "0")
+from core.rag.kernel import RAGKernel  # noqa: E402
+
+QUERIES = [
+    ("How should an agent create a plan before acting?", "before** taking action"),
+    ("Which script verifies a network port is available?", "port_guard.py"),
+    (
+        "What identity JSON does an agent send to the dispatcher?",
+        "accepted_rules_version",
+    ),
+    ("Where do module completion reports go?", "progress_<component>.md"),
+    ("Which reverse proxy and SSO provider does the platform use?", "Authelia"),
+    (
+        "What are the failure modes of misrouting shallow reasoning tasks?",
+        "Failure Modes if Misrouted",
+    ),
+    # Identifier-heavy prompts, the way tasks actually reference things.
+    ("port_guard.py", "port_guard.py"),
+    ("v1.3.2 update RAG MCP A2A enforcement", "v1.3.2 Update"),
+    ("accepted_rules_version field", "accepted_rules_version"),
+    ("placeholders.md", "placeholders.md"),
+    ("PLAN.md", "PLAN.md"),
+    ("progress_rag.md status", "progress_"),
+]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return (
+        ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+        if ordered
+        else 0.0
+    )
+
+
+def evaluate(kernel: RAGKernel, label: str, k: int, repeats: int, **options):
+    recalled = 0
+    latencies = []
+    for _ in range(repeats):
+        for query, phrase in QUERIES:
+            start = time.perf_counter()
+            lessons = kernel.get_relevant_lessons_batch(
+                [query], n_results=k, **options
+            )[0]
+            latencies.append(time.perf_counter() - start)
+            if _ == 0:
+                recalled += any(
+                    phrase in lesson["document_content"] for lesson in lessons
+                )
+    print(
+        f"{label:<16} recall@{k}={recalled / len(QUERIES):.2f} "
+        f"p50={percentile(latencies, 50) * 1000:.2f}ms "
+        f"p95={percentile(latencies, 95) * 1000:.2f}ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    store_dir = tempfile.mkdtemp(prefix="bench_rag_hybrid_")
+    try:
+        kernel = RAGKernel(vector_store_path=store_dir, collection_name="bench_hybrid")
+        kernel.initialize_and_embed_lessons(force_reindex=True)
+        print(
+            f"lexical index: {len(kernel.vector_store.lexical_index)} chunks, "
+            f"{kernel.vector_store.lexical_index.memory_bytes() / 1024:.0f} KiB of "
+            "postings"
+        )
+        evaluate(kernel, "vector", args.k, args.repeats, mode="vector")
+        evaluate(
+            kernel, "hybrid", args.k, args.repeats, mode="hybrid", rerank_results=False
+        )
+        evaluate(
+            kernel,
+            "hybrid+rerank",
+            args.k,
+            args.repeats,
+            mode="hybrid",
+            rerank_results=True,
+        )
+    finally:
+        shutil.rmtree(store_dir, ignore_errors=True)
@@ -0,0 +1,80 @@
+# benchmarks/bench_startup.py
+"""Cold start of the single-shot agent runner when there is nothing to do.
+
+Runs `python -X importtime scripts/agent_runner.py` --runs times against a database with
+no approved tasks and reports wall-clock time to exit, peak RSS and the slowest imports
+(cumulative, from the -X importtime log of the last run). Use --module to time a bare
+import instead, e.g. --module core.rag.kernel.
+
+Usage:
+  DATABASE_URL=... python benchmarks/bench_startup.py --runs 5
+"""
+import os
+import sys
+import time
+import pathlib
+import argparse
+import resource
+import subprocess
+from typing import List, Tuple
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+
+def parse_importtime(stderr: str, top: int) -> List[Tuple[int, str]]:
+    # Lines look like "import time:   self [us] |  cumulative | imported package".
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (
+            part.strip() for part in line[len("import time:") :].split("|")
+        )
+        if not name.startswith(" "):
+            entries.append((int(cumulative), name))
+    return sorted(entries, reverse=True)[:top]
+
+
+def run_once(command: List[str]) -> Tuple[float, str]:
+    env = dict(
+        os.environ, PYTHONPATH=str(ROOT), LOG_LEVEL=os.getenv("LOG_LEVEL", "WARNING")
+    )
+    start = time.perf_counter()
+    proc = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        print(proc.stderr[-2000:], file=sys.stderr)
+        raise SystemExit(f"command failed with exit code {proc.returncode}")
+    return elapsed, proc.stderr
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument(
+        "--module", help="Time `import MODULE` instead of a runner invocation."
+    )
+    args = parser.parse_args()
+
+    if args.module:
+        command = [sys.executable, "-X", "importtime", "-c", f"import {args.module}"]
+    else:
+        command = [sys.executable, "-X", "importtime", "scripts/agent_runner.py"]
+    timings = []
+    stderr = ""
+    for _ in range(args.runs):
+        elapsed, stderr = run_once(command)
+        timings.append(elapsed)
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    print(
+        f"{' '.join(command[3:])}: min={min(timings) * 1000:.0f}ms "
+        f"median={sorted(timings)[len(timings) // 2] * 1000:.0f}ms "
+        f"max={max(timings) * 1000:.0f}ms peak_rss={peak_rss_mb:.0f}MB over "
+        f"{args.runs} runs"
+    )
+    print("slowest top-level imports (cumulative):")
+    for cumulative_us, name in parse_importtime(stderr, args.top):
+        print(f"  {cumulative_us / 1000:8.1f}ms  {name}")
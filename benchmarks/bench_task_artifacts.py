@@ -0,0 +1,233 @@
+# benchmarks/bench_task_artifacts.py
+"""Plan storage: loose files vs. task_artifacts with compressed, deduplicated blobs.
+
+In a scratch schema (migrations applied) seeds --tasks tasks and renders a plan for
+each, as the agent runner does (prompt plus three lesson snippets from docs/). Then
+compares:
+  * writing every plan as PLAN_<title>_<id>.md into a temporary directory vs. storing
+    them as "plan" artifacts, --batch per transaction (core/artifacts.store_artifacts);
+    storing them all a second time (as a retried task does) writes no new blob;
+  * space used: the files (allocated blocks) vs. task_artifacts + artifact_blobs (with
+    indexes);
+  * reading a plan by task id: the file vs. the artifact sent gzip-encoded as stored,
+    the artifact inflated, and the conditional check a GET with a matching If-None-Match
+    makes (no blob read).
+The scratch schema is dropped afterwards unless --keep is given.
+
+Usage:
+  DATABASE_URL=... python benchmarks/bench_task_artifacts.py --tasks 20000
+"""
+import sys
+import time
+import random
+import shutil
+import asyncio
+import pathlib
+import argparse
+import tempfile
+from typing import List
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import psycopg  # noqa: E402
+from psycopg.conninfo import make_conninfo  # noqa: E402
+from agent_runner import (  # noqa: E402
+    DATABASE_URL,
+    format_lessons,
+    plan_filename_for,
+    render_plan,
+)
+from core.artifacts import decode_blob, make_artifact, store_artifacts  # noqa: E402
+from ui.dispatcher.migrations import apply_migrations  # noqa: E402
+
+SCHEMA = "bench_task_artifacts"
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return (
+        ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+        if ordered
+        else 0.0
+    )
+
+
+def report(label: str, latencies: List[float]):
+    print(
+        f"{label:<44} p50 {percentile(latencies, 50) * 1000:8.3f} ms   p99 "
+        f"{percentile(latencies, 99) * 1000:8.3f} ms"
+    )
+
+
+def make_plans(tasks: int, rng: random.Random):
+    paragraphs = [
+        p.strip()
+        for path in sorted((ROOT / "docs").glob("**/*.md"))
+        for p in path.read_text().split("\n\n")
+        if len(p.strip()) > 80
+    ]
+    plans = []
+    for task_id in range(1, tasks + 1):
+        task = {
+            "id": task_id,
+            "title": f"Plan task {task_id}",
+            "prompt": f"How should the agent handle case {task_id}?\n"
+            + rng.choice(paragraphs),
+        }
+        lessons = [
+            {
+                "metadata": {"source": "docs"},
+                "distance": rng.random(),
+                "document_content": rng.choice(paragraphs),
+            }
+            for _ in range(3)
+        ]
+        plans.append((task, render_plan(task, format_lessons(lessons))))
+    return plans
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--reads", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--keep", action="store_true", help=f"Keep the '{SCHEMA}' schema afterwards."
+    )
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    dsn = make_conninfo(DATABASE_URL, options=f"-c search_path={SCHEMA}")
+    with psycopg.connect(dsn, autocommit=True) as admin:
+        admin.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        admin.execute(f"CREATE SCHEMA {SCHEMA}")
+    plans_dir = pathlib.Path(tempfile.mkdtemp(prefix="bench_task_artifacts_"))
+    try:
+        asyncio.run(apply_migrations(dsn))
+        plans = make_plans(args.tasks, rng)
+        with psycopg.connect(dsn) as conn:
+            conn.execute(
+                "INSERT INTO agent_tasks (id, title, prompt, status, created_unix) "
+                "SELECT g, 'Plan task ' || g, 'prompt', 'pending_approval', %s FROM "
+                "generate_series(1, %s) AS g",
+                (int(time.time()), args.tasks),
+            )
+            conn.commit()
+
+            started = time.perf_counter()
+            paths = {}
+            for task, content in plans:
+                paths[task["id"]] = plans_dir / plan_filename_for(task)
+                paths[task["id"]].write_text(content)
+            file_seconds = time.perf_counter() - started
+
+            def store_all() -> float:
+                started = time.perf_counter()
+                for i in range(0, len(plans), args.batch):
+                    artifacts = [
+                        make_artifact(
+                            task["id"],
+                            "plan",
+                            content,
+                            filename=plan_filename_for(task),
+                        )
+                        for task, content in plans[i : i + args.batch]
+                    ]
+                    with conn.cursor() as cursor:
+                        store_artifacts(cursor, artifacts)
+                    conn.commit()
+                return time.perf_counter() - started
+
+            db_seconds = store_all()
+            print(
+                f"{args.tasks} plans, "
+                f"{sum(len(c.encode()) for _, c in plans) / 1e6:.1f} MB of text"
+            )
+            print(
+                f"{'write as files':<30}{file_seconds:6.2f}s = "
+                f"{args.tasks / file_seconds * 60:9.0f} plans/min"
+            )
+            print(
+                f"{f'store as artifacts, {args.batch} per tx':<30}{db_seconds:6.2f}s = "
+                f"{args.tasks / db_seconds * 60:9.0f} plans/min"
+            )
+            blobs_before = conn.execute(
+                "SELECT count(*) FROM artifact_blobs"
+            ).fetchone()[0]
+            db_seconds = store_all()
+            new_blobs = (
+                conn.execute("SELECT count(*) FROM artifact_blobs").fetchone()[0]
+                - blobs_before
+            )
+            print(
+                f"{'store all again':<30}{db_seconds:6.2f}s = "
+                f"{args.tasks / db_seconds * 60:9.0f} plans/min, {new_blobs} new blobs"
+            )
+
+            file_bytes = sum(path.stat().st_blocks * 512 for path in paths.values())
+            db_bytes = conn.execute(
+                "SELECT pg_total_relation_size('task_artifacts') + "
+                "pg_total_relation_size('artifact_blobs')"
+            ).fetchone()[0]
+            blobs, gzipped = conn.execute(
+                "SELECT count(*), count(*) FILTER (WHERE encoding = 'gzip') FROM "
+                "artifact_blobs"
+            ).fetchone()
+            print(
+                f"space: files {file_bytes / 1e6:.1f} MB ({args.tasks} files), "
+                f"database {db_bytes / 1e6:.1f} MB "
+                f"({blobs} blobs for {args.tasks} artifacts, {gzipped} gzip-compressed)"
+            )
+
+            ids = [rng.randint(1, args.tasks) for _ in range(args.reads)]
+            timings = {"file": [], "gzip": [], "inflated": [], "conditional": []}
+            for task_id in ids:
+                started = time.perf_counter()
+                paths[task_id].read_bytes()
+                timings["file"].append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                conn.execute(
+                    "SELECT a.sha256, b.encoding, b.content FROM task_artifacts a JOIN "
+                    "artifact_blobs b USING (sha256) "
+                    "WHERE a.task_id = %s AND a.kind = 'plan'",
+                    (task_id,),
+                ).fetchone()
+                timings["gzip"].append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                _, encoding, content = conn.execute(
+                    "SELECT a.sha256, b.encoding, b.content FROM task_artifacts a JOIN "
+                    "artifact_blobs b USING (sha256) "
+                    "WHERE a.task_id = %s AND a.kind = 'plan'",
+                    (task_id,),
+                ).fetchone()
+                decode_blob(content, encoding)
+                timings["inflated"].append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                conn.execute(
+                    "SELECT sha256 FROM task_artifacts WHERE task_id = %s AND kind = "
+                    "'plan'",
+                    (task_id,),
+                ).fetchone()
+                timings["conditional"].append(time.perf_counter() - started)
+            conn.rollback()
+            report("read file", timings["file"])
+            report("read artifact, gzip as stored", timings["gzip"])
+            report("read artifact, inflated", timings["inflated"])
+            report("conditional GET check (If-None-Match)", timings["conditional"])
+    finally:
+        shutil.rmtree(plans_dir, ignore_errors=True)
+        if not args.keep:
+            with psycopg.connect(dsn, autocommit=True) as admin:
+                admin.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+# core/a2a/async_dispatcher.py
+import os
+import random
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Union
+
+import httpx
+
+from core.a2a.dispatcher import (
+    A2ADispatchError,
+    DISPATCHER_API_BASE_URL,
+    A2A_HTTP_POOL_SIZE,
+    A2A_HTTP_MAX_RETRIES,
+    A2A_HTTP_BACKOFF_FACTOR,
+    A2A_HTTP_CONNECT_TIMEOUT,
+    A2A_HTTP_READ_TIMEOUT,
+    A2A_BULK_BATCH_SIZE,
+    RETRY_STATUS_CODES,
+    IDEMPOTENT_METHODS,
+    order_for_bulk,
+    bulk_item,
+)
+
+logger = logging.getLogger(__name__)
+# Upper bound on requests in flight from one AsyncA2ADispatcher, however many subtasks
+# are fanned out.
+A2A_MAX_CONCURRENCY = int(os.getenv("A2A_MAX_CONCURRENCY", "50"))
+
+
+class AsyncA2ADispatcher:
+    # httpx-based counterpart of A2ADispatcher for orchestrators that fan out many
+    # subtasks at once. Requests share one keep-alive pool; a semaphore caps the
+    # requests in flight. Retries use exponential backoff with full jitter: connect
+    # errors are retried for every method, read errors and 429/502/503/504 only for
+    # idempotent ones.
+    def __init__(
+        self,
+        base_url: str = DISPATCHER_API_BASE_URL,
+        pool_size: int = A2A_HTTP_POOL_SIZE,
+        max_concurrency: int = A2A_MAX_CONCURRENCY,
+        max_retries: int = A2A_HTTP_MAX_RETRIES,
+        backoff_factor: float = A2A_HTTP_BACKOFF_FACTOR,
+        timeout: float = A2A_HTTP_READ_TIMEOUT,
+        connect_timeout: float = A2A_HTTP_CONNECT_TIMEOUT,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            limits=httpx.Limits(
+                max_connections=pool_size, max_keepalive_connections=pool_size
+            ),
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            transport=transport,
+        )
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, self.backoff_factor * (2**attempt))
+
+    async def _request(
+        self, method: str, path: str, timeout: Optional[float] = None, **kwargs
+    ) -> Any:
+        idempotent = method in IDEMPOTENT_METHODS
+        request_timeout = httpx.USE_CLIENT_DEFAULT if timeout is None else timeout
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    response = await self.client.request(
+                        method, path, timeout=request_timeout, **kwargs
+                    )
+                if (
+                    response.status_code in RETRY_STATUS_CODES
+                    and idempotent
+                    and attempt < self.max_retries
+                ):
+                    raise httpx.HTTPStatusError(
+                        f"HTTP {response.status_code}",
+                        request=response.request,
+                        response=response,
+                    )
+            except (
+                httpx.ConnectError,
+                httpx.ConnectTimeout,
+                httpx.HTTPStatusError,
+                httpx.ReadError,
+                httpx.ReadTimeout,
+                httpx.RemoteProtocolError,
+            ) as e:
+                retryable = (
+                    isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+                    or idempotent
+                )
+                if not retryable or attempt >= self.max_retries:
+                    logger.error(
+                        f"{method} {self.base_url}{path} failed after {attempt + 1} "
+                        f"attempt(s): {e}"
+                    )
+                    raise A2ADispatchError(f"{method} {path} failed: {e}") from e
+                delay = self._backoff(attempt)
+                attempt += 1
+                logger.warning(
+                    f"{method} {path} failed ({e}); retry {attempt}/{self.max_retries} "
+                    f"in {delay:.2f}s."
+                )
+                await asyncio.sleep(delay)
+                continue
+            except httpx.HTTPError as e:
+                raise A2ADispatchError(f"{method} {path} failed: {e}") from e
+
+            if response.status_code >= 400:
+                logger.error(
+                    f"HTTP error {response.status_code} from {method} "
+                    f"{self.base_url}{path} - Response: {response.text[:500]}"
+                )
+                raise A2ADispatchError(
+                    f"{method} {path} returned HTTP {response.status_code}",
+                    status_code=response.status_code,
+                    response_text=response.text,
+                )
+            try:
+                return response.json()
+            except ValueError as e:
+                raise A2ADispatchError(
+                    f"{method} {path} returned a non-JSON response",
+                    status_code=response.status_code,
+                    response_text=response.text,
+                ) from e
+
+    async def dispatch_subtask_to_agent(
+        self,
+        parent_task_id: int,
+        title: str,
+        prompt: str,
+        assigned_agent: Optional[str] = None,
+        timeout: Optional[float] = None,
+        required_capabilities: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        payload = {
+            "title": title,
+            "prompt": prompt,
+            "assigned_agent": assigned_agent,
+            "required_capabilities": required_capabilities or [],
+        }
+        return await self._request(
+            "POST", f"/tasks/{parent_task_id}/subtasks", json=payload, timeout=timeout
+        )
+
+    async def dispatch_subtasks(
+        self,
+        parent_task_id: int,
+        subtasks: List[Dict[str, Any]],
+        timeout: Optional[float] = None,
+    ) -> List[Union[Dict[str, Any], A2ADispatchError]]:
+        # Dispatches all subtasks concurrently (bounded by max_concurrency). Results are
+        # in input order; a failed subtask yields its A2ADispatchError instead of
+        # failing the whole batch.
+        results = await asyncio.gather(
+            *(
+                self.dispatch_subtask_to_agent(
+                    parent_task_id,
+                    s["title"],
+                    s["prompt"],
+                    s.get("assigned_agent"),
+                    timeout=timeout,
+                    required_capabilities=s.get("required_capabilities"),
+                )
+                for s in subtasks
+            ),
+            return_exceptions=True,
+        )
+        failed = sum(isinstance(r, BaseException) for r in results)
+        logger.info(
+            f"Dispatched {len(subtasks) - failed}/{len(subtasks)} subtasks for parent "
+            f"{parent_task_id}."
+        )
+        for r in results:
+            if isinstance(r, BaseException) and not isinstance(r, A2ADispatchError):
+                raise r
+        return results
+
+    async def dispatch_subtasks_bulk(
+        self,
+        parent_task_id: int,
+        subtasks: List[Dict[str, Any]],
+        batch_size: int = A2A_BULK_BATCH_SIZE,
+        timeout: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        # Same contract as A2ADispatcher.dispatch_subtasks_bulk: batches are sent one
+        # after another.
+        order = order_for_bulk(subtasks)
+        created: List[Optional[Dict[str, Any]]] = [None] * len(subtasks)
+        ref_ids: Dict[str, int] = {}
+        for start in range(0, len(order), batch_size):
+            indexes = order[start : start + batch_size]
+            batch = [bulk_item(subtasks[i], ref_ids) for i in indexes]
+            rows = await self._request(
+                "POST",
+                f"/tasks/{parent_task_id}/subtasks/bulk",
+                json={"subtasks": batch},
+                timeout=timeout,
+            )
+            for i, item, row in zip(indexes, batch, rows):
+                created[i] = row
+                if item["ref"] is not None:
+                    ref_ids[item["ref"]] = row["id"]
+        return created
+
+    async def get_subtasks_statuses(
+        self, parent_task_id: int, timeout: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        return await self._request(
+            "GET", f"/tasks/{parent_task_id}/subtasks_status", timeout=timeout
+        )
+
+    async def get_subtasks_summary(
+        self, parent_task_id: int, timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        return await self._request(
+            "GET", f"/tasks/{parent_task_id}/subtasks/summary", timeout=timeout
+        )
+
+    async def wait_for_subtasks(
+        self, parent_task_id: int, wait_seconds: float = 30
+    ) -> Dict[str, Any]:
+        # Long-poll; the connection is parked on the server, so thousands of waiters
+        # cost no polling traffic.
+        return await self._request(
+            "GET",
+            f"/tasks/{parent_task_id}/subtasks/wait",
+            params={"timeout": wait_seconds},
+            timeout=wait_seconds + A2A_HTTP_READ_TIMEOUT,
+        )
+
+    async def append_task_logs(
+        self,
+        task_id: int,
+        entries: List[Dict[str, Any]],
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        return await self._request(
+            "POST", f"/tasks/{task_id}/logs", json={"entries": entries}, timeout=timeout
+        )
+
+    async def tail_task_logs(
+        self, task_id: int, since_id: int = 0, wait_seconds: float = 0
+    ) -> Dict[str, Any]:
+        return await self._request(
+            "GET",
+            f"/tasks/{task_id}/logs/tail",
+            params={"since_id": since_id, "wait": wait_seconds},
+            timeout=wait_seconds + A2A_HTTP_READ_TIMEOUT,
+        )
+
+    async def register_agent(
+        self,
+        name: str,
+        port: int,
+        description: Optional[str] = None,
+        host: str = "localhost",
+        capabilities: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        return await self._request(
+            "POST",
+            "/agents",
+            json={
+                "name": name,
+                "port": port,
+                "description": description,
+                "host": host,
+                "capabilities": capabilities or [],
+            },
+        )
+
+    async def send_heartbeat(
+        self, agent_name: str, status: str = "idle", timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        return await self._request(
+            "POST",
+            f"/agents/{agent_name}/heartbeat",
+            json={"status": status},
+            timeout=timeout,
+        )
+
+    async def lookup_agent(
+        self, name: Optional[str] = None, port: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        params = {"name": name} if name is not None else {"port": port}
+        try:
+            return await self._request("GET", "/agents/lookup", params=params)
+        except A2ADispatchError as e:
+            if e.status_code == 404:
+                return None
+            raise
@@ -1,91 +1,332 @@
 # core/a2a/dispatcher.py
 import logging
 import requests
-from typing import Dict, Any, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, Any, List, Optional, Tuple, Union
 import os
 
+from core.a2a.subtask_tracker import topological_order
+
 logger = logging.getLogger(__name__)
-DISPATCHER_API_BASE_URL = os.getenv("DISPATCHER_API_BASE_URL", "http://dispatcher:8000/api")
+DISPATCHER_API_BASE_URL = os.getenv(
+    "DISPATCHER_API_BASE_URL", "http://dispatcher:8000/api"
+)
+# Connection pool and retry settings shared by A2ADispatcher and AsyncA2ADispatcher.
+A2A_HTTP_POOL_SIZE = int(os.getenv("A2A_HTTP_POOL_SIZE", "10"))
+A2A_HTTP_MAX_RETRIES = int(os.getenv("A2A_HTTP_MAX_RETRIES", "3"))
+A2A_HTTP_BACKOFF_FACTOR = float(
+    os.getenv("A2A_HTTP_BACKOFF_FACTOR", "0.5")
+)  # sleeps 0.5s, 1s, 2s, ... (+ jitter)
+A2A_HTTP_BACKOFF_JITTER = float(os.getenv("A2A_HTTP_BACKOFF_JITTER", "0.25"))
+A2A_HTTP_CONNECT_TIMEOUT = float(os.getenv("A2A_HTTP_CONNECT_TIMEOUT", "3"))
+A2A_HTTP_READ_TIMEOUT = float(os.getenv("A2A_HTTP_READ_TIMEOUT", "10"))
+A2A_BULK_BATCH_SIZE = int(
+    os.getenv("A2A_BULK_BATCH_SIZE", "1000")
+)  # keep <= the dispatcher's SUBTASK_BULK_MAX_ITEMS
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+# POST creates a task, so it is only retried when the request never reached the server
+# (connect errors).
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+class A2ADispatchError(Exception):
+    def __init__(
+        self,
+        message: str,
+        status_code: Optional[int] = None,
+        response_text: Optional[str] = None,
+    ):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response_text = response_text
+
+
+def build_session(
+    pool_size: int = A2A_HTTP_POOL_SIZE,
+    max_retries: int = A2A_HTTP_MAX_RETRIES,
+    backoff_factor: float = A2A_HTTP_BACKOFF_FACTOR,
+    backoff_jitter: float = A2A_HTTP_BACKOFF_JITTER,
+) -> requests.Session:
+    # A keep-alive connection pool of pool_size connections per host, with exponential
+    # backoff and jitter on connect errors, and on read errors / retryable statuses for
+    # idempotent methods only.
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        backoff_jitter=backoff_jitter,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=IDEMPOTENT_METHODS,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def order_for_bulk(subtasks: List[Dict[str, Any]]) -> List[int]:
+    # Indexes of subtasks with every subtask after those it names in depends_on_refs, so
+    # each bulk batch only refers to subtasks in the same or an earlier batch. Raises
+    # DependencyCycleError on a cycle.
+    ref_index = {
+        s["ref"]: i for i, s in enumerate(subtasks) if s.get("ref") is not None
+    }
+    dependencies = {
+        i: [ref_index[r] for r in s.get("depends_on_refs", ()) if r in ref_index]
+        for i, s in enumerate(subtasks)
+    }
+    return topological_order(range(len(subtasks)), dependencies)
+
+
+def bulk_item(subtask: Dict[str, Any], ref_ids: Dict[str, int]) -> Dict[str, Any]:
+    # Refs to subtasks created by an earlier batch become plain task-id dependencies.
+    depends_on = list(subtask.get("depends_on", ()))
+    depends_on_refs = []
+    for ref in subtask.get("depends_on_refs", ()):
+        if ref in ref_ids:
+            depends_on.append(ref_ids[ref])
+        else:
+            depends_on_refs.append(ref)
+    return {
+        "title": subtask["title"],
+        "prompt": subtask["prompt"],
+        "assigned_agent": subtask.get("assigned_agent"),
+        "ref": subtask.get("ref"),
+        "depends_on": depends_on,
+        "depends_on_refs": depends_on_refs,
+        "required_capabilities": list(subtask.get("required_capabilities", ())),
+    }
+
 
 class A2ADispatcher:
-    def __init__(self, base_url: str = DISPATCHER_API_BASE_URL):
-        self.base_url = base_url
+    # One instance (and its pooled session) is meant to be shared by all dispatch calls
+    # of a process. Failed calls raise A2ADispatchError once retries are exhausted.
+    def __init__(
+        self,
+        base_url: str = DISPATCHER_API_BASE_URL,
+        pool_size: int = A2A_HTTP_POOL_SIZE,
+        max_retries: int = A2A_HTTP_MAX_RETRIES,
+        backoff_factor: float = A2A_HTTP_BACKOFF_FACTOR,
+        backoff_jitter: float = A2A_HTTP_BACKOFF_JITTER,
+        timeout: Timeout = (A2A_HTTP_CONNECT_TIMEOUT, A2A_HTTP_READ_TIMEOUT),
+        session: Optional[requests.Session] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = session or build_session(
+            pool_size, max_retries, backoff_factor, backoff_jitter
+        )
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
 
-    def dispatch_subtask_to_agent(self, parent_task_id: int, title: str, prompt: str, assigned_agent: Optional[str] = None) -> Optional[Dict[str, Any]]:
-        endpoint = f"{self.base_url}/tasks/{parent_task_id}/subtasks"
+    def __exit__(self, *exc):
+        self.close()
+
+    def _request(
+        self, method: str, path: str, timeout: Optional[Timeout] = None, **kwargs
+    ) -> Any:
+        endpoint = f"{self.base_url}{path}"
+        try:
+            response = self.session.request(
+                method, endpoint, timeout=timeout or self.timeout, **kwargs
+            )
+        except requests.exceptions.RequestException as e:
+            logger.error(f"{method} {endpoint} failed: {e}")
+            raise A2ADispatchError(f"{method} {endpoint} failed: {e}") from e
+        if response.status_code >= 400:
+            logger.error(
+                f"HTTP error {response.status_code} from {method} {endpoint} - "
+                f"Response: {response.text[:500]}"
+            )
+            raise A2ADispatchError(
+                f"{method} {endpoint} returned HTTP {response.status_code}",
+                status_code=response.status_code,
+                response_text=response.text,
+            )
+        try:
+            return response.json()
+        except ValueError as e:
+            raise A2ADispatchError(
+                f"{method} {endpoint} returned a non-JSON response",
+                status_code=response.status_code,
+                response_text=response.text,
+            ) from e
+
+    def dispatch_subtask_to_agent(
+        self,
+        parent_task_id: int,
+        title: str,
+        prompt: str,
+        assigned_agent: Optional[str] = None,
+        timeout: Optional[Timeout] = None,
+        required_capabilities: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        # Without assigned_agent the dispatcher routes the subtask to a live, lightly
+        # loaded agent that has every tag in required_capabilities (the chosen agent is
+        # in the response).
         payload = {
             "title": title,
             "prompt": prompt,
-            "assigned_agent": assigned_agent
+            "assigned_agent": assigned_agent,
+            "required_capabilities": required_capabilities or [],
         }
+        logger.info(
+            f"Dispatching subtask for parent {parent_task_id} to agent "
+            f"{assigned_agent or 'any'} with title '{title}'"
+        )
+        created_subtask = self._request(
+            "POST", f"/tasks/{parent_task_id}/subtasks", json=payload, timeout=timeout
+        )
+        logger.info(
+            f"Successfully dispatched subtask {created_subtask.get('id')} for parent "
+            f"{parent_task_id}."
+        )
+        return created_subtask
 
-        logger.info(f"Dispatching subtask for parent {parent_task_id} to agent {assigned_agent or 'any'} with title '{title}' to endpoint {endpoint}")
-        try:
-            response = requests.post(endpoint, json=payload, timeout=10) # Increased timeout slightly
-            response.raise_for_status()
-            created_subtask = response.json()
-            logger.info(f"Successfully dispatched subtask. Received subtask details: {created_subtask}")
-            return created_subtask
-        except requests.exceptions.HTTPError as http_err:
-            logger.error(f"HTTP error occurred while dispatching subtask to {endpoint}: {http_err} - Response: {http_err.response.text if http_err.response else 'No response text'}")
-            return None
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to dispatch subtask via API to {endpoint}: {e}", exc_info=True)
-            return None
-        except Exception as e: # Catch any other unexpected errors, like JSONDecodeError if response is not JSON
-            logger.error(f"An unexpected error occurred in dispatch_subtask_to_agent: {e}", exc_info=True)
-            return None
+    def dispatch_subtasks_bulk(
+        self,
+        parent_task_id: int,
+        subtasks: List[Dict[str, Any]],
+        batch_size: int = A2A_BULK_BATCH_SIZE,
+        timeout: Optional[Timeout] = None,
+    ) -> List[Dict[str, Any]]:
+        # One request (and one transaction) per batch_size subtasks; returns the created
+        # subtasks in input order. Subtasks may carry "ref", "depends_on" (task ids) and
+        # "depends_on_refs"; they are sent in dependency order, so a DAG of any size can
+        # span batches. A failing batch raises, leaving earlier batches created.
+        order = order_for_bulk(subtasks)
+        created: List[Optional[Dict[str, Any]]] = [None] * len(subtasks)
+        ref_ids: Dict[str, int] = {}
+        for start in range(0, len(order), batch_size):
+            indexes = order[start : start + batch_size]
+            batch = [bulk_item(subtasks[i], ref_ids) for i in indexes]
+            rows = self._request(
+                "POST",
+                f"/tasks/{parent_task_id}/subtasks/bulk",
+                json={"subtasks": batch},
+                timeout=timeout,
+            )
+            for i, item, row in zip(indexes, batch, rows):
+                created[i] = row
+                if item["ref"] is not None:
+                    ref_ids[item["ref"]] = row["id"]
+        logger.info(
+            f"Bulk-dispatched {len(created)} subtasks for parent {parent_task_id}."
+        )
+        return created
 
-    def get_subtasks_statuses(self, parent_task_id: int) -> Optional[List[Dict[str, Any]]]:
-        endpoint = f"{self.base_url}/tasks/{parent_task_id}/subtasks_status"
-        logger.info(f"Getting subtask statuses for parent task ID {parent_task_id} from {endpoint}")
+    def get_subtasks_statuses(
+        self, parent_task_id: int, timeout: Optional[Timeout] = None
+    ) -> List[Dict[str, Any]]:
+        subtasks_statuses = self._request(
+            "GET", f"/tasks/{parent_task_id}/subtasks_status", timeout=timeout
+        )
+        logger.info(
+            f"Successfully retrieved {len(subtasks_statuses)} subtask statuses for "
+            f"parent {parent_task_id}."
+        )
+        return subtasks_statuses
 
-        try:
-            response = requests.get(endpoint, timeout=10)
-            response.raise_for_status()
-            subtasks_statuses = response.json()
-            logger.info(f"Successfully retrieved {len(subtasks_statuses)} subtask statuses for parent {parent_task_id}.")
-            return subtasks_statuses
-        except requests.exceptions.HTTPError as http_err:
-            logger.error(f"HTTP error occurred while getting subtask statuses from {endpoint}: {http_err} - Response: {http_err.response.text if http_err.response else 'No response text'}")
-            return None
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to get subtask statuses from API {endpoint}: {e}", exc_info=True)
-            return None
-        except Exception as e:
-            logger.error(f"An unexpected error occurred in get_subtasks_statuses: {e}", exc_info=True)
-            return None
-
-if __name__ == '__main__':
-    # Configure logging for the test script
-    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(name)s - %(module)s - %(funcName)s - %(message)s')
-    logger_main = logging.getLogger(__name__ + ".main_test") # Create a specific logger for this test block
-
-    # This test assumes the dispatcher service (running app.py) is accessible at DISPATCHER_API_BASE_URL.
-    # It also assumes a parent task with ID 1 exists, or the API handles it gracefully (which it should with a 404).
-    # For a more robust test, one might first create a parent task if it doesn't exist,
-    # but for this subtask, we'll test the dispatch call itself.
-    parent_task_id_for_test = 1
-    logger_main.info(f"Attempting to dispatch subtask for parent task ID {parent_task_id_for_test} using base URL: {DISPATCHER_API_BASE_URL}")
-
-    a2a_dispatcher_client = A2ADispatcher() # Uses DISPATCHER_API_BASE_URL by default
-    subtask_info = a2a_dispatcher_client.dispatch_subtask_to_agent(
-        parent_task_id=parent_task_id_for_test,
-        title="Subtask Example from a2a/dispatcher test",
-        prompt="This is a test subtask dispatched programmatically via A2ADispatcher.",
-        assigned_agent="TestSubtaskAgentForA2A"
-    )
+    def get_subtasks_summary(
+        self, parent_task_id: int, timeout: Optional[Timeout] = None
+    ) -> Dict[str, Any]:
+        # Per-status child counts plus "finished"; an O(1) read on the dispatcher.
+        return self._request(
+            "GET", f"/tasks/{parent_task_id}/subtasks/summary", timeout=timeout
+        )
 
-    if subtask_info:
-        logger_main.info(f"Subtask dispatch successful (from test). Subtask details: {subtask_info}")
+    def wait_for_subtasks(
+        self, parent_task_id: int, wait_seconds: float = 30
+    ) -> Dict[str, Any]:
+        # Long-polls until every subtask is done or failed, or wait_seconds pass; check
+        # "finished" on the result.
+        timeout = (A2A_HTTP_CONNECT_TIMEOUT, wait_seconds + A2A_HTTP_READ_TIMEOUT)
+        return self._request(
+            "GET",
+            f"/tasks/{parent_task_id}/subtasks/wait",
+            params={"timeout": wait_seconds},
+            timeout=timeout,
+        )
 
-        # Test getting subtask statuses
-        logger_main.info(f"Attempting to get subtask statuses for parent task ID {parent_task_id_for_test}")
-        statuses = a2a_dispatcher_client.get_subtasks_statuses(parent_task_id_for_test)
-        if statuses is not None: # Check for None, as an empty list is a valid successful response
-            logger_main.info(f"Subtask statuses for parent {parent_task_id_for_test}: {statuses}")
-        else:
-            logger_main.error(f"Failed to get subtask statuses for parent {parent_task_id_for_test}.")
+    def append_task_logs(
+        self,
+        task_id: int,
+        entries: List[Dict[str, Any]],
+        timeout: Optional[Timeout] = None,
+    ) -> Dict[str, Any]:
+        # entries: {"message", "level"?, "timestamp"?} dicts, written in one request
+        # (not retried, like any POST).
+        return self._request(
+            "POST", f"/tasks/{task_id}/logs", json={"entries": entries}, timeout=timeout
+        )
+
+    def tail_task_logs(
+        self, task_id: int, since_id: int = 0, wait_seconds: float = 0
+    ) -> Dict[str, Any]:
+        # Entries after since_id plus next_since_id; with wait_seconds > 0, long-polls
+        # for new entries.
+        timeout = (A2A_HTTP_CONNECT_TIMEOUT, wait_seconds + A2A_HTTP_READ_TIMEOUT)
+        return self._request(
+            "GET",
+            f"/tasks/{task_id}/logs/tail",
+            params={"since_id": since_id, "wait": wait_seconds},
+            timeout=timeout,
+        )
 
-    else:
-        logger_main.error(f"Subtask dispatch failed (from test). Check dispatcher logs for parent task ID {parent_task_id_for_test}.")
+    def register_agent(
+        self,
+        name: str,
+        port: int,
+        description: Optional[str] = None,
+        host: str = "localhost",
+        capabilities: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        # Raises A2ADispatchError with status_code 409 if the name or port is already
+        # registered.
+        return self._request(
+            "POST",
+            "/agents",
+            json={
+                "name": name,
+                "port": port,
+                "description": description,
+                "host": host,
+                "capabilities": capabilities or [],
+            },
+        )
+
+    def send_heartbeat(
+        self, agent_name: str, status: str = "idle", timeout: Optional[Timeout] = None
+    ) -> Dict[str, Any]:
+        # status is "idle" or "busy"; an agent that stops sending heartbeats is reported
+        # offline.
+        return self._request(
+            "POST",
+            f"/agents/{agent_name}/heartbeat",
+            json={"status": status},
+            timeout=timeout,
+        )
+
+    def lookup_agent(
+        self, name: Optional[str] = None, port: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        # The agent registered under name or on port, or None; answered from the
+        # dispatcher's in-memory registry.
+        params = {"name": name} if name is not None else {"port": port}
+        try:
+            return self._request("GET", "/agents/lookup", params=params)
+        except A2ADispatchError as e:
+            if e.status_code == 404:
+                return None
+            raise
@@ -0,0 +1,435 @@
+# core/a2a/registry.py
+import os
+import json
+import time
+import asyncio
+import logging
+import dataclasses
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Optional
+
+import psycopg
+from psycopg.rows import dict_row
+
+logger = logging.getLogger(__name__)
+
+# Channel the registry_services trigger
+# (sql/migrations/0005_agent_registry_liveness.sql) publishes on.
+AGENT_REGISTRY_CHANNEL = "agent_registry_events"
+# Channel the agent_load triggers (sql/migrations/0006_agent_load_routing.sql) publish
+# on.
+AGENT_LOAD_CHANNEL = "agent_load_events"
+# An agent whose last heartbeat is older than this is reported offline.
+AGENT_HEARTBEAT_TIMEOUT = int(os.getenv("AGENT_HEARTBEAT_TIMEOUT", "30"))
+# A heartbeat that changes nothing but the time is written at most this often per agent;
+# agents can beat every few seconds without a database write each time.
+AGENT_HEARTBEAT_WRITE_INTERVAL = int(
+    os.getenv(
+        "AGENT_HEARTBEAT_WRITE_INTERVAL", str(max(1, AGENT_HEARTBEAT_TIMEOUT // 3))
+    )
+)
+REPORTED_STATUSES = ("idle", "busy")
+REGISTRY_COLUMNS = (
+    "id, service_name, description, host, port, registered_unix, last_heartbeat_unix, "
+    "reported_status, capabilities"
+)
+LOAD_COLUMNS = "agent, queued, in_flight, completed, latency_ewma"
+
+
+class RegistryConflictError(ValueError):
+    def __init__(self, field: str, value: Any):
+        super().__init__(f"An agent with {field} {value!r} is already registered.")
+        self.field = field
+        self.value = value
+
+
+@dataclasses.dataclass(frozen=True)
+class AgentRecord:
+    id: int
+    name: str
+    description: Optional[str]
+    host: Optional[str]
+    port: int
+    registered_unix: int
+    last_heartbeat_unix: Optional[int] = None
+    reported_status: str = "idle"
+    capabilities: FrozenSet[str] = frozenset()
+
+    @classmethod
+    def from_row(cls, row: Mapping[str, Any]) -> "AgentRecord":
+        return cls(
+            row["id"],
+            row["service_name"],
+            row["description"],
+            row["host"],
+            row["port"],
+            row["registered_unix"],
+            row["last_heartbeat_unix"],
+            row["reported_status"],
+            frozenset(row["capabilities"] or ()),
+        )
+
+    def status(
+        self,
+        now: Optional[float] = None,
+        heartbeat_timeout: int = AGENT_HEARTBEAT_TIMEOUT,
+    ) -> str:
+        # idle/busy as last reported, or offline once heartbeats stop (or never
+        # started).
+        now = time.time() if now is None else now
+        if (
+            self.last_heartbeat_unix is None
+            or now - self.last_heartbeat_unix > heartbeat_timeout
+        ):
+            return "offline"
+        return self.reported_status
+
+
+@dataclasses.dataclass(frozen=True)
+class AgentLoad:
+    # Tasks assigned to an agent that are waiting (pending/approved) or running
+    # (in_progress), and the moving average of its claim-to-completion time in seconds
+    # (None until it finishes one).
+    queued: int = 0
+    in_flight: int = 0
+    completed: int = 0
+    latency_ewma: Optional[float] = None
+
+    @classmethod
+    def from_row(cls, row: Mapping[str, Any]) -> "AgentLoad":
+        return cls(
+            row["queued"], row["in_flight"], row["completed"], row["latency_ewma"]
+        )
+
+
+class RegistryIndex:
+    # In-memory copy of registry_services with O(1) lookups by id, name and port.
+    # Listing keeps the API's order (newest registration first); the sorted list is
+    # rebuilt only after a change that can affect it, so heartbeats do not re-sort.
+    # `version` changes whenever an agent is added, removed, renamed or given other
+    # capabilities, so derived views (core/a2a/router.py) know when to rebuild;
+    # heartbeats leave it alone.
+    def __init__(self, records: Iterable[AgentRecord] = ()):
+        self._by_id: Dict[int, AgentRecord] = {}
+        self._by_name: Dict[str, AgentRecord] = {}
+        self._by_port: Dict[int, AgentRecord] = {}
+        self._ordered: Optional[List[AgentRecord]] = None
+        self.version = 0
+        self.replace_all(records)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def replace_all(self, records: Iterable[AgentRecord]):
+        self._by_id, self._by_name, self._by_port = {}, {}, {}
+        for record in records:
+            self._put(record)
+        self._ordered = None
+        self.version += 1
+
+    def upsert(self, record: AgentRecord):
+        previous = self._by_id.get(record.id)
+        if previous is not None:
+            self._drop_keys(previous)
+        self._put(record)
+        if previous is None or (previous.name, previous.capabilities) != (
+            record.name,
+            record.capabilities,
+        ):
+            self.version += 1
+        if previous is None or previous.registered_unix != record.registered_unix:
+            self._ordered = None
+        elif self._ordered is not None:
+            self._ordered = [record if r.id == record.id else r for r in self._ordered]
+
+    def apply_heartbeat(
+        self, agent_id: int, last_heartbeat_unix: Optional[int], reported_status: str
+    ) -> Optional[AgentRecord]:
+        record = self._by_id.get(agent_id)
+        if record is None:
+            return None
+        updated = dataclasses.replace(
+            record,
+            last_heartbeat_unix=last_heartbeat_unix,
+            reported_status=reported_status,
+        )
+        self.upsert(updated)
+        return updated
+
+    def remove(self, agent_id: int) -> Optional[AgentRecord]:
+        record = self._by_id.pop(agent_id, None)
+        if record is not None:
+            self._drop_keys(record)
+            self._ordered = None
+            self.version += 1
+        return record
+
+    def get(self, agent_id: int) -> Optional[AgentRecord]:
+        return self._by_id.get(agent_id)
+
+    def by_name(self, name: str) -> Optional[AgentRecord]:
+        return self._by_name.get(name)
+
+    def by_port(self, port: int) -> Optional[AgentRecord]:
+        return self._by_port.get(port)
+
+    def port_available(self, port: int) -> bool:
+        return port not in self._by_port
+
+    def all(self) -> List[AgentRecord]:
+        if self._ordered is None:
+            self._ordered = sorted(
+                self._by_id.values(),
+                key=lambda r: (r.registered_unix, r.id),
+                reverse=True,
+            )
+        return self._ordered
+
+    def _put(self, record: AgentRecord):
+        self._by_id[record.id] = record
+        self._by_name[record.name] = record
+        self._by_port[record.port] = record
+
+    def _drop_keys(self, record: AgentRecord):
+        if self._by_name.get(record.name) is record:
+            del self._by_name[record.name]
+        if self._by_port.get(record.port) is record:
+            del self._by_port[record.port]
+        self._by_id.pop(record.id, None)
+
+
+class AgentRegistry:
+    # The agent registry service. registry_services in Postgres stays the source of
+    # truth; reads (listing, name/port lookups, status) are served from a RegistryIndex
+    # that a LISTEN on agent_registry_events keeps current across every dispatcher
+    # process. Heartbeat notifications carry their values and are applied directly;
+    # other changes re-read the one row. Per-agent load (agent_load) is followed the
+    # same way on agent_load_events, whose payloads carry the new totals. Both are
+    # reloaded in full on start and after every reconnect, since changes may have been
+    # missed.
+    def __init__(
+        self,
+        dsn: str,
+        heartbeat_timeout: int = AGENT_HEARTBEAT_TIMEOUT,
+        channel: str = AGENT_REGISTRY_CHANNEL,
+        load_channel: str = AGENT_LOAD_CHANNEL,
+    ):
+        self.dsn = dsn
+        self.heartbeat_timeout = heartbeat_timeout
+        self.channel = channel
+        self.load_channel = load_channel
+        self.index = RegistryIndex()
+        self.loads: Dict[str, AgentLoad] = {}
+        self.reloads = 0
+        self.notifications_received = 0
+        self._loaded = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, timeout: float = 30):
+        # Returns once the index has been loaded, so requests never see an empty
+        # registry.
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen_loop(), name="agent-registry")
+        await asyncio.wait_for(self._loaded.wait(), timeout)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def list_agents(self) -> List[AgentRecord]:
+        return self.index.all()
+
+    def lookup(
+        self, name: Optional[str] = None, port: Optional[int] = None
+    ) -> Optional[AgentRecord]:
+        return (
+            self.index.by_name(name) if name is not None else self.index.by_port(port)
+        )
+
+    def port_available(self, port: int) -> bool:
+        return self.index.port_available(port)
+
+    def status_of(self, record: AgentRecord, now: Optional[float] = None) -> str:
+        return record.status(now, self.heartbeat_timeout)
+
+    def load_of(self, name: str) -> AgentLoad:
+        return self.loads.get(name) or AgentLoad()
+
+    def record_assignment(self, name: str, count: int = 1):
+        # Counts tasks just assigned to `name` right away, so a burst of routing
+        # decisions sees them before agent_load_events delivers the committed totals
+        # (which then replace this estimate).
+        load = self.load_of(name)
+        self.loads[name] = dataclasses.replace(load, queued=load.queued + count)
+
+    async def register(
+        self,
+        conn: psycopg.AsyncConnection,
+        name: str,
+        port: int,
+        description: Optional[str] = None,
+        host: Optional[str] = "localhost",
+        capabilities: Iterable[str] = (),
+    ) -> AgentRecord:
+        # Raises RegistryConflictError if the name or port is taken (checked in memory
+        # first, then enforced by the unique constraints).
+        if self.index.by_name(name) is not None:
+            raise RegistryConflictError("name", name)
+        if self.index.by_port(port) is not None:
+            raise RegistryConflictError("port", port)
+        try:
+            async with conn.cursor(row_factory=dict_row) as cursor:
+                await cursor.execute(
+                    "INSERT INTO registry_services (service_name, description, host, "
+                    "port, registered_unix, capabilities) VALUES (%s, %s, %s, %s, %s, "
+                    f"%s) RETURNING {REGISTRY_COLUMNS}",
+                    (
+                        name,
+                        description,
+                        host,
+                        port,
+                        int(time.time()),
+                        sorted(set(capabilities)),
+                    ),
+                )
+                record = AgentRecord.from_row(await cursor.fetchone())
+            await conn.commit()
+        except psycopg.errors.UniqueViolation as e:
+            await conn.rollback()
+            field = "port" if "port" in (e.diag.constraint_name or "") else "name"
+            raise RegistryConflictError(field, port if field == "port" else name) from e
+        self.index.upsert(record)
+        return record
+
+    def coalesced_heartbeat(
+        self, name: str, status: str, now: Optional[int] = None
+    ) -> Optional[AgentRecord]:
+        # The cached record if a heartbeat with this status was written recently enough
+        # that this one need not be; None if it has to go to the database.
+        now = int(time.time()) if now is None else now
+        cached = self.index.by_name(name)
+        if (
+            cached is not None
+            and cached.reported_status == status
+            and cached.last_heartbeat_unix is not None
+            and now - cached.last_heartbeat_unix < AGENT_HEARTBEAT_WRITE_INTERVAL
+        ):
+            return cached
+        return None
+
+    async def heartbeat(
+        self,
+        conn: psycopg.AsyncConnection,
+        name: str,
+        status: str = "idle",
+        now: Optional[int] = None,
+    ) -> Optional[AgentRecord]:
+        # Records that `name` is alive with the given status; None if no such agent is
+        # registered.
+        if status not in REPORTED_STATUSES:
+            raise ValueError(
+                f"Unknown agent status '{status}'; expected one of {REPORTED_STATUSES}."
+            )
+        now = int(time.time()) if now is None else now
+        cached = self.coalesced_heartbeat(name, status, now)
+        if cached is not None:
+            return cached
+        async with conn.cursor(row_factory=dict_row) as cursor:
+            await cursor.execute(
+                "UPDATE registry_services SET last_heartbeat_unix = %s, "
+                "reported_status = %s WHERE service_name = %s RETURNING "
+                f"{REGISTRY_COLUMNS}",
+                (now, status, name),
+            )
+            row = await cursor.fetchone()
+        await conn.commit()
+        if row is None:
+            return None
+        record = AgentRecord.from_row(row)
+        self.index.upsert(record)
+        return record
+
+    async def _reload(self, conn: psycopg.AsyncConnection):
+        async with conn.cursor(row_factory=dict_row) as cursor:
+            await cursor.execute(f"SELECT {REGISTRY_COLUMNS} FROM registry_services")
+            self.index.replace_all(
+                AgentRecord.from_row(row) for row in await cursor.fetchall()
+            )
+            await cursor.execute(f"SELECT {LOAD_COLUMNS} FROM agent_load")
+            self.loads = {
+                row["agent"]: AgentLoad.from_row(row) for row in await cursor.fetchall()
+            }
+        self.reloads += 1
+        logger.info(f"Agent registry loaded {len(self.index)} agents.")
+
+    async def _apply(self, conn: psycopg.AsyncConnection, channel: str, payload: str):
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            await self._reload(conn)
+            return
+        if channel == self.load_channel:
+            self.loads[event["agent"]] = AgentLoad.from_row(event)
+            return
+        agent_id = event.get("id")
+        if event.get("op") == "delete":
+            self.index.remove(agent_id)
+        elif event.get("op") == "heartbeat" and self.index.get(agent_id) is not None:
+            self.index.apply_heartbeat(
+                agent_id,
+                event.get("last_heartbeat_unix"),
+                event.get("reported_status", "idle"),
+            )
+        else:
+            async with conn.cursor(row_factory=dict_row) as cursor:
+                await cursor.execute(
+                    f"SELECT {REGISTRY_COLUMNS} FROM registry_services WHERE id = %s",
+                    (agent_id,),
+                )
+                row = await cursor.fetchone()
+            if row is None:
+                self.index.remove(agent_id)
+            else:
+                self.index.upsert(AgentRecord.from_row(row))
+
+    async def _listen_loop(self):
+        backoff = 1.0
+        while True:
+            try:
+                # Notifications arrive on `listener`; rows are re-read on `reader`,
+                # since a connection cannot run queries while it is being iterated for
+                # notifications.
+                async with await psycopg.AsyncConnection.connect(
+                    self.dsn, autocommit=True
+                ) as listener, await psycopg.AsyncConnection.connect(
+                    self.dsn, autocommit=True
+                ) as reader:
+                    await listener.execute(f"LISTEN {self.channel}")
+                    await listener.execute(f"LISTEN {self.load_channel}")
+                    await self._reload(
+                        reader
+                    )  # after LISTEN, so no change between the two is lost
+                    self._loaded.set()
+                    backoff = 1.0
+                    async for notification in listener.notifies():
+                        self.notifications_received += 1
+                        await self._apply(
+                            reader, notification.channel, notification.payload
+                        )
+            except asyncio.CancelledError:
+                raise
+            except psycopg.Error as e:
+                logger.warning(
+                    f"Agent registry listener lost its connection: {e}. Reconnecting "
+                    f"in {backoff:.0f}s."
+                )
+            except Exception as e:
+                logger.error(
+                    f"Unexpected error in agent registry listener: {e}", exc_info=True
+                )
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
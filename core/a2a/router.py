@@ -0,0 +1,137 @@
+# core/a2a/router.py
+import os
+import time
+import random
+import logging
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+from core.a2a.registry import AgentRegistry, AgentLoad
+
+logger = logging.getLogger(__name__)
+
+# How subtasks dispatched without an assigned_agent are given one: "p2c" (power of two
+# choices), "least_loaded" (scan every eligible agent), "random", or "none" to leave
+# them unassigned.
+AGENT_ROUTING_POLICY = os.getenv("AGENT_ROUTING_POLICY", "p2c")
+# Claim-to-completion time (seconds) assumed for an agent that has not finished a task
+# yet.
+AGENT_ROUTING_DEFAULT_LATENCY = float(os.getenv("AGENT_ROUTING_DEFAULT_LATENCY", "60"))
+ROUTING_POLICIES = ("p2c", "least_loaded", "random", "none")
+# Random draws p2c/random make before scanning, for when most eligible agents are
+# offline.
+SAMPLE_ATTEMPTS = 8
+# p2c scans pools up to this size instead: as cheap as sampling, and it never misses the
+# least loaded.
+P2C_SCAN_MAX_AGENTS = 16
+# Completion times are whole seconds; faster agents are treated as taking this long.
+MIN_LATENCY = 1.0
+
+
+def expected_wait(
+    load: AgentLoad, default_latency: float = AGENT_ROUTING_DEFAULT_LATENCY
+) -> float:
+    # Roughly when a task sent now would be finished: the work ahead of it plus itself,
+    # at the agent's recent pace.
+    latency = load.latency_ewma if load.latency_ewma is not None else default_latency
+    return (load.queued + load.in_flight + 1) * max(latency, MIN_LATENCY)
+
+
+class AgentRouter:
+    # Picks an agent for a task from the registry's cached state: agents that are not
+    # offline and have every required capability tag, weighed by their queue depth,
+    # in-flight count and recent latency (expected_wait). Nothing here touches the
+    # database. Eligible names per capability set are cached until the registry's
+    # membership changes; liveness and load are read per call.
+    def __init__(
+        self,
+        registry: AgentRegistry,
+        policy: str = AGENT_ROUTING_POLICY,
+        default_latency: float = AGENT_ROUTING_DEFAULT_LATENCY,
+        rng: Optional[random.Random] = None,
+    ):
+        if policy not in ROUTING_POLICIES:
+            raise ValueError(
+                f"Unknown routing policy '{policy}'; expected one of "
+                f"{ROUTING_POLICIES}."
+            )
+        self.registry = registry
+        self.policy = policy
+        self.default_latency = default_latency
+        self.rng = rng or random.Random()
+        self._eligible: Dict[FrozenSet[str], List[str]] = {}
+        self._eligible_version = -1
+
+    def eligible(self, required_capabilities: Iterable[str] = ()) -> List[str]:
+        required = frozenset(required_capabilities)
+        if self._eligible_version != self.registry.index.version:
+            self._eligible = {}
+            self._eligible_version = self.registry.index.version
+        names = self._eligible.get(required)
+        if names is None:
+            names = [
+                r.name
+                for r in self.registry.list_agents()
+                if required <= r.capabilities
+            ]
+            self._eligible[required] = names
+        return names
+
+    def score(self, name: str) -> float:
+        return expected_wait(self.registry.load_of(name), self.default_latency)
+
+    def choose(
+        self, required_capabilities: Iterable[str] = (), now: Optional[float] = None
+    ) -> Optional[str]:
+        # The agent to assign, or None (routing disabled, or no live agent has the
+        # capabilities). The choice is counted against the agent's queue right away.
+        if self.policy == "none":
+            return None
+        required_capabilities = frozenset(required_capabilities)
+        names = self.eligible(required_capabilities)
+        if not names:
+            return None
+        now = time.time() if now is None else now
+        if self.policy == "least_loaded" or (
+            self.policy == "p2c" and len(names) <= P2C_SCAN_MAX_AGENTS
+        ):
+            chosen = self._least_loaded(names, now)
+        else:
+            picks = self._sample(names, now, 2 if self.policy == "p2c" else 1)
+            chosen = (
+                min(picks, key=self.score)
+                if picks
+                else self._least_loaded(names, now, by_score=self.policy == "p2c")
+            )
+        if chosen is None:
+            logger.debug(
+                f"No live agent with capabilities {sorted(required_capabilities)}; "
+                "leaving the task unassigned."
+            )
+        else:
+            self.registry.record_assignment(chosen)
+        return chosen
+
+    def _live(self, name: str, now: float) -> bool:
+        record = self.registry.index.by_name(name)
+        return record is not None and self.registry.status_of(record, now) != "offline"
+
+    def _sample(self, names: List[str], now: float, count: int) -> List[str]:
+        picks: List[str] = []
+        for _ in range(SAMPLE_ATTEMPTS):
+            name = self.rng.choice(names)
+            if name not in picks and self._live(name, now):
+                picks.append(name)
+                if len(picks) == min(count, len(names)):
+                    break
+        return picks
+
+    def _least_loaded(
+        self, names: List[str], now: float, by_score: bool = True
+    ) -> Optional[str]:
+        # Full scan; ties (and the random policy's fallback) are broken at random.
+        live = [name for name in names if self._live(name, now)]
+        if not live:
+            return None
+        if not by_score:
+            return self.rng.choice(live)
+        return min(live, key=lambda name: (self.score(name), self.rng.random()))
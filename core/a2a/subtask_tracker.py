@@ -1,28 +1,167 @@
 # core/a2a/subtask_tracker.py
+import time
 import logging
-from typing import Dict, Any
+from collections import deque
+from typing import Dict, Any, Hashable, Iterable, List, Mapping, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from core.a2a.dispatcher import A2ADispatcher
 
 logger = logging.getLogger(__name__)
 
-def record_subtask_dispatch(parent_task_id: int, subtask_id: int, subtask_details: Dict[str, Any]):
-    logger.info(f"Subtask {subtask_id} (Title: {subtask_details.get('title', 'N/A')}) dispatched for parent task {parent_task_id}.")
-
-def check_subtask_completion(parent_task_id: int) -> Dict[str, Any]:
-    # This is a placeholder. In a real implementation, this would query the database
-    # or an internal state to check the status of subtasks associated with the parent_task_id.
-    logger.info(f"Placeholder: Checking subtask completion for parent task {parent_task_id}.")
-    # Example:
-    # subtasks = query_db_for_subtasks(parent_task_id)
-    # all_done = all(st['status'] == 'done' for st in subtasks)
-    # if all_done:
-    #   return {"status": "all_completed", "message": "All subtasks completed successfully."}
-    # else:
-    #   return {"status": "pending", "message": "Some subtasks are still pending."}
-    return {"status": "unknown", "message": "DB query not implemented in this placeholder."}
-
-def on_subtask_completed(subtask_id: int, final_status: str, result_summary: Dict[str, Any]):
-    # This function would be called when a subtask signals its completion.
-    # It might involve updating the parent task's state or triggering further actions.
-    logger.info(f"Subtask {subtask_id} finished with status '{final_status}'. Result: {result_summary}")
-    # Example:
-    # update_parent_task_status_based_on_subtasks(parent_task_id_of_subtask)
+
+class DependencyCycleError(ValueError):
+    def __init__(self, cycle: List[Hashable]):
+        super().__init__(
+            f"Dependency cycle: {' -> '.join(str(node) for node in cycle)}"
+        )
+        self.cycle = cycle
+
+
+def topological_order(
+    nodes: Iterable[Hashable], dependencies: Mapping[Hashable, Iterable[Hashable]]
+) -> List[Hashable]:
+    # Kahn's algorithm, O(nodes + edges): returns the nodes so that every node comes
+    # after the nodes it depends on, keeping the input order among independent nodes.
+    # dependencies maps a node to the nodes it depends on; dependencies outside `nodes`
+    # (e.g. tasks that already exist) are ignored. Raises DependencyCycleError naming
+    # one cycle if the graph is not a DAG.
+    order_index = {node: i for i, node in enumerate(nodes)}
+    remaining = {node: 0 for node in order_index}
+    dependents: Dict[Hashable, List[Hashable]] = {}
+    for node in order_index:
+        for dep in set(dependencies.get(node, ())):
+            if dep in order_index:
+                remaining[node] += 1
+                dependents.setdefault(dep, []).append(node)
+
+    ready = deque(node for node in order_index if remaining[node] == 0)
+    ordered: List[Hashable] = []
+    while ready:
+        node = ready.popleft()
+        ordered.append(node)
+        for dependent in dependents.get(node, ()):
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                ready.append(dependent)
+
+    if len(ordered) < len(order_index):
+        raise DependencyCycleError(
+            _find_cycle(
+                {n for n, count in remaining.items() if count > 0}, dependencies
+            )
+        )
+    return ordered
+
+
+def _find_cycle(
+    blocked: set, dependencies: Mapping[Hashable, Iterable[Hashable]]
+) -> List[Hashable]:
+    # Every node Kahn could not order still has a dependency among those nodes, so
+    # following such dependencies from any of them must eventually revisit a node.
+    node = min(blocked, key=str)
+    path: List[Hashable] = []
+    seen: Dict[Hashable, int] = {}
+    while node not in seen:
+        seen[node] = len(path)
+        path.append(node)
+        node = next(dep for dep in dependencies.get(node, ()) if dep in blocked)
+    cycle = path[seen[node] :]
+    return cycle + [cycle[0]]
+
+
+def record_subtask_dispatch(
+    parent_task_id: int, subtask_id: int, subtask_details: Dict[str, Any]
+):
+    logger.info(
+        f"Subtask {subtask_id} (Title: {subtask_details.get('title', 'N/A')}) "
+        f"dispatched for parent task {parent_task_id}."
+    )
+
+
+def completion_from_summary(summary: Dict[str, Any]) -> Dict[str, Any]:
+    if not summary["finished"]:
+        unfinished = summary["total"] - summary["done"] - summary["failed"]
+        return {
+            "status": "pending",
+            "message": f"{unfinished} of {summary['total']} subtasks still running.",
+            "summary": summary,
+        }
+    if summary["failed"]:
+        return {
+            "status": "completed_with_failures",
+            "message": f"{summary['failed']} of {summary['total']} subtasks failed.",
+            "summary": summary,
+        }
+    return {
+        "status": "all_completed",
+        "message": "All subtasks completed successfully.",
+        "summary": summary,
+    }
+
+
+def check_subtask_completion(
+    parent_task_id: int, dispatcher: Optional["A2ADispatcher"] = None
+) -> Dict[str, Any]:
+    # One O(1) read of the parent's child counters (maintained by the database on every
+    # status change).
+    dispatcher = dispatcher or _default_dispatcher()
+    return completion_from_summary(dispatcher.get_subtasks_summary(parent_task_id))
+
+
+def wait_for_subtask_completion(
+    parent_task_id: int,
+    timeout: float = 300,
+    dispatcher: Optional["A2ADispatcher"] = None,
+    poll_seconds: float = 60,
+) -> Dict[str, Any]:
+    # Blocks until every subtask is done or failed (or timeout passes) using the
+    # dispatcher's long-poll, so no request is made while nothing changes. Returns the
+    # same shape as check_subtask_completion.
+    dispatcher = dispatcher or _default_dispatcher()
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = max(0.0, deadline - time.monotonic())
+        summary = dispatcher.wait_for_subtasks(
+            parent_task_id, wait_seconds=min(remaining, poll_seconds)
+        )
+        if summary["finished"] or remaining <= poll_seconds:
+            return completion_from_summary(summary)
+
+
+def on_subtask_completed(
+    subtask_id: int,
+    final_status: str,
+    result_summary: Dict[str, Any],
+    parent_task_id: Optional[int] = None,
+    dispatcher: Optional["A2ADispatcher"] = None,
+) -> Optional[Dict[str, Any]]:
+    # Called when a subtask signals its completion. The parent's counters are already
+    # updated in the same transaction as the status change; given the parent, this
+    # returns its completion state.
+    logger.info(
+        f"Subtask {subtask_id} finished with status '{final_status}'. Result: "
+        f"{result_summary}"
+    )
+    if parent_task_id is None:
+        return None
+    completion = check_subtask_completion(parent_task_id, dispatcher)
+    if completion["status"] != "pending":
+        logger.info(
+            f"All subtasks of parent {parent_task_id} have finished: "
+            f"{completion['message']}"
+        )
+    return completion
+
+
+_dispatcher: Optional["A2ADispatcher"] = None
+
+
+def _default_dispatcher() -> "A2ADispatcher":
+    # Imported here: core.a2a.dispatcher imports this module for topological_order.
+    global _dispatcher
+    if _dispatcher is None:
+        from core.a2a.dispatcher import A2ADispatcher
+
+        _dispatcher = A2ADispatcher()
+    return _dispatcher
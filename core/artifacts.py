@@ -0,0 +1,167 @@
+# core/artifacts.py
+import gzip
+import time
+import zlib
+import hashlib
+import logging
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# What a task can have one of each (task_artifacts.kind;
+# sql/migrations/0007_task_artifacts.sql).
+ARTIFACT_KINDS = ("plan", "report", "logs")
+DEFAULT_CONTENT_TYPES = {
+    "plan": "text/markdown; charset=utf-8",
+    "report": "text/markdown; charset=utf-8",
+    "logs": "application/octet-stream",
+}
+# Level 6 compresses plans to within a few percent of 9 at about twice the speed.
+ARTIFACT_COMPRESSLEVEL = 6
+# Contents that gzip shrinks by less than this are stored as they are (small or already
+# compressed).
+MIN_COMPRESSION_SAVING = 0.1
+
+
+class EncodedBlob(NamedTuple):
+    sha256: str  # of the uncompressed content
+    encoding: str  # "gzip" or "identity"
+    size_bytes: int  # uncompressed
+    data: bytes  # as stored
+
+
+class Artifact(NamedTuple):
+    task_id: int
+    kind: str
+    blob: EncodedBlob
+    content_type: str
+    filename: Optional[str] = None
+
+
+def encode_blob(content: Union[bytes, str]) -> EncodedBlob:
+    # gzip with mtime=0, so the same content always gives the same bytes; the stored
+    # form can be sent as is to clients that accept Content-Encoding: gzip.
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    digest = hashlib.sha256(content).hexdigest()
+    compressed = gzip.compress(content, compresslevel=ARTIFACT_COMPRESSLEVEL, mtime=0)
+    if len(compressed) <= len(content) * (1 - MIN_COMPRESSION_SAVING):
+        return EncodedBlob(digest, "gzip", len(content), compressed)
+    return EncodedBlob(digest, "identity", len(content), content)
+
+
+class BlobDecoder:
+    # Decodes a stored blob chunk by chunk, for streaming without holding all of it in
+    # memory.
+    def __init__(self, encoding: str):
+        if encoding not in ("gzip", "identity"):
+            raise ValueError(f"Unknown artifact encoding '{encoding}'")
+        self._inflater = zlib.decompressobj(wbits=31) if encoding == "gzip" else None
+
+    def feed(self, chunk: bytes) -> bytes:
+        return self._inflater.decompress(chunk) if self._inflater else chunk
+
+    def flush(self) -> bytes:
+        return self._inflater.flush() if self._inflater else b""
+
+
+def decode_blob(data: bytes, encoding: str) -> bytes:
+    decoder = BlobDecoder(encoding)
+    return decoder.feed(data) + decoder.flush()
+
+
+def make_artifact(
+    task_id: int,
+    kind: str,
+    content: Union[bytes, str],
+    content_type: Optional[str] = None,
+    filename: Optional[str] = None,
+) -> Artifact:
+    if kind not in ARTIFACT_KINDS:
+        raise ValueError(
+            f"Unknown artifact kind '{kind}'; expected one of {ARTIFACT_KINDS}."
+        )
+    return Artifact(
+        task_id,
+        kind,
+        encode_blob(content),
+        content_type or DEFAULT_CONTENT_TYPES[kind],
+        filename,
+    )
+
+
+# Both statements take arrays, so a batch of artifacts is two round trips whatever its
+# size, with psycopg2 (the runner) and psycopg 3 (the dispatcher) alike. Storing a blob
+# that already exists only refreshes referenced_unix; that also row-locks it, so orphan
+# collection (which skips locked rows) cannot remove it before the artifact pointing at
+# it commits.
+STORE_BLOBS_SQL = """
+    INSERT INTO artifact_blobs AS b
+        (sha256, encoding, size_bytes, content, created_unix, referenced_unix)
+    SELECT t.sha256, t.encoding, t.size_bytes, t.content, %(now)s, %(now)s
+    FROM unnest(
+        %(sha256)s::text[], %(encoding)s::text[], %(size_bytes)s::bigint[],
+        %(content)s::bytea[]
+    )
+         AS t(sha256, encoding, size_bytes, content)
+    ON CONFLICT (sha256) DO UPDATE SET referenced_unix = EXCLUDED.referenced_unix
+"""
+# Artifacts of tasks that no longer exist are skipped rather than failing the batch; the
+# task ids and kinds actually stored are returned.
+STORE_ARTIFACTS_SQL = """
+    INSERT INTO task_artifacts AS a
+        (task_id, kind, sha256, content_type, filename, created_unix, updated_unix)
+    SELECT t.task_id, t.kind, t.sha256, t.content_type, t.filename, %(now)s, %(now)s
+    FROM unnest(
+        %(task_id)s::int[], %(kind)s::text[], %(sha256)s::text[],
+        %(content_type)s::text[], %(filename)s::text[]
+    )
+         AS t(task_id, kind, sha256, content_type, filename)
+    WHERE EXISTS (SELECT 1 FROM agent_tasks WHERE id = t.task_id)
+    ON CONFLICT (task_id, kind) DO UPDATE SET
+        sha256 = EXCLUDED.sha256, content_type = EXCLUDED.content_type,
+        filename = EXCLUDED.filename, updated_unix = EXCLUDED.updated_unix
+    RETURNING a.task_id, a.kind
+"""
+
+
+def store_params(
+    artifacts: List[Artifact], now: Optional[int] = None
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    # Parameters for STORE_BLOBS_SQL and STORE_ARTIFACTS_SQL. An upsert cannot touch a
+    # row twice, so blobs are deduplicated here and the last artifact per (task, kind)
+    # wins.
+    now = int(time.time()) if now is None else now
+    blobs = {artifact.blob.sha256: artifact.blob for artifact in artifacts}
+    latest = list(
+        {(artifact.task_id, artifact.kind): artifact for artifact in artifacts}.values()
+    )
+    blob_params = {
+        "now": now,
+        "sha256": [blob.sha256 for blob in blobs.values()],
+        "encoding": [blob.encoding for blob in blobs.values()],
+        "size_bytes": [blob.size_bytes for blob in blobs.values()],
+        "content": [blob.data for blob in blobs.values()],
+    }
+    artifact_params = {
+        "now": now,
+        "task_id": [artifact.task_id for artifact in latest],
+        "kind": [artifact.kind for artifact in latest],
+        "sha256": [artifact.blob.sha256 for artifact in latest],
+        "content_type": [artifact.content_type for artifact in latest],
+        "filename": [artifact.filename for artifact in latest],
+    }
+    return blob_params, artifact_params
+
+
+def store_artifacts(
+    cursor, artifacts: List[Artifact], now: Optional[int] = None
+) -> List[Tuple[int, str]]:
+    # Stores a batch on a synchronous DB-API cursor (psycopg2 or psycopg 3); the caller
+    # commits. Returns the (task_id, kind) pairs stored.
+    if not artifacts:
+        return []
+    blob_params, artifact_params = store_params(artifacts, now)
+    cursor.execute(STORE_BLOBS_SQL, blob_params)
+    cursor.execute(STORE_ARTIFACTS_SQL, artifact_params)
+    return [(task_id, kind) for task_id, kind in cursor.fetchall()]
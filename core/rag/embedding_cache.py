@@ -0,0 +1,257 @@
+# core/rag/embedding_cache.py
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+import numpy as np
+from chromadb.api.types import EmbeddingFunction
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_CACHE_FILENAME = "embedding_cache.sqlite"
+EMBEDDING_CACHE_MAX_ENTRIES = int(
+    os.getenv("RAG_EMBEDDING_CACHE_MAX_ENTRIES", "200000")
+)
+EMBEDDING_CACHE_MEMORY_ENTRIES = int(
+    os.getenv("RAG_EMBEDDING_CACHE_MEMORY_ENTRIES", "4096")
+)
+SQLITE_MAX_VARIABLES = 500  # keys per SELECT ... IN (...)
+
+
+def normalize_text(text: str) -> str:
+    # Prompts are resubmitted with incidental whitespace differences; those never change
+    # the embedding.
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    # Disk-backed cache of float32 embeddings keyed by (model name, normalized text
+    # hash). SQLite holds up to max_entries vectors and evicts the least recently used
+    # ones beyond that; an in-memory LRU of memory_entries vectors sits in front of it.
+    # Safe to share between threads.
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES,
+        memory_entries: int = EMBEDDING_CACHE_MEMORY_ENTRIES,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+        """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON "
+            "embeddings(last_used)"
+        )
+        self._disk_entries = self._conn.execute(
+            "SELECT COUNT(*) FROM embeddings"
+        ).fetchone()[0]
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _remember(self, key: Tuple[str, str], vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, model: str, hashes: List[str]) -> Dict[str, np.ndarray]:
+        found: Dict[str, np.ndarray] = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            missing = []
+            for h in unique:
+                vector = self._memory.get((model, h))
+                if vector is None:
+                    missing.append(h)
+                else:
+                    self._memory.move_to_end((model, h))
+                    found[h] = vector
+            self.memory_hits += len(found)
+            now = time.time()
+            for i in range(0, len(missing), SQLITE_MAX_VARIABLES):
+                batch = missing[i : i + SQLITE_MAX_VARIABLES]
+                rows = self._conn.execute(
+                    "SELECT text_hash, vector FROM embeddings WHERE model = ? AND "
+                    f"text_hash IN ({','.join('?' * len(batch))})",
+                    [model, *batch],
+                ).fetchall()
+                for h, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    found[h] = vector
+                    self._remember((model, h), vector)
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE model = ? AND "
+                        "text_hash = ?",
+                        [(now, model, h) for h, _ in rows],
+                    )
+                    self.disk_hits += len(rows)
+            self.misses += len(unique) - len(found)
+        return found
+
+    def put_many(self, model: str, items: Dict[str, np.ndarray]):
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            rows = []
+            for h, vector in items.items():
+                vector = np.asarray(vector, dtype=np.float32)
+                self._remember((model, h), vector)
+                rows.append((model, h, vector.tobytes(), now))
+            try:
+                self._conn.execute("BEGIN")
+                before = self._conn.total_changes
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO embeddings(model, text_hash, vector, "
+                    "last_used) VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                self._disk_entries += self._conn.total_changes - before
+                if self._disk_entries > self.max_entries:
+                    # Evict down to 90% so eviction runs once per batch of inserts, not
+                    # on every insert.
+                    excess = self._disk_entries - int(self.max_entries * 0.9)
+                    self._conn.execute(
+                        "DELETE FROM embeddings WHERE rowid IN (SELECT rowid FROM "
+                        "embeddings ORDER BY last_used, rowid LIMIT ?)",
+                        (excess,),
+                    )
+                    self._disk_entries -= excess
+                    self.evictions += excess
+                self._conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                self._conn.execute("ROLLBACK")
+                logger.error(
+                    f"Failed to write embeddings to cache {self.path}: {e}",
+                    exc_info=True,
+                )
+
+    def __len__(self) -> int:
+        return self._disk_entries
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CachedEmbeddingFunction(EmbeddingFunction):
+    # Wraps a Chroma embedding function so that only texts missing from the cache are
+    # embedded. Create it with cached_embedding_function(), which gives it the name()
+    # and config of the wrapped function, so collections created with or without the
+    # cache stay compatible.
+    def __init__(self, embedding_function, model_name: str, cache: EmbeddingCache):
+        self.embedding_function = embedding_function
+        self.model_name = model_name
+        self.cache = cache
+        self.embed_seconds = 0.0
+        self.embedded_texts = 0
+
+    def __call__(self, input: List[str]) -> List[np.ndarray]:
+        hashes = [text_hash(text) for text in input]
+        found = self.cache.get_many(self.model_name, hashes)
+        to_embed: Dict[str, str] = {}
+        for h, text in zip(hashes, input):
+            if h not in found and h not in to_embed:
+                to_embed[h] = text
+        if to_embed:
+            started = time.perf_counter()
+            vectors = self.embedding_function(list(to_embed.values()))
+            self.embed_seconds += time.perf_counter() - started
+            self.embedded_texts += len(to_embed)
+            computed = {
+                h: np.asarray(v, dtype=np.float32) for h, v in zip(to_embed, vectors)
+            }
+            self.cache.put_many(self.model_name, computed)
+            found.update(computed)
+        return [found[h] for h in hashes]
+
+    def embed_query(self, input: List[str]) -> List[np.ndarray]:
+        return self(input)
+
+    def get_config(self):
+        return self.embedding_function.get_config()
+
+    def default_space(self):
+        return self.embedding_function.default_space()
+
+    def supported_spaces(self):
+        return self.embedding_function.supported_spaces()
+
+    def stats(self) -> Dict[str, float]:
+        hits = self.cache.memory_hits + self.cache.disk_hits
+        lookups = hits + self.cache.misses
+        seconds_per_text = (
+            self.embed_seconds / self.embedded_texts if self.embedded_texts else 0.0
+        )
+        return {
+            "lookups": lookups,
+            "memory_hits": self.cache.memory_hits,
+            "disk_hits": self.cache.disk_hits,
+            "misses": self.cache.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self.cache),
+            "evictions": self.cache.evictions,
+            "embed_seconds": round(self.embed_seconds, 4),
+            # Estimated from the average cost of the texts that did have to be embedded.
+            "embed_seconds_saved": round(hits * seconds_per_text, 4),
+        }
+
+
+_CACHED_FUNCTION_CLASSES: Dict[type, type] = {}
+
+
+def cached_embedding_function(
+    embedding_function, model_name: str, cache: EmbeddingCache
+) -> CachedEmbeddingFunction:
+    # Chroma calls name() and build_from_config() on the class of an embedding function
+    # (and registers the class under that name), so the wrapper of each
+    # embedding-function class is a subclass with the name() and build_from_config() of
+    # that class; a collection reopened without an embedding function gets the uncached
+    # one. Functions without a name() are wrapped as they are.
+    function_class = type(embedding_function)
+    if getattr(function_class, "name", None) is None:
+        return CachedEmbeddingFunction(embedding_function, model_name, cache)
+    if function_class not in _CACHED_FUNCTION_CLASSES:
+        _CACHED_FUNCTION_CLASSES[function_class] = type(
+            f"Cached{function_class.__name__}",
+            (CachedEmbeddingFunction,),
+            {
+                "name": staticmethod(function_class.name),
+                "build_from_config": staticmethod(function_class.build_from_config),
+            },
+        )
+    return _CACHED_FUNCTION_CLASSES[function_class](
+        embedding_function, model_name, cache
+    )
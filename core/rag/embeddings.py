@@ -0,0 +1,363 @@
+# core/rag/embeddings.py
+# Imported only when a VectorStore is created: chromadb costs ~1s to import and the
+# models far more.
+import os
+import time
+import hashlib
+import logging
+import pathlib
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from chromadb.api.types import EmbeddingFunction
+
+from core.rag.lexical_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EMBEDDING_BACKEND = "sentence-transformers"
+DEFAULT_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+RAG_EMBEDDING_BATCH_SIZE = int(os.getenv("RAG_EMBEDDING_BATCH_SIZE", "32"))
+RAG_EMBEDDING_THREADS = int(
+    os.getenv("RAG_EMBEDDING_THREADS", "0")
+)  # 0 = library default (all cores)
+# Directory with model.onnx (or an already quantized model_int8.onnx) and
+# tokenizer.json; defaults to the all-MiniLM-L6-v2 export Chroma downloads for its own
+# default embedding function.
+RAG_ONNX_MODEL_DIR = os.getenv("RAG_ONNX_MODEL_DIR")
+ONNX_MAX_TOKENS = 256
+
+
+class EmbeddingBackend:
+    # Turns texts into float32 vectors. The model is loaded on first use (or by load());
+    # embed() splits its input into batches of batch_size. num_threads caps the threads
+    # the backend's runtime uses.
+    name = "base"
+
+    def __init__(
+        self,
+        batch_size: int = RAG_EMBEDDING_BATCH_SIZE,
+        num_threads: int = RAG_EMBEDDING_THREADS,
+    ):
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+        self.batch_size = batch_size
+        self.num_threads = num_threads
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def cache_key(self) -> str:
+        # Identifies the vectors this backend produces, e.g. for the embedding cache.
+        return self.name
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def load(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    started = time.perf_counter()
+                    self._load()
+                    self._loaded = True
+                    logger.info(
+                        f"Loaded embedding backend '{self.cache_key}' in "
+                        f"{time.perf_counter() - started:.2f}s."
+                    )
+
+    def _load(self):
+        pass
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        raise NotImplementedError
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        self.load()
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        batches = [
+            self._embed_batch(texts[i : i + self.batch_size])
+            for i in range(0, len(texts), self.batch_size)
+        ]
+        return np.vstack(batches).astype(np.float32, copy=False)
+
+    def chroma_config(self) -> Dict[str, Any]:
+        return {"backend": self.name, "batch_size": self.batch_size}
+
+    @classmethod
+    def from_chroma_config(cls, config: Dict[str, Any]) -> "EmbeddingBackend":
+        return cls(batch_size=config.get("batch_size", RAG_EMBEDDING_BATCH_SIZE))
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    # Full PyTorch model via sentence-transformers.
+    name = "sentence-transformers"
+
+    def __init__(
+        self, model_name: str = DEFAULT_EMBEDDING_MODEL, device: str = "cpu", **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.model_name = model_name
+        self.device = device
+        self._model = None
+
+    @property
+    def cache_key(self) -> str:
+        return self.model_name
+
+    def _load(self):
+        from sentence_transformers import SentenceTransformer
+
+        if self.num_threads:
+            import torch
+
+            torch.set_num_threads(self.num_threads)
+        self._model = SentenceTransformer(self.model_name, device=self.device)
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        return self._model.encode(texts, batch_size=len(texts), convert_to_numpy=True)
+
+    # Same config as Chroma's SentenceTransformerEmbeddingFunction (see
+    # SentenceTransformerFunction).
+    def chroma_config(self) -> Dict[str, Any]:
+        return {
+            "model_name": self.model_name,
+            "device": self.device,
+            "normalize_embeddings": False,
+            "kwargs": {},
+        }
+
+    @classmethod
+    def from_chroma_config(cls, config: Dict[str, Any]) -> "SentenceTransformerBackend":
+        return cls(
+            model_name=config.get("model_name", DEFAULT_EMBEDDING_MODEL),
+            device=config.get("device", "cpu"),
+        )
+
+
+class OnnxInt8Backend(EmbeddingBackend):
+    # all-MiniLM-L6-v2 (or any BERT-style ONNX export with mean pooling) on ONNX Runtime
+    # with weights quantized to int8, which needs no PyTorch and is typically 2-4x
+    # faster on CPU. model_int8.onnx is created from model.onnx on first load if it is
+    # missing (that step needs the `onnx` package).
+    name = "onnx-int8"
+
+    def __init__(self, model_dir: Optional[str] = RAG_ONNX_MODEL_DIR, **kwargs):
+        super().__init__(**kwargs)
+        self.model_dir = model_dir
+        self._session = None
+        self._tokenizer = None
+
+    @property
+    def cache_key(self) -> str:
+        model = (
+            pathlib.Path(self.model_dir).name
+            if self.model_dir
+            else DEFAULT_EMBEDDING_MODEL
+        )
+        return f"onnx-int8:{model}"
+
+    def _resolve_model_dir(self) -> pathlib.Path:
+        if self.model_dir:
+            return pathlib.Path(self.model_dir)
+        from chromadb.utils.embedding_functions.onnx_mini_lm_l6_v2 import (
+            ONNXMiniLM_L6_V2,
+        )
+
+        default_ef = ONNXMiniLM_L6_V2()
+        default_ef._download_model_if_not_exists()
+        return pathlib.Path(default_ef.DOWNLOAD_PATH) / default_ef.EXTRACTED_FOLDER_NAME
+
+    def _load(self):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_dir = self._resolve_model_dir()
+        quantized_path = model_dir / "model_int8.onnx"
+        if not quantized_path.exists():
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+
+            logger.info(f"Quantizing {model_dir / 'model.onnx'} to int8...")
+            quantize_dynamic(
+                str(model_dir / "model.onnx"),
+                str(quantized_path),
+                weight_type=QuantType.QInt8,
+            )
+
+        options = ort.SessionOptions()
+        if self.num_threads:
+            options.intra_op_num_threads = self.num_threads
+            options.inter_op_num_threads = 1
+        self._session = ort.InferenceSession(
+            str(quantized_path),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        self._input_names = {i.name for i in self._session.get_inputs()}
+        self._tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self._tokenizer.enable_truncation(max_length=ONNX_MAX_TOKENS)
+        # Pad to the longest text of each batch, not to the maximum length.
+        self._tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        encoded = self._tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encoded], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encoded], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        last_hidden_state = self._session.run(None, feeds)[0]
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (last_hidden_state * mask).sum(axis=1) / np.clip(
+            mask.sum(axis=1), 1e-9, None
+        )
+        return pooled / np.clip(
+            np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None
+        )
+
+    def chroma_config(self) -> Dict[str, Any]:
+        return {**super().chroma_config(), "model_dir": self.model_dir}
+
+    @classmethod
+    def from_chroma_config(cls, config: Dict[str, Any]) -> "OnnxInt8Backend":
+        return cls(
+            model_dir=config.get("model_dir", RAG_ONNX_MODEL_DIR),
+            batch_size=config.get("batch_size", RAG_EMBEDDING_BATCH_SIZE),
+        )
+
+
+class HashingBackend(EmbeddingBackend):
+    # Deterministic feature-hashing embedder (signed token hashes, L2-normalized). No
+    # model, no downloads: for tests, CI and offline development. Retrieval quality is
+    # lexical at best.
+    name = "hashing"
+
+    def __init__(self, dimension: int = 384, **kwargs):
+        super().__init__(**kwargs)
+        self.dimension = dimension
+
+    @property
+    def cache_key(self) -> str:
+        return f"hashing:{self.dimension}"
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in tokenize(text):
+                digest = int.from_bytes(
+                    hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(),
+                    "little",
+                )
+                vectors[row, digest % self.dimension] += (
+                    1.0 if (digest >> 63) & 1 else -1.0
+                )
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+
+    def chroma_config(self) -> Dict[str, Any]:
+        return {**super().chroma_config(), "dimension": self.dimension}
+
+    @classmethod
+    def from_chroma_config(cls, config: Dict[str, Any]) -> "HashingBackend":
+        return cls(
+            dimension=config.get("dimension", 384),
+            batch_size=config.get("batch_size", RAG_EMBEDDING_BATCH_SIZE),
+        )
+
+
+EMBEDDING_BACKENDS = {
+    SentenceTransformerBackend.name: SentenceTransformerBackend,
+    OnnxInt8Backend.name: OnnxInt8Backend,
+    HashingBackend.name: HashingBackend,
+}
+
+
+def create_embedding_backend(
+    name: str = DEFAULT_EMBEDDING_BACKEND,
+    model_name: str = DEFAULT_EMBEDDING_MODEL,
+    batch_size: int = RAG_EMBEDDING_BATCH_SIZE,
+    num_threads: int = RAG_EMBEDDING_THREADS,
+) -> EmbeddingBackend:
+    if name not in EMBEDDING_BACKENDS:
+        raise ValueError(
+            f"Unknown embedding backend '{name}'. Choose one of: "
+            f"{', '.join(EMBEDDING_BACKENDS)}"
+        )
+    if name == SentenceTransformerBackend.name:
+        return SentenceTransformerBackend(
+            model_name=model_name, batch_size=batch_size, num_threads=num_threads
+        )
+    return EMBEDDING_BACKENDS[name](batch_size=batch_size, num_threads=num_threads)
+
+
+class BackendEmbeddingFunction(EmbeddingFunction):
+    # Adapts an EmbeddingBackend to Chroma's embedding-function interface. Chroma calls
+    # name() and build_from_config() on the class, and registers the class under that
+    # name, so each backend has its own subclass below; embedding_function_for() picks
+    # it.
+    backend_class = EmbeddingBackend
+
+    def __init__(self, backend: EmbeddingBackend):
+        self.backend = backend
+
+    @property
+    def loaded(self) -> bool:
+        return self.backend.loaded
+
+    def load(self):
+        self.backend.load()
+
+    def __call__(self, input: List[str]):
+        return list(self.backend.embed(list(input)))
+
+    def get_config(self) -> Dict[str, Any]:
+        return self.backend.chroma_config()
+
+    @classmethod
+    def build_from_config(cls, config: Dict[str, Any]) -> "BackendEmbeddingFunction":
+        return cls(cls.backend_class.from_chroma_config(config))
+
+    def default_space(self):
+        return "cosine"
+
+    def supported_spaces(self):
+        return ["cosine", "l2", "ip"]
+
+
+class SentenceTransformerFunction(BackendEmbeddingFunction):
+    # Same name and config as Chroma's SentenceTransformerEmbeddingFunction, so
+    # collections created with it open unchanged.
+    backend_class = SentenceTransformerBackend
+
+    @staticmethod
+    def name() -> str:
+        return "sentence_transformer"
+
+
+class OnnxInt8Function(BackendEmbeddingFunction):
+    backend_class = OnnxInt8Backend
+
+    @staticmethod
+    def name() -> str:
+        return "zaki_os_onnx_int8"
+
+
+class HashingFunction(BackendEmbeddingFunction):
+    backend_class = HashingBackend
+
+    @staticmethod
+    def name() -> str:
+        return "zaki_os_hashing"
+
+
+EMBEDDING_FUNCTIONS = {
+    function.backend_class.name: function
+    for function in (SentenceTransformerFunction, OnnxInt8Function, HashingFunction)
+}
+
+
+def embedding_function_for(backend: EmbeddingBackend) -> BackendEmbeddingFunction:
+    return EMBEDDING_FUNCTIONS[backend.name](backend)
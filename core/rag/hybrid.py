@@ -0,0 +1,45 @@
+# core/rag/hybrid.py
+from typing import Dict, List, Sequence
+
+from core.rag.lexical_index import LexicalIndex, tokenize, is_identifier
+
+RRF_K = 60
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[str]], k: int = RRF_K
+) -> List[tuple]:
+    # Fuses ranked id lists: score(id) = sum over lists of 1 / (k + rank). Returns (id,
+    # score), best first.
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def rerank(
+    query: str,
+    candidates: List[Dict[str, any]],
+    lexical_index: LexicalIndex = None,
+    identifier_weight: float = 0.02,
+    coverage_weight: float = 0.01,
+) -> List[Dict[str, any]]:
+    # Cheap second stage over the fused top-K: boosts passages that contain the query's
+    # identifiers verbatim (versions, file and status names) and that cover more of its
+    # terms. Weights are on the scale of RRF scores (1/61 for a first place), so this
+    # reorders near-ties rather than overriding fusion.
+    query_terms = set(tokenize(query))
+    if not query_terms:
+        return candidates
+    identifiers = {t for t in query_terms if is_identifier(t)}
+    for candidate in candidates:
+        if lexical_index is not None and candidate["id"] in lexical_index:
+            doc_terms = lexical_index.matching_terms(candidate["id"], query_terms)
+        else:
+            doc_terms = set(tokenize(candidate.get("document_content", "")))
+        bonus = coverage_weight * len(query_terms & doc_terms) / len(query_terms)
+        if identifiers:
+            bonus += identifier_weight * len(identifiers & doc_terms) / len(identifiers)
+        candidate["score"] = candidate.get("score", 0.0) + bonus
+    return sorted(candidates, key=lambda c: c["score"], reverse=True)
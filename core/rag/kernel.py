@@ -1,150 +1,530 @@
 # core/rag/kernel.py
 import os
+import time
 import pathlib
 import logging
-from typing import List, Dict # Corrected import for Dict
+from typing import List, Dict  # Corrected import for Dict
 from core.rag.vector_store import VectorStore
+from core.rag.loader import chunk_markdown, DEFAULT_CHUNK_TOKENS, DEFAULT_CHUNK_OVERLAP
+from core.rag.manifest import IndexManifest, sha256_bytes
+from core.rag.hybrid import reciprocal_rank_fusion, rerank
+from core.rag.query_cache import QueryResultCache, normalize_query
 
 logger = logging.getLogger(__name__)
 if not logger.hasHandlers():
-    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(name)s - %(message)s')
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
+    )
 
 PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[2]
 DOCS_PATH = PROJECT_ROOT / "docs"
 VECTOR_STORE_PATH = str(PROJECT_ROOT / "core" / "rag" / "vector_store_data_prod")
 DEFAULT_RAG_COLLECTION_NAME = "zaki_os_lessons_prod"
+DOC_GLOB_PATTERNS = ("**/*.md",)
+# Plans the agent runner used to write under docs/plans (PLAN_<title>_<task id>.md; they
+# are task artifacts in the database now). They are generated output, not lessons, so
+# they are not indexed.
+DOC_EXCLUDE_PATTERNS = ("plans/PLAN_*_[0-9]*.md",)
+INDEX_BATCH_SIZE = 256  # chunks per upsert call
+RAG_QUERY_BATCH_SIZE = int(
+    os.getenv("RAG_QUERY_BATCH_SIZE", "64")
+)  # queries per embedding pass / collection query
+RAG_RETRIEVAL_MODE = os.getenv(
+    "RAG_RETRIEVAL_MODE", "hybrid"
+)  # "hybrid" (vector + BM25) or "vector"
+RAG_HYBRID_CANDIDATES = int(
+    os.getenv("RAG_HYBRID_CANDIDATES", "4")
+)  # per-retriever candidates = n_results * this
+RAG_RERANK = os.getenv("RAG_RERANK", "1") != "0"
+# "sentence-transformers" (default), "onnx-int8" or "hashing" (deterministic, no model;
+# for tests).
+RAG_EMBEDDING_BACKEND = os.getenv("RAG_EMBEDDING_BACKEND", "sentence-transformers")
+
+
+def discover_documents(docs_path: pathlib.Path = DOCS_PATH) -> List[pathlib.Path]:
+    return sorted(
+        {
+            p
+            for pattern in DOC_GLOB_PATTERNS
+            for p in docs_path.glob(pattern)
+            if p.is_file()
+            and not any(
+                p.relative_to(docs_path).match(excluded)
+                for excluded in DOC_EXCLUDE_PATTERNS
+            )
+        }
+    )
+
 
 class RAGKernel:
-    def __init__(self, vector_store_path: str = VECTOR_STORE_PATH, collection_name: str = DEFAULT_RAG_COLLECTION_NAME, embedding_model_name: str = "all-MiniLM-L6-v2"):
-        logger.info(f"Initializing RAGKernel with vector store path: {vector_store_path}, collection: {collection_name}")
+    def __init__(
+        self,
+        vector_store_path: str = VECTOR_STORE_PATH,
+        collection_name: str = DEFAULT_RAG_COLLECTION_NAME,
+        embedding_model_name: str = "all-MiniLM-L6-v2",
+        chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+        chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+        docs_path: pathlib.Path = DOCS_PATH,
+        embedding_backend: str = RAG_EMBEDDING_BACKEND,
+        embedding_batch_size: int = None,
+        embedding_threads: int = None,
+    ):
+        self.chunk_tokens = chunk_tokens
+        self.chunk_overlap = chunk_overlap
+        self.docs_path = pathlib.Path(docs_path)
+        self.query_cache = QueryResultCache()
+        if embedding_backend != "sentence-transformers":
+            # Vectors from different backends are not comparable, so each backend gets
+            # its own collection.
+            collection_name = f"{collection_name}_{embedding_backend.replace('-', '_')}"
+        self.manifest = IndexManifest.for_store(
+            vector_store_path,
+            collection_name,
+            settings={
+                "collection": collection_name,
+                "embedding_backend": embedding_backend,
+                "embedding_model": embedding_model_name,
+                "chunk_tokens": chunk_tokens,
+                "chunk_overlap": chunk_overlap,
+            },
+        )
+        logger.info(
+            f"Initializing RAGKernel with vector store path: {vector_store_path}, "
+            f"collection: {collection_name}, embedding backend: {embedding_backend}"
+        )
         try:
-            self.vector_store = VectorStore(path=vector_store_path, collection_name=collection_name, embedding_model_name=embedding_model_name)
-            # Check if collection is not None before calling count, and handle potential errors from VectorStore init
+            from core.rag.embeddings import (
+                create_embedding_backend,
+                RAG_EMBEDDING_BATCH_SIZE,
+                RAG_EMBEDDING_THREADS,
+            )
+
+            backend = create_embedding_backend(
+                embedding_backend,
+                model_name=embedding_model_name,
+                batch_size=embedding_batch_size or RAG_EMBEDDING_BATCH_SIZE,
+                num_threads=(
+                    RAG_EMBEDDING_THREADS
+                    if embedding_threads is None
+                    else embedding_threads
+                ),
+            )
+            self.vector_store = VectorStore(
+                path=vector_store_path,
+                collection_name=collection_name,
+                embedding_model_name=embedding_model_name,
+                embedding_backend=backend,
+            )
+            # Check if collection is not None before calling count, and handle potential
+            # errors from VectorStore init
             if self.vector_store and self.vector_store.collection:
-                 self.documents_loaded = self.vector_store.get_collection_count() > 0
+                self.documents_loaded = self.vector_store.get_collection_count() > 0
             else:
-                 self.documents_loaded = False
-                 logger.warning("VectorStore or its collection might not have been initialized properly.")
+                self.documents_loaded = False
+                logger.warning(
+                    "VectorStore or its collection might not have been initialized "
+                    "properly."
+                )
         except Exception as e:
             logger.error(f"RAGKernel initialization failed: {e}", exc_info=True)
             self.vector_store = None
             self.documents_loaded = False
 
-    def _load_markdown_documents(self, doc_paths: List[pathlib.Path]) -> List[Dict[str, str]]:
-        loaded_docs = []
-        for doc_path in doc_paths:
-            try:
-                with open(doc_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                loaded_docs.append({"source": doc_path.name, "content": content, "path": str(doc_path)})
-                logger.info(f"Successfully loaded document: {doc_path.name}")
-            except Exception as e:
-                logger.error(f"Failed to load document {doc_path}: {e}", exc_info=True)
-        return loaded_docs
-
-    def initialize_and_embed_lessons(self, force_reindex: bool = False):
+    def initialize_and_embed_lessons(
+        self, force_reindex: bool = False
+    ) -> Dict[str, int]:
+        # Incrementally syncs the collection with the markdown files under docs_path,
+        # using the manifest of per-file/per-chunk hashes stored next to the vector
+        # store: unchanged files are skipped on their stat signature alone, only new or
+        # edited chunks are embedded, moved chunks get a metadata-only update and chunks
+        # of edited/deleted files are removed. force_reindex=True discards the manifest
+        # and rebuilds the collection from scratch.
+        stats = {
+            "files_scanned": 0,
+            "files_changed": 0,
+            "files_removed": 0,
+            "chunks_added": 0,
+            "chunks_updated": 0,
+            "chunks_deleted": 0,
+        }
         if self.vector_store is None:
             logger.error("Vector store not initialized. Cannot embed lessons.")
-            return
+            return stats
 
-        if not force_reindex and self.documents_loaded:
-            logger.info("Documents already exist in the vector store and seem loaded. Skipping re-indexing. Use force_reindex=True to override.")
-            return
+        started = time.perf_counter()
+        manifest_usable = not force_reindex and self.manifest.load()
+        if (
+            manifest_usable
+            and self.manifest.chunk_count() != self.vector_store.get_collection_count()
+        ):
+            logger.warning(
+                "Index manifest does not match the collection contents; rebuilding the "
+                "index."
+            )
+            manifest_usable = False
+        if not manifest_usable:
+            self.manifest.files = {}
+            self.vector_store.delete_documents(self.vector_store.get_all_ids())
 
-        doc_files_to_load = [
-            DOCS_PATH / "memory_kernel" / "index.md",
-            DOCS_PATH / "onboarding" / "AGENT_ONBOARDING.md",
-            DOCS_PATH / "status" / "AGENT_WORKFLOW_RULES_v1.3.2.md"
-        ]
-
-        existing_doc_paths = [p for p in doc_files_to_load if p.exists()]
-        missing_docs = set(doc_files_to_load) - set(existing_doc_paths)
-        if missing_docs:
-            for p_miss in missing_docs: logger.warning(f"Document not found: {p_miss}")
+        current_docs = {
+            self._source_key(str(p)): p for p in discover_documents(self.docs_path)
+        }
+        if not current_docs:
+            logger.warning(
+                f"No documents found under {self.docs_path} to load for RAG system."
+            )
 
-        if not existing_doc_paths:
-            logger.warning("No documents found to load for RAG system.")
-            return
+        ids_to_delete, ids_to_update, metadatas_to_update = [], [], []
+        docs_to_add, metadatas_to_add, ids_to_add = [], [], []
+        manifest_changed = not manifest_usable
 
-        raw_documents = self._load_markdown_documents(existing_doc_paths)
+        for source_key in set(self.manifest.files) - set(current_docs):
+            ids_to_delete.extend(self.manifest.files.pop(source_key).get("chunks", {}))
+            stats["files_removed"] += 1
+            manifest_changed = True
 
-        if not raw_documents:
-            logger.warning("No documents were successfully loaded. RAG system will be empty.")
-            return
+        for source_key, doc_path in sorted(current_docs.items()):
+            stats["files_scanned"] += 1
+            entry = self.manifest.files.get(source_key)
+            try:
+                signature = IndexManifest.stat_signature(str(doc_path))
+                if (
+                    entry
+                    and entry["mtime_ns"] == signature["mtime_ns"]
+                    and entry["size"] == signature["size"]
+                ):
+                    continue
+                data = doc_path.read_bytes()
+                digest = sha256_bytes(data)
+                if entry and entry["sha256"] == digest:
+                    entry.update(signature)  # touched but not edited
+                    manifest_changed = True
+                    continue
+                content = data.decode("utf-8")
+            except (OSError, UnicodeDecodeError) as e:
+                logger.error(f"Failed to load document {doc_path}: {e}", exc_info=True)
+                continue
 
-        docs_to_add = [doc['content'] for doc in raw_documents]
-        metadatas_to_add = [{'source': doc['source'], 'path': doc['path']} for doc in raw_documents]
-        ids_to_add = [doc['path'] for doc in raw_documents] # Using path as unique ID
+            # Each document is split on headings and then into overlapping token
+            # windows, so every part of a long file gets embedded and retrieval returns
+            # only the matching passage.
+            chunks = chunk_markdown(
+                content,
+                doc_path.name,
+                str(doc_path),
+                source_key=source_key,
+                chunk_tokens=self.chunk_tokens,
+                chunk_overlap=self.chunk_overlap,
+            )
+            old_chunks = entry.get("chunks", {}) if entry else {}
+            new_chunks = {}
+            for chunk in chunks:
+                meta = chunk["metadata"]
+                position = [meta["start_byte"], meta["end_byte"], meta["chunk_index"]]
+                new_chunks[chunk["id"]] = position
+                if chunk["id"] not in old_chunks:
+                    docs_to_add.append(chunk["text"])
+                    metadatas_to_add.append(meta)
+                    ids_to_add.append(chunk["id"])
+                elif old_chunks[chunk["id"]] != position:
+                    ids_to_update.append(chunk["id"])
+                    metadatas_to_update.append(meta)
+            ids_to_delete.extend(
+                chunk_id for chunk_id in old_chunks if chunk_id not in new_chunks
+            )
+            self.manifest.files[source_key] = {
+                **signature,
+                "sha256": digest,
+                "chunks": new_chunks,
+            }
+            stats["files_changed"] += 1
+            manifest_changed = True
+            logger.info(f"Document changed: {source_key} ({len(chunks)} chunks).")
 
         try:
-            self.vector_store.add_documents(docs_to_add, metadatas_to_add, ids_to_add)
-            self.documents_loaded = True
-            logger.info(f"Successfully embedded and stored {len(docs_to_add)} documents.")
+            self.vector_store.delete_documents(ids_to_delete)
+            for i in range(0, len(ids_to_add), INDEX_BATCH_SIZE):
+                self.vector_store.upsert_documents(
+                    docs_to_add[i : i + INDEX_BATCH_SIZE],
+                    metadatas_to_add[i : i + INDEX_BATCH_SIZE],
+                    ids_to_add[i : i + INDEX_BATCH_SIZE],
+                )
+            self.vector_store.update_metadatas(ids_to_update, metadatas_to_update)
+            if manifest_changed:
+                self.manifest.save()
         except Exception as e:
-            logger.error(f"Failed during embedding and storing documents: {e}", exc_info=True)
+            # The manifest is only written after the collection was updated, so the next
+            # run starts over.
+            logger.error(
+                f"Failed during embedding and storing documents: {e}", exc_info=True
+            )
             self.documents_loaded = False
+            return stats
 
-    def get_relevant_lessons(self, query_text: str, n_results: int = 3) -> List[Dict[str, any]]:
-        if not self.documents_loaded or self.vector_store is None: # Check vector_store again
-            logger.warning("RAG system not ready or no documents loaded. Cannot query for lessons.")
-            return []
+        stats["chunks_added"], stats["chunks_updated"], stats["chunks_deleted"] = (
+            len(ids_to_add),
+            len(ids_to_update),
+            len(ids_to_delete),
+        )
+        self.documents_loaded = self.manifest.chunk_count() > 0
+        logger.info(
+            f"RAG index sync finished in {(time.perf_counter() - started) * 1000:.1f} "
+            f"ms: {stats}"
+        )
+        logger.info(f"Embedding cache: {self.embedding_cache_stats()}")
+        return stats
+
+    def warm_up(self):
+        # Loads the embedding model ahead of the first query (it is otherwise loaded
+        # lazily).
+        if self.vector_store is not None:
+            started = time.perf_counter()
+            self.vector_store.warm_up()
+            logger.info(
+                f"RAG kernel warmed up in {time.perf_counter() - started:.2f}s."
+            )
+
+    def embedding_cache_stats(self) -> Dict[str, float]:
+        return (
+            self.vector_store.embedding_cache_stats()
+            if self.vector_store is not None
+            else {}
+        )
+
+    def query_cache_stats(self) -> Dict[str, float]:
+        return self.query_cache.stats()
 
+    @staticmethod
+    def _source_key(path: str) -> str:
+        # Chunk IDs are built from the path relative to the project so they are the same
+        # on every host.
         try:
-            query_results = self.vector_store.query(query_texts=[query_text], n_results=n_results)
-            relevant_docs = []
-            # Check if query_results and its nested lists/dictionaries are not None and not empty
-            if query_results and \
-               query_results.get('ids') and query_results['ids'] and query_results['ids'][0] and \
-               query_results.get('documents') and query_results['documents'] and query_results['documents'][0] and \
-               query_results.get('metadatas') and query_results['metadatas'] and query_results['metadatas'][0] and \
-               query_results.get('distances') and query_results['distances'] and query_results['distances'][0]:
-
-                for i in range(len(query_results['ids'][0])):
-                    doc_info = {
-                        'id': query_results['ids'][0][i],
-                        'document_content': query_results['documents'][0][i],
-                        'metadata': query_results['metadatas'][0][i],
-                        'distance': query_results['distances'][0][i],
-                    }
-                    relevant_docs.append(doc_info)
+            return str(pathlib.Path(path).resolve().relative_to(PROJECT_ROOT))
+        except ValueError:
+            return str(path)
+
+    def get_relevant_lessons(
+        self, query_text: str, n_results: int = 3, mode: str = None
+    ) -> List[Dict[str, any]]:
+        return self.get_relevant_lessons_batch(
+            [query_text], n_results=n_results, mode=mode
+        )[0]
+
+    def get_relevant_lessons_batch(
+        self,
+        queries: List[str],
+        n_results: int = 3,
+        batch_size: int = RAG_QUERY_BATCH_SIZE,
+        mode: str = None,
+        rerank_results: bool = None,
+    ) -> List[List[Dict[str, any]]]:
+        # Returns one result list per query, in order. Each slice of batch_size queries
+        # is embedded in a single forward pass and searched with a single collection
+        # query; repeated queries are looked up once. mode="hybrid" also searches the
+        # BM25 index and fuses both rankings with RRF, so exact identifiers (file names,
+        # statuses, versions) that embeddings blur are still found; mode="vector" skips
+        # BM25.
+        mode = mode or RAG_RETRIEVAL_MODE
+        rerank_results = RAG_RERANK if rerank_results is None else rerank_results
+        results: List[List[Dict[str, any]]] = [[] for _ in queries]
+        if (
+            not self.documents_loaded or self.vector_store is None
+        ):  # Check vector_store again
+            logger.warning(
+                "RAG system not ready or no documents loaded. Cannot query for lessons."
+            )
+            return results
+
+        # Queries that differ only in case/whitespace share one lookup and one cache
+        # entry. Cache keys carry the index version, which the vector store bumps on
+        # every change, so stale results are never served.
+        positions: Dict[str, List[int]] = {}
+        for i, query_text in enumerate(queries):
+            positions.setdefault(normalize_query(query_text), []).append(i)
+        index_version = self.vector_store.index_version
+        pending = []
+        for normalized, indexes in positions.items():
+            cached = (
+                self.query_cache.get(
+                    (normalized, n_results, mode, rerank_results, index_version)
+                )
+                if self.query_cache.enabled
+                else None
+            )
+            if cached is None:
+                pending.append(normalized)
             else:
-                logger.info(f"Query for '{query_text}' returned no results or unexpected structure.")
-            return relevant_docs
-        except Exception as e:
-            logger.error(f"Error querying for relevant lessons: {e}", exc_info=True)
+                for i in indexes:
+                    results[i] = [dict(doc) for doc in cached]
+
+        n_candidates = (
+            n_results * RAG_HYBRID_CANDIDATES if mode == "hybrid" else n_results
+        )
+        for batch_start in range(0, len(pending), max(1, batch_size)):
+            normalized_batch = pending[batch_start : batch_start + max(1, batch_size)]
+            batch = [
+                queries[positions[normalized][0]] for normalized in normalized_batch
+            ]
+            try:
+                query_results = self.vector_store.query(
+                    query_texts=batch, n_results=n_candidates
+                )
+                if not query_results:
+                    # The store already logged the failure; nothing to return or cache.
+                    continue
+                vector_hits = [
+                    self._parse_query_results(query_results, j)
+                    for j in range(len(batch))
+                ]
+                if mode == "hybrid":
+                    lexical_hits = self.vector_store.lexical_query(
+                        batch, n_results=n_candidates
+                    )
+                    batch_results = self._fuse(
+                        batch, vector_hits, lexical_hits, n_results, rerank_results
+                    )
+                else:
+                    batch_results = vector_hits
+            except Exception as e:
+                logger.error(f"Error querying for relevant lessons: {e}", exc_info=True)
+                continue
+            for normalized, query_text, relevant_docs in zip(
+                normalized_batch, batch, batch_results
+            ):
+                if not relevant_docs:
+                    logger.info(
+                        f"Query for '{query_text}' returned no results or unexpected "
+                        "structure."
+                    )
+                self.query_cache.put(
+                    (normalized, n_results, mode, rerank_results, index_version),
+                    relevant_docs,
+                )
+                for i in positions[normalized]:
+                    results[i] = [dict(doc) for doc in relevant_docs]
+        return results
+
+    def _fuse(
+        self,
+        batch: List[str],
+        vector_hits: List[List[Dict[str, any]]],
+        lexical_hits: List[List[tuple]],
+        n_results: int,
+        rerank_results: bool,
+    ) -> List[List[Dict[str, any]]]:
+        # Lexical-only hits are not in the vector results, so their text and metadata
+        # are fetched in one get().
+        known = {doc["id"]: doc for hits in vector_hits for doc in hits}
+        missing = {
+            doc_id for hits in lexical_hits for doc_id, _ in hits if doc_id not in known
+        }
+        for doc_id, found in self.vector_store.get_documents(sorted(missing)).items():
+            known[doc_id] = {
+                "id": doc_id,
+                "document_content": found["document"],
+                "metadata": found["metadata"],
+                "distance": None,
+            }
+
+        fused_results = []
+        for query_text, vectors, lexical in zip(batch, vector_hits, lexical_hits):
+            fused = reciprocal_rank_fusion(
+                [[doc["id"] for doc in vectors], [doc_id for doc_id, _ in lexical]]
+            )
+            candidates = [
+                dict(known[doc_id], score=score)
+                for doc_id, score in fused
+                if doc_id in known
+            ]
+            if rerank_results:
+                candidates = rerank(
+                    query_text, candidates, self.vector_store.lexical_index
+                )
+            fused_results.append(candidates[:n_results])
+        return fused_results
+
+    @staticmethod
+    def _parse_query_results(query_results: dict, index: int) -> List[Dict[str, any]]:
+        # Check if query_results and its nested lists/dictionaries are not None and not
+        # empty
+        try:
+            ids = query_results["ids"][index]
+            documents = query_results["documents"][index]
+            metadatas = query_results["metadatas"][index]
+            distances = query_results["distances"][index]
+        except (KeyError, IndexError, TypeError):
+            return []
+        if not (ids and documents and metadatas and distances):
             return []
+        return [
+            {
+                "id": ids[i],
+                "document_content": documents[i],
+                "metadata": metadatas[i],
+                "distance": distances[i],
+            }
+            for i in range(len(ids))
+        ]
+
 
-if __name__ == '__main__':
+if __name__ == "__main__":
     logger.info("RAG Kernel standalone test initiated.")
     # Use a different path for test data to avoid interfering with potential prod data
-    test_vector_store_path = str(PROJECT_ROOT / "core" / "rag" / "vector_store_data_test")
+    test_vector_store_path = str(
+        PROJECT_ROOT / "core" / "rag" / "vector_store_data_test"
+    )
     test_collection_name = "zaki_os_lessons_test"
 
     # Clean up old test data if any
     if os.path.exists(test_vector_store_path):
         import shutil
+
         try:
             shutil.rmtree(test_vector_store_path)
-            logger.info(f"Removed old test vector store data at: {test_vector_store_path}")
+            logger.info(
+                f"Removed old test vector store data at: {test_vector_store_path}"
+            )
         except Exception as e_rm:
             logger.error(f"Error removing old test vector store data: {e_rm}")
 
-    rag_kernel = RAGKernel(vector_store_path=test_vector_store_path, collection_name=test_collection_name)
+    rag_kernel = RAGKernel(
+        vector_store_path=test_vector_store_path, collection_name=test_collection_name
+    )
 
-    if rag_kernel.vector_store and rag_kernel.vector_store.collection: # Ensure collection is also valid
-        rag_kernel.initialize_and_embed_lessons(force_reindex=True) # Force reindex for testing
+    if (
+        rag_kernel.vector_store and rag_kernel.vector_store.collection
+    ):  # Ensure collection is also valid
+        rag_kernel.initialize_and_embed_lessons(
+            force_reindex=True
+        )  # Force reindex for testing
         count = rag_kernel.vector_store.get_collection_count()
-        logger.info(f"Number of documents in RAG store ('{test_collection_name}'): {count}")
+        logger.info(
+            f"Number of documents in RAG store ('{test_collection_name}'): {count}"
+        )
 
         if count > 0:
             sample_query = "How should an agent create a plan?"
             lessons = rag_kernel.get_relevant_lessons(sample_query, n_results=2)
             if lessons:
-                logger.info(f"Query: '{sample_query}' -> Found {len(lessons)} relevant lessons:")
+                logger.info(
+                    f"Query: '{sample_query}' -> Found {len(lessons)} relevant lessons:"
+                )
                 for i, lesson in enumerate(lessons):
-                    logger.info(f"  Lesson {i+1}: Source: {lesson.get('metadata', {}).get('source')}, Distance: {lesson.get('distance'):.4f if lesson.get('distance') is not None else 'N/A'}")
-                    # logger.info(f" Content: {lesson.get('document_content', '')[:100]}...") # Optional: log snippet
+                    source = lesson.get("metadata", {}).get("source")
+                    distance = lesson.get("distance")
+                    distance = f"{distance:.4f}" if distance is not None else "N/A"
+                    logger.info(
+                        f"  Lesson {i+1}: Source: {source}, Distance: {distance}"
+                    )
+                    # Optional: log snippet
+                    # logger.info(
+                    #     f" Content: {lesson.get('document_content', '')[:100]}..."
+                    # )
             else:
                 logger.warning(f"No relevant lessons found for query: '{sample_query}'")
     else:
-        logger.error("RAG Kernel could not be initialized with a vector store or collection. Standalone test aborted.")
+        logger.error(
+            "RAG Kernel could not be initialized with a vector store or collection. "
+            "Standalone test aborted."
+        )
@@ -0,0 +1,191 @@
+# core/rag/lexical_index.py
+import re
+import math
+import heapq
+import bisect
+import logging
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Postings are rebuilt without deleted documents once tombstones exceed this share of
+# the index.
+COMPACT_TOMBSTONE_RATIO = 0.25
+
+# Identifiers such as "v1.3.2", "agent_runner.py", "pending_approval" or "docs/plans"
+# are kept as one token, and their parts are indexed too so "agent_runner" also matches
+# "runner".
+_TOKEN_RE = re.compile(r"[a-z0-9_]+(?:[./\-][a-z0-9_]+)*")
+_PART_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for match in _TOKEN_RE.finditer(text.lower()):
+        token = match.group(0)
+        tokens.append(token)
+        parts = _PART_RE.findall(token)
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+def is_identifier(token: str) -> bool:
+    # Tokens that embeddings tend to blur: versions, file names, snake_case names,
+    # numbers.
+    return any(c.isdigit() or c in "._-/" for c in token)
+
+
+class LexicalIndex:
+    # In-memory BM25 inverted index. Each term maps to two parallel uint32 arrays
+    # (document numbers, term frequencies); documents are numbered in insertion order,
+    # so postings stay sorted and are appended to on add. Removing a document only
+    # tombstones its number; postings are compacted when tombstones pile up.
+    # Thread-safe.
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._doc_ids: List[Optional[str]] = []
+        self._doc_lengths = array("I")
+        self._doc_numbers: Dict[str, int] = {}
+        self._total_length = 0
+        self._tombstones = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_numbers)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._doc_numbers
+
+    def add(self, doc_ids: List[str], texts: List[str]):
+        # Adding an id that is already indexed replaces its text (upsert semantics, like
+        # the collection).
+        with self._lock:
+            self._remove(doc_ids)
+            for doc_id, text in zip(doc_ids, texts):
+                doc_number = len(self._doc_ids)
+                tokens = tokenize(text)
+                frequencies: Dict[str, int] = {}
+                for token in tokens:
+                    frequencies[token] = frequencies.get(token, 0) + 1
+                for term, tf in frequencies.items():
+                    postings = self._postings.get(term)
+                    if postings is None:
+                        postings = self._postings[term] = (array("I"), array("I"))
+                    postings[0].append(doc_number)
+                    postings[1].append(tf)
+                self._doc_ids.append(doc_id)
+                self._doc_lengths.append(len(tokens))
+                self._doc_numbers[doc_id] = doc_number
+                self._total_length += len(tokens)
+            self._maybe_compact()
+
+    def remove(self, doc_ids: Iterable[str]):
+        with self._lock:
+            self._remove(doc_ids)
+            self._maybe_compact()
+
+    def _remove(self, doc_ids: Iterable[str]):
+        for doc_id in doc_ids:
+            doc_number = self._doc_numbers.pop(doc_id, None)
+            if doc_number is None:
+                continue
+            self._doc_ids[doc_number] = None
+            self._total_length -= self._doc_lengths[doc_number]
+            self._tombstones += 1
+
+    def _maybe_compact(self):
+        if self._tombstones and self._tombstones > COMPACT_TOMBSTONE_RATIO * len(
+            self._doc_ids
+        ):
+            self.compact()
+
+    def compact(self):
+        with self._lock:
+            renumber = array("i", [-1]) * len(self._doc_ids)
+            doc_ids: List[Optional[str]] = []
+            doc_lengths = array("I")
+            for old_number, doc_id in enumerate(self._doc_ids):
+                if doc_id is not None:
+                    renumber[old_number] = len(doc_ids)
+                    doc_ids.append(doc_id)
+                    doc_lengths.append(self._doc_lengths[old_number])
+            postings: Dict[str, Tuple[array, array]] = {}
+            for term, (numbers, frequencies) in self._postings.items():
+                new_numbers, new_frequencies = array("I"), array("I")
+                for doc_number, tf in zip(numbers, frequencies):
+                    if renumber[doc_number] >= 0:
+                        new_numbers.append(renumber[doc_number])
+                        new_frequencies.append(tf)
+                if new_numbers:
+                    postings[term] = (new_numbers, new_frequencies)
+            logger.debug(
+                f"Compacted lexical index: dropped {self._tombstones} deleted "
+                "documents."
+            )
+            self._postings, self._doc_ids, self._doc_lengths = (
+                postings,
+                doc_ids,
+                doc_lengths,
+            )
+            self._doc_numbers = {doc_id: n for n, doc_id in enumerate(doc_ids)}
+            self._tombstones = 0
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        # Returns up to k (doc_id, bm25_score) pairs, best first.
+        with self._lock:
+            live_docs = len(self._doc_numbers)
+            if not live_docs:
+                return []
+            avg_length = self._total_length / live_docs or 1.0
+            scores: Dict[int, float] = {}
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if postings is None:
+                    continue
+                numbers, frequencies = postings
+                # Document frequency includes tombstoned postings until compaction;
+                # close enough for ranking.
+                df = len(numbers)
+                idf = math.log(1 + (live_docs - df + 0.5) / (df + 0.5))
+                for doc_number, tf in zip(numbers, frequencies):
+                    if self._doc_ids[doc_number] is None:
+                        continue
+                    norm = BM25_K1 * (
+                        1 - BM25_B + BM25_B * self._doc_lengths[doc_number] / avg_length
+                    )
+                    scores[doc_number] = scores.get(doc_number, 0.0) + idf * tf * (
+                        BM25_K1 + 1
+                    ) / (tf + norm)
+            best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            return [(self._doc_ids[doc_number], score) for doc_number, score in best]
+
+    def matching_terms(self, doc_id: str, terms: Iterable[str]) -> set:
+        # Which of the (already tokenized) terms occur in the document; a binary search
+        # per term on its sorted postings, so rerankers need not re-tokenize candidate
+        # texts.
+        with self._lock:
+            doc_number = self._doc_numbers.get(doc_id)
+            if doc_number is None:
+                return set()
+            found = set()
+            for term in terms:
+                postings = self._postings.get(term)
+                if postings is None:
+                    continue
+                numbers = postings[0]
+                i = bisect.bisect_left(numbers, doc_number)
+                if i < len(numbers) and numbers[i] == doc_number:
+                    found.add(term)
+            return found
+
+    def memory_bytes(self) -> int:
+        with self._lock:
+            return sum(
+                a.itemsize * len(a) + b.itemsize * len(b)
+                for a, b in self._postings.values()
+            ) + self._doc_lengths.itemsize * len(self._doc_lengths)
@@ -1 +1,143 @@
 # Load and format lessons/reports for vector DB
+# core/rag/loader.py
+import re
+import hashlib
+import logging
+from typing import List, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+# all-MiniLM-L6-v2 truncates input at 256 word pieces; whitespace tokens run ~1.3 word
+# pieces each in our docs, so 150-token windows stay inside the model's context.
+DEFAULT_CHUNK_TOKENS = 150
+DEFAULT_CHUNK_OVERLAP = 30
+HEADING_PATH_SEPARATOR = " > "
+
+_HEADING_RE = re.compile(rb"^(#{1,6})[ \t]+(.+?)[ \t#]*$")
+_FENCE_RE = re.compile(rb"^[ \t]*(```|~~~)")
+_TOKEN_RE = re.compile(rb"\S+")
+
+
+def _clean_heading(raw: bytes) -> str:
+    # "## **2.1 Tier 1: Shallow Reasoning**" -> "2.1 Tier 1: Shallow Reasoning"
+    return re.sub(r"[*`]+", "", raw.decode("utf-8", errors="replace")).strip()
+
+
+def split_markdown_sections(data: bytes) -> List[Dict[str, Any]]:
+    # Splits raw markdown bytes on ATX headings (ignoring '#' lines inside fenced code
+    # blocks). Each section covers [start_byte, end_byte) of `data`, starts with its
+    # heading line (if any) and carries the chain of enclosing headings.
+    sections = []
+    heading_stack: List[tuple] = []  # (level, title)
+    section_start = 0
+    section_headings: List[str] = []
+    in_fence = False
+    offset = 0
+    for line in data.splitlines(keepends=True):
+        stripped = line.rstrip(b"\r\n")
+        if _FENCE_RE.match(stripped):
+            in_fence = not in_fence
+        elif not in_fence:
+            match = _HEADING_RE.match(stripped)
+            if match:
+                if offset > section_start:
+                    sections.append(
+                        {
+                            "start_byte": section_start,
+                            "end_byte": offset,
+                            "headings": section_headings,
+                        }
+                    )
+                level = len(match.group(1))
+                while heading_stack and heading_stack[-1][0] >= level:
+                    heading_stack.pop()
+                heading_stack.append((level, _clean_heading(match.group(2))))
+                section_start = offset
+                section_headings = [title for _, title in heading_stack]
+        offset += len(line)
+    if offset > section_start:
+        sections.append(
+            {
+                "start_byte": section_start,
+                "end_byte": offset,
+                "headings": section_headings,
+            }
+        )
+    return sections
+
+
+def _chunk_id(source_key: str, heading_path: str, text: str, occurrence: int) -> str:
+    digest = hashlib.sha1(f"{heading_path}\0{text}".encode("utf-8")).hexdigest()[:16]
+    return f"{source_key}#{digest}" + (f"-{occurrence}" if occurrence else "")
+
+
+def chunk_markdown(
+    content: str,
+    source: str,
+    path: str,
+    source_key: str = None,
+    chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+) -> List[Dict[str, Any]]:
+    # Splits a markdown document into retrieval chunks: first by heading, then into
+    # windows of `chunk_tokens` whitespace-delimited tokens overlapping by
+    # `chunk_overlap` tokens. Chunk IDs are derived from the source, heading path and
+    # chunk text, so they stay stable while that text is unchanged. Byte offsets refer
+    # to the UTF-8 encoded document.
+    if chunk_tokens < 1 or not 0 <= chunk_overlap < chunk_tokens:
+        raise ValueError(
+            f"Invalid chunking window: chunk_tokens={chunk_tokens}, "
+            f"chunk_overlap={chunk_overlap}"
+        )
+    source_key = source_key or path
+    data = content.encode("utf-8")
+    chunks = []
+    seen_ids: Dict[str, int] = {}
+    step = chunk_tokens - chunk_overlap
+    for section in split_markdown_sections(data):
+        heading_path = HEADING_PATH_SEPARATOR.join(section["headings"])
+        tokens = [
+            m.span()
+            for m in _TOKEN_RE.finditer(
+                data, section["start_byte"], section["end_byte"]
+            )
+        ]
+        body_starts_at = 0
+        if section["headings"]:
+            # Every titled section begins with its heading line; a heading with nothing
+            # under it (e.g. directly followed by a sub-heading) is not worth a chunk of
+            # its own.
+            heading_line_end = data.find(
+                b"\n", section["start_byte"], section["end_byte"]
+            )
+            heading_line_end = (
+                section["end_byte"] if heading_line_end == -1 else heading_line_end
+            )
+            body_starts_at = sum(1 for start, _ in tokens if start < heading_line_end)
+        if len(tokens) <= body_starts_at:
+            continue
+        for window_start in range(0, len(tokens), step):
+            window = tokens[window_start : window_start + chunk_tokens]
+            start_byte, end_byte = window[0][0], window[-1][1]
+            text = data[start_byte:end_byte].decode("utf-8")
+            base_id = _chunk_id(source_key, heading_path, text, 0)
+            occurrence = seen_ids.get(base_id, 0)
+            seen_ids[base_id] = occurrence + 1
+            chunks.append(
+                {
+                    "id": _chunk_id(source_key, heading_path, text, occurrence),
+                    "text": text,
+                    "metadata": {
+                        "source": source,
+                        "path": path,
+                        "heading_path": heading_path,
+                        "start_byte": start_byte,
+                        "end_byte": end_byte,
+                        "chunk_index": len(chunks),
+                    },
+                }
+            )
+            if window_start + chunk_tokens >= len(tokens):
+                break
+    logger.debug(f"Split '{source}' into {len(chunks)} chunks.")
+    return chunks
@@ -0,0 +1,92 @@
+# core/rag/manifest.py
+import os
+import json
+import hashlib
+import logging
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = "index_manifest_{collection}.json"
+MANIFEST_VERSION = 1
+
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class IndexManifest:
+    # Records what is currently embedded in a collection: for every source file its stat
+    # signature (mtime_ns, size), content hash and the chunks it produced (id -> chunk
+    # metadata). Stored as JSON next to the Chroma data so a reindex only embeds what
+    # actually changed.
+    def __init__(self, path: str, settings: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self.settings = settings or {}
+        self.files: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def for_store(
+        cls, vector_store_path: str, collection_name: str, settings: Dict[str, Any]
+    ) -> "IndexManifest":
+        return cls(
+            os.path.join(
+                vector_store_path, MANIFEST_FILENAME.format(collection=collection_name)
+            ),
+            settings,
+        )
+
+    def load(self) -> bool:
+        # Returns False (and stays empty) if there is no usable manifest for the current
+        # settings, in which case the caller must treat the collection as unknown and
+        # rebuild it.
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable index manifest {self.path}: {e}")
+            return False
+        if (
+            data.get("version") != MANIFEST_VERSION
+            or data.get("settings") != self.settings
+        ):
+            logger.info(
+                "Index manifest was written with different settings; a full reindex is "
+                "required."
+            )
+            return False
+        self.files = data.get("files", {})
+        return True
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": MANIFEST_VERSION,
+                    "settings": self.settings,
+                    "files": self.files,
+                },
+                f,
+                indent=1,
+                sort_keys=True,
+            )
+        os.replace(tmp_path, self.path)
+
+    def chunk_count(self) -> int:
+        return sum(len(entry.get("chunks", {})) for entry in self.files.values())
+
+    def all_chunk_ids(self):
+        return [
+            chunk_id
+            for entry in self.files.values()
+            for chunk_id in entry.get("chunks", {})
+        ]
+
+    @staticmethod
+    def stat_signature(path: str) -> Dict[str, int]:
+        st = os.stat(path)
+        return {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
@@ -0,0 +1,120 @@
+# core/rag/query_cache.py
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+RAG_QUERY_CACHE_ENTRIES = int(
+    os.getenv("RAG_QUERY_CACHE_ENTRIES", "1024")
+)  # 0 disables the cache
+RAG_QUERY_CACHE_TTL = float(os.getenv("RAG_QUERY_CACHE_TTL", "600"))
+RAG_QUERY_CACHE_MAX_BYTES = int(
+    os.getenv("RAG_QUERY_CACHE_MAX_BYTES", str(32 * 1024 * 1024))
+)
+_ENTRY_OVERHEAD_BYTES = 200
+
+
+def normalize_query(text: str) -> str:
+    # All shipped embedders and the BM25 tokenizer are case-insensitive, so case and
+    # whitespace differences between resubmitted prompts cannot change the results.
+    return " ".join(text.split()).casefold()
+
+
+def estimate_result_bytes(lessons: List[Dict[str, Any]]) -> int:
+    size = _ENTRY_OVERHEAD_BYTES
+    for lesson in lessons:
+        size += (
+            _ENTRY_OVERHEAD_BYTES
+            + len(lesson.get("id", ""))
+            + len(lesson.get("document_content") or "")
+        )
+        size += sum(
+            len(str(k)) + len(str(v)) for k, v in (lesson.get("metadata") or {}).items()
+        )
+    return size
+
+
+class QueryResultCache:
+    # LRU cache of retrieval results with a TTL and a cap on the (estimated) bytes held.
+    # Callers put the index version into the key, so entries for an older index are
+    # simply never hit again and age out.
+    def __init__(
+        self,
+        max_entries: int = RAG_QUERY_CACHE_ENTRIES,
+        ttl_seconds: float = RAG_QUERY_CACHE_TTL,
+        max_bytes: int = RAG_QUERY_CACHE_MAX_BYTES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = (
+            OrderedDict()
+        )  # key -> (expires_at, size, lessons)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, key: Hashable) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self._clock():
+                self._drop(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return [dict(lesson) for lesson in entry[2]]
+
+    def put(self, key: Hashable, lessons: List[Dict[str, Any]]):
+        if not self.enabled:
+            return
+        size = estimate_result_bytes(lessons)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (
+                self._clock() + self.ttl_seconds,
+                size,
+                [dict(lesson) for lesson in lessons],
+            )
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key: Hashable):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -1,54 +1,226 @@
 # core/rag/vector_store.py
-import chromadb
-from chromadb.utils import embedding_functions
 import os
 import logging
+from core.rag.lexical_index import LexicalIndex
 
 logger = logging.getLogger(__name__)
 
+# Set RAG_EMBEDDING_CACHE=0 to embed every text with the model; RAG_EMBEDDING_CACHE_PATH
+# shares one cache file between stores (by default it lives next to the Chroma data).
+RAG_EMBEDDING_CACHE_ENABLED = os.getenv("RAG_EMBEDDING_CACHE", "1") != "0"
+RAG_EMBEDDING_CACHE_PATH = os.getenv("RAG_EMBEDDING_CACHE_PATH")
+
+
 class VectorStore:
-    def __init__(self, path="./vector_store_data/", collection_name="zaki_os_lessons", embedding_model_name="all-MiniLM-L6-v2"):
+    def __init__(
+        self,
+        path="./vector_store_data/",
+        collection_name="zaki_os_lessons",
+        embedding_model_name="all-MiniLM-L6-v2",
+        embedding_cache_path=RAG_EMBEDDING_CACHE_PATH,
+        use_embedding_cache=RAG_EMBEDDING_CACHE_ENABLED,
+        embedding_backend=None,
+    ):
+        # chromadb, numpy and the model are imported here rather than at module level,
+        # so importing the RAG stack (e.g. by an agent runner that finds no work) stays
+        # cheap.
+        import chromadb
+        from core.rag.embedding_cache import (
+            EmbeddingCache,
+            cached_embedding_function,
+            EMBEDDING_CACHE_FILENAME,
+        )
+        from core.rag.embeddings import create_embedding_backend, embedding_function_for
+
         os.makedirs(path, exist_ok=True)
         self.client = chromadb.PersistentClient(path=path)
 
-        self.sentence_transformer_ef = embedding_functions.SentenceTransformerEmbeddingFunction(model_name=embedding_model_name)
+        # The model itself is loaded on the first embed that misses the cache (or by
+        # warm_up()).
+        self.embedding_backend = embedding_backend or create_embedding_backend(
+            model_name=embedding_model_name
+        )
+        self.model_embedding_function = embedding_function_for(self.embedding_backend)
+        # Documents and queries go through the same cache, so resubmitted prompts and
+        # re-added chunks are embedded only once per model.
+        self.embedding_function = self.model_embedding_function
+        if use_embedding_cache:
+            cache = EmbeddingCache(
+                embedding_cache_path or os.path.join(path, EMBEDDING_CACHE_FILENAME)
+            )
+            self.embedding_function = cached_embedding_function(
+                self.model_embedding_function, self.embedding_backend.cache_key, cache
+            )
 
         try:
             self.collection = self.client.get_or_create_collection(
-                name=collection_name,
-                embedding_function=self.sentence_transformer_ef
+                name=collection_name, embedding_function=self.embedding_function
+            )
+            logger.info(
+                f"ChromaDB collection '{collection_name}' loaded/created successfully "
+                f"at path '{path}'."
             )
-            logger.info(f"ChromaDB collection '{collection_name}' loaded/created successfully at path '{path}'.")
         except Exception as e:
-            logger.error(f"Failed to get or create ChromaDB collection: {e}", exc_info=True)
+            logger.error(
+                f"Failed to get or create ChromaDB collection: {e}", exc_info=True
+            )
             raise
+        # Bumped after every change to the collection made through this store; result
+        # caches key on it.
+        self.index_version = 0
+        # BM25 index over the same documents, kept in step with the collection by
+        # add/upsert/delete.
+        self.lexical_index = LexicalIndex()
+        self._load_lexical_index()
+
+    def _load_lexical_index(self, page_size: int = 5000):
+        try:
+            offset = 0
+            while True:
+                page = self.collection.get(
+                    include=["documents"], limit=page_size, offset=offset
+                )
+                if not page["ids"]:
+                    break
+                self.lexical_index.add(
+                    page["ids"], [doc or "" for doc in page["documents"]]
+                )
+                offset += len(page["ids"])
+            logger.info(
+                f"Lexical index built over {len(self.lexical_index)} documents of "
+                f"collection '{self.collection.name}'."
+            )
+        except Exception as e:
+            logger.error(
+                f"Failed to build lexical index from ChromaDB: {e}", exc_info=True
+            )
 
-    def add_documents(self, documents: list[str], metadatas: list[dict], ids: list[str]):
+    def add_documents(
+        self, documents: list[str], metadatas: list[dict], ids: list[str]
+    ):
         if not (len(documents) == len(metadatas) == len(ids)):
             logger.error("Number of documents, metadatas, and ids must be the same.")
-            raise ValueError("Number of documents, metadatas, and ids must be the same.")
+            raise ValueError(
+                "Number of documents, metadatas, and ids must be the same."
+            )
         try:
-            self.collection.add(
-                documents=documents,
-                metadatas=metadatas,
-                ids=ids
+            self.collection.add(documents=documents, metadatas=metadatas, ids=ids)
+            self.lexical_index.add(ids, documents)
+            self.index_version += 1
+            logger.info(
+                f"Added {len(documents)} documents to collection "
+                f"'{self.collection.name}'."
             )
-            logger.info(f"Added {len(documents)} documents to collection '{self.collection.name}'.")
         except Exception as e:
             logger.error(f"Failed to add documents to ChromaDB: {e}", exc_info=True)
             raise
 
+    def upsert_documents(
+        self, documents: list[str], metadatas: list[dict], ids: list[str]
+    ):
+        if not (len(documents) == len(metadatas) == len(ids)):
+            logger.error("Number of documents, metadatas, and ids must be the same.")
+            raise ValueError(
+                "Number of documents, metadatas, and ids must be the same."
+            )
+        try:
+            self.collection.upsert(documents=documents, metadatas=metadatas, ids=ids)
+            self.lexical_index.add(ids, documents)
+            self.index_version += 1
+            logger.info(
+                f"Upserted {len(documents)} documents into collection "
+                f"'{self.collection.name}'."
+            )
+        except Exception as e:
+            logger.error(
+                f"Failed to upsert documents into ChromaDB: {e}", exc_info=True
+            )
+            raise
+
+    def update_metadatas(self, ids: list[str], metadatas: list[dict]):
+        # Metadata-only update; Chroma does not re-embed when no documents are passed.
+        if not ids:
+            return
+        try:
+            self.collection.update(ids=ids, metadatas=metadatas)
+            self.index_version += 1
+            logger.info(
+                f"Updated metadata of {len(ids)} documents in collection "
+                f"'{self.collection.name}'."
+            )
+        except Exception as e:
+            logger.error(
+                f"Failed to update document metadata in ChromaDB: {e}", exc_info=True
+            )
+            raise
+
+    def delete_documents(self, ids: list[str]):
+        if not ids:
+            return
+        try:
+            self.collection.delete(ids=ids)
+            self.lexical_index.remove(ids)
+            self.index_version += 1
+            logger.info(
+                f"Deleted {len(ids)} documents from collection "
+                f"'{self.collection.name}'."
+            )
+        except Exception as e:
+            logger.error(
+                f"Failed to delete documents from ChromaDB: {e}", exc_info=True
+            )
+            raise
+
+    def get_all_ids(self) -> list[str]:
+        try:
+            return self.collection.get(include=[])["ids"]
+        except Exception as e:
+            logger.error(f"Failed to list document ids: {e}", exc_info=True)
+            return []
+
+    def get_documents(self, ids: list[str]) -> dict:
+        # id -> {"document", "metadata"} for the given ids (missing ids are left out).
+        if not ids:
+            return {}
+        try:
+            found = self.collection.get(ids=ids, include=["documents", "metadatas"])
+            return {
+                doc_id: {"document": doc, "metadata": meta}
+                for doc_id, doc, meta in zip(
+                    found["ids"], found["documents"], found["metadatas"]
+                )
+            }
+        except Exception as e:
+            logger.error(f"Failed to fetch documents from ChromaDB: {e}", exc_info=True)
+            return {}
+
+    def lexical_query(
+        self, query_texts: list[str], n_results: int = 3
+    ) -> list[list[tuple]]:
+        return [self.lexical_index.search(text, n_results) for text in query_texts]
+
     def query(self, query_texts: list[str], n_results: int = 3) -> dict:
         try:
             results = self.collection.query(
                 query_texts=query_texts,
                 n_results=n_results,
-                include=['metadatas', 'documents', 'distances']
+                include=["metadatas", "documents", "distances"],
             )
             num_results_found = 0
-            if results and results.get('ids') and results['ids'][0]: # Check if results and first query's ids are not empty
-                num_results_found = len(results['ids'][0])
-            logger.info(f"Query returned {num_results_found} results for '{query_texts[0] if query_texts else ''}'.")
+            if (
+                results and results.get("ids") and results["ids"][0]
+            ):  # Check if results and first query's ids are not empty
+                num_results_found = len(results["ids"][0])
+            if len(query_texts) == 1:
+                logger.info(
+                    f"Query returned {num_results_found} results for "
+                    f"'{query_texts[0]}'."
+                )
+            else:
+                logger.info(
+                    f"Batch query of {len(query_texts)} texts returned up to "
+                    f"{num_results_found} results each."
+                )
             return results if results else {}
         except Exception as e:
             logger.error(f"Failed to query ChromaDB: {e}", exc_info=True)
@@ -59,4 +231,12 @@ class VectorStore:
             return self.collection.count()
         except Exception as e:
             logger.error(f"Failed to get collection count: {e}", exc_info=True)
-            return 0
\ No newline at end of file
+            return 0
+
+    def warm_up(self):
+        self.model_embedding_function.load()
+
+    def embedding_cache_stats(self) -> dict:
+        if self.embedding_function is not self.model_embedding_function:
+            return self.embedding_function.stats()
+        return {}
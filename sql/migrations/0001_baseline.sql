@@ -0,0 +1,227 @@
+-- sql/migrations/0001_baseline.sql
+-- The contents of sql/schema.sql when migrations replaced it. This is not only the original schema:
+-- before that, the file had also gained the task claim/lease columns, the agent_task_events NOTIFY
+-- trigger, the keyset index for GET /api/tasks, task_dependencies with its counting triggers,
+-- task_child_counters and idx_agent_tasks_ready. Every statement is idempotent, so databases created
+-- from any version of that file adopt it as their first migration. It is applied as version 1 in
+-- existing databases, so it is not split up; later schema changes go in new migrations.
+
+CREATE TABLE IF NOT EXISTS agent_tasks (
+    id SERIAL PRIMARY KEY,
+    title TEXT NOT NULL,
+    prompt TEXT NOT NULL,
+    status TEXT CHECK(status IN ('pending','approved','in_progress','done','failed','pending_approval')) NOT NULL DEFAULT 'pending',
+    created_unix INTEGER NOT NULL,
+    assigned_agent TEXT,
+    completed_unix INTEGER,
+    parent_task_id INTEGER REFERENCES agent_tasks(id) ON DELETE SET NULL,
+    dependency_ids TEXT, -- For comma-separated IDs or similar
+    retry_count INTEGER DEFAULT 0 NOT NULL,
+    claimed_by TEXT, -- worker id of the agent runner that last claimed the task
+    claimed_unix INTEGER,
+    lease_expires_unix INTEGER -- in_progress tasks past this time are re-queued by the next claim
+);
+
+-- Upgrade path for databases created before task claiming existed
+ALTER TABLE agent_tasks ADD COLUMN IF NOT EXISTS claimed_by TEXT;
+ALTER TABLE agent_tasks ADD COLUMN IF NOT EXISTS claimed_unix INTEGER;
+ALTER TABLE agent_tasks ADD COLUMN IF NOT EXISTS lease_expires_unix INTEGER;
+
+-- Push notifications for task lifecycle changes: agent runners LISTEN on this channel and wake
+-- as soon as a task is approved instead of waiting for their next poll. The payload is a small
+-- JSON object: {"id", "status", "parent_task_id", "op"}. Delivered on commit.
+CREATE OR REPLACE FUNCTION notify_agent_task_event() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' OR NEW.status IS DISTINCT FROM OLD.status THEN
+        PERFORM pg_notify('agent_task_events', json_build_object(
+            'id', NEW.id, 'status', NEW.status, 'parent_task_id', NEW.parent_task_id, 'op', lower(TG_OP)
+        )::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS agent_tasks_notify ON agent_tasks;
+CREATE TRIGGER agent_tasks_notify
+    AFTER INSERT OR UPDATE OF status ON agent_tasks
+    FOR EACH ROW EXECUTE FUNCTION notify_agent_task_event();
+
+-- Keyset pagination for GET /api/tasks: ORDER BY created_unix DESC, id DESC
+CREATE INDEX IF NOT EXISTS idx_agent_tasks_created_id ON agent_tasks(created_unix DESC, id DESC);
+
+-- Task dependency DAG. An edge (task_id, depends_on_task_id) keeps task_id from being claimed until
+-- depends_on_task_id is 'done'. agent_tasks.pending_dependency_count caches the number of unfinished
+-- dependencies and is maintained incrementally by the triggers below: adding or removing edges
+-- adjusts it per statement, and a dependency entering or leaving 'done' adjusts only its direct
+-- dependents (found through idx_task_dependencies_depends_on), so no readiness rescan is needed.
+-- Writers that add edges must lock the dependency rows FOR SHARE first, otherwise a dependency
+-- completing concurrently would miss the new, not yet committed edges. A deleted dependency no
+-- longer blocks its dependents. agent_tasks.dependency_ids keeps a comma-separated copy for display.
+ALTER TABLE agent_tasks ADD COLUMN IF NOT EXISTS pending_dependency_count INTEGER NOT NULL DEFAULT 0;
+
+CREATE TABLE IF NOT EXISTS task_dependencies (
+    task_id INTEGER NOT NULL REFERENCES agent_tasks(id) ON DELETE CASCADE,
+    depends_on_task_id INTEGER NOT NULL REFERENCES agent_tasks(id) ON DELETE CASCADE,
+    PRIMARY KEY (task_id, depends_on_task_id),
+    CHECK (task_id <> depends_on_task_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_task_dependencies_depends_on ON task_dependencies(depends_on_task_id);
+
+CREATE OR REPLACE FUNCTION task_dependencies_added() RETURNS trigger AS $$
+BEGIN
+    UPDATE agent_tasks t SET pending_dependency_count = t.pending_dependency_count + n.cnt
+    FROM (
+        SELECT e.task_id, count(*) AS cnt
+        FROM new_edges e JOIN agent_tasks d ON d.id = e.depends_on_task_id
+        WHERE d.status <> 'done'
+        GROUP BY e.task_id
+    ) n
+    WHERE t.id = n.task_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION task_dependencies_removed() RETURNS trigger AS $$
+BEGIN
+    UPDATE agent_tasks t SET pending_dependency_count = greatest(t.pending_dependency_count - n.cnt, 0)
+    FROM (
+        SELECT e.task_id, count(*) AS cnt
+        FROM old_edges e LEFT JOIN agent_tasks d ON d.id = e.depends_on_task_id
+        WHERE d.status IS DISTINCT FROM 'done'
+        GROUP BY e.task_id
+    ) n
+    WHERE t.id = n.task_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION task_dependency_status_changed() RETURNS trigger AS $$
+BEGIN
+    UPDATE agent_tasks t
+    SET pending_dependency_count = greatest(t.pending_dependency_count + CASE WHEN NEW.status = 'done' THEN -1 ELSE 1 END, 0)
+    FROM task_dependencies e
+    WHERE e.depends_on_task_id = NEW.id AND t.id = e.task_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS task_dependencies_added ON task_dependencies;
+CREATE TRIGGER task_dependencies_added
+    AFTER INSERT ON task_dependencies
+    REFERENCING NEW TABLE AS new_edges
+    FOR EACH STATEMENT EXECUTE FUNCTION task_dependencies_added();
+
+DROP TRIGGER IF EXISTS task_dependencies_removed ON task_dependencies;
+CREATE TRIGGER task_dependencies_removed
+    AFTER DELETE ON task_dependencies
+    REFERENCING OLD TABLE AS old_edges
+    FOR EACH STATEMENT EXECUTE FUNCTION task_dependencies_removed();
+
+DROP TRIGGER IF EXISTS agent_tasks_dependency_status ON agent_tasks;
+CREATE TRIGGER agent_tasks_dependency_status
+    AFTER UPDATE OF status ON agent_tasks
+    FOR EACH ROW WHEN ((OLD.status = 'done') IS DISTINCT FROM (NEW.status = 'done'))
+    EXECUTE FUNCTION task_dependency_status_changed();
+
+-- Upgrade path: edges for tasks that only have the legacy comma-separated dependency_ids.
+INSERT INTO task_dependencies (task_id, depends_on_task_id)
+SELECT t.id, trim(dep.id)::integer
+FROM agent_tasks t
+CROSS JOIN LATERAL unnest(string_to_array(t.dependency_ids, ',')) AS dep(id)
+WHERE t.dependency_ids IS NOT NULL AND trim(dep.id) ~ '^[0-9]+$' AND trim(dep.id)::integer <> t.id
+  AND EXISTS (SELECT 1 FROM agent_tasks d WHERE d.id = trim(dep.id)::integer)
+ON CONFLICT DO NOTHING;
+
+-- Per-parent child counts by status, so progress and completion of a parent's subtasks are O(1)
+-- reads. Maintained in the same transaction as every child insert, delete, status change or
+-- re-parenting by statement-level triggers that aggregate per (parent, status) first, so a bulk
+-- insert of N children touches each counter row once. Rows with a count of 0 may remain.
+CREATE INDEX IF NOT EXISTS idx_agent_tasks_parent ON agent_tasks(parent_task_id, id) WHERE parent_task_id IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS task_child_counters (
+    parent_task_id INTEGER NOT NULL REFERENCES agent_tasks(id) ON DELETE CASCADE,
+    status TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (parent_task_id, status)
+);
+
+CREATE OR REPLACE FUNCTION apply_task_child_deltas(parents INTEGER[], statuses TEXT[], deltas INTEGER[]) RETURNS void AS $$
+    INSERT INTO task_child_counters AS c (parent_task_id, status, count)
+    SELECT d.parent_task_id, d.status, sum(d.n)
+    FROM unnest(parents, statuses, deltas) AS d(parent_task_id, status, n)
+    WHERE EXISTS (SELECT 1 FROM agent_tasks p WHERE p.id = d.parent_task_id)
+    GROUP BY d.parent_task_id, d.status
+    HAVING sum(d.n) <> 0
+    ORDER BY d.parent_task_id, d.status
+    ON CONFLICT (parent_task_id, status) DO UPDATE SET count = c.count + EXCLUDED.count;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION maintain_task_child_counters() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM apply_task_child_deltas(array_agg(parent_task_id), array_agg(status), array_agg(1))
+        FROM new_rows WHERE parent_task_id IS NOT NULL;
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM apply_task_child_deltas(array_agg(parent_task_id), array_agg(status), array_agg(-1))
+        FROM old_rows WHERE parent_task_id IS NOT NULL;
+    ELSE
+        PERFORM apply_task_child_deltas(array_agg(d.parent_task_id), array_agg(d.status), array_agg(d.n))
+        FROM (
+            SELECT n.parent_task_id, n.status, 1 AS n
+            FROM new_rows n JOIN old_rows o ON o.id = n.id
+            WHERE (n.status, n.parent_task_id) IS DISTINCT FROM (o.status, o.parent_task_id) AND n.parent_task_id IS NOT NULL
+            UNION ALL
+            SELECT o.parent_task_id, o.status, -1
+            FROM new_rows n JOIN old_rows o ON o.id = n.id
+            WHERE (n.status, n.parent_task_id) IS DISTINCT FROM (o.status, o.parent_task_id) AND o.parent_task_id IS NOT NULL
+        ) d;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS agent_tasks_child_counters_insert ON agent_tasks;
+CREATE TRIGGER agent_tasks_child_counters_insert
+    AFTER INSERT ON agent_tasks REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_task_child_counters();
+
+DROP TRIGGER IF EXISTS agent_tasks_child_counters_update ON agent_tasks;
+CREATE TRIGGER agent_tasks_child_counters_update
+    AFTER UPDATE ON agent_tasks REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_task_child_counters();
+
+DROP TRIGGER IF EXISTS agent_tasks_child_counters_delete ON agent_tasks;
+CREATE TRIGGER agent_tasks_child_counters_delete
+    AFTER DELETE ON agent_tasks REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_task_child_counters();
+
+-- Upgrade path: counters for children that existed before the table did.
+INSERT INTO task_child_counters (parent_task_id, status, count)
+SELECT parent_task_id, status, count(*) FROM agent_tasks
+WHERE parent_task_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM task_child_counters)
+GROUP BY parent_task_id, status;
+
+-- Task claiming (scripts/agent_runner.py): oldest approved task with no unfinished dependencies.
+CREATE INDEX IF NOT EXISTS idx_agent_tasks_ready ON agent_tasks(created_unix, id)
+    WHERE status = 'approved' AND pending_dependency_count = 0;
+
+CREATE TABLE IF NOT EXISTS task_logs (
+    id SERIAL PRIMARY KEY,
+    task_id INTEGER NOT NULL REFERENCES agent_tasks(id) ON DELETE CASCADE,
+    timestamp INTEGER NOT NULL,
+    level TEXT CHECK(level IN ('INFO', 'WARNING', 'ERROR', 'DEBUG')) NOT NULL DEFAULT 'INFO',
+    message TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_task_logs_task_id ON task_logs(task_id);
+CREATE INDEX IF NOT EXISTS idx_task_logs_timestamp ON task_logs(timestamp);
+
+CREATE TABLE IF NOT EXISTS registry_services (
+    id SERIAL PRIMARY KEY,
+    service_name TEXT NOT NULL UNIQUE,
+    description TEXT,
+    host TEXT DEFAULT 'localhost',
+    port INTEGER NOT NULL UNIQUE,
+    registered_unix INTEGER NOT NULL
+);
@@ -0,0 +1,23 @@
+-- sql/migrations/0002_access_path_indexes.sql
+-- Indexes for the remaining hot agent_tasks / task_logs predicates. The baseline already covers
+-- claiming (idx_agent_tasks_ready), subtasks_status (idx_agent_tasks_parent) and the unfiltered
+-- task list (idx_agent_tasks_created_id); benchmarks/bench_query_plans.py checks all of them.
+
+-- GET /api/tasks?status=...: the filter column first, then the keyset order.
+CREATE INDEX IF NOT EXISTS idx_agent_tasks_status_created ON agent_tasks(status, created_unix DESC, id DESC);
+
+-- GET /api/tasks?assigned_agent=...; most tasks have no agent, so those rows are left out.
+CREATE INDEX IF NOT EXISTS idx_agent_tasks_agent_created ON agent_tasks(assigned_agent, created_unix DESC, id DESC)
+    WHERE assigned_agent IS NOT NULL;
+
+-- GET /api/tasks?parent_task_id=...: children of a parent in keyset order.
+CREATE INDEX IF NOT EXISTS idx_agent_tasks_parent_created ON agent_tasks(parent_task_id, created_unix DESC, id DESC)
+    WHERE parent_task_id IS NOT NULL;
+
+-- Lease expiry sweep in claim_tasks: only in_progress rows can have a live lease.
+CREATE INDEX IF NOT EXISTS idx_agent_tasks_lease ON agent_tasks(lease_expires_unix) WHERE status = 'in_progress';
+
+-- GET /api/tasks/{id}/logs filters on task_id and orders by timestamp; the composite index serves
+-- both and makes the single-column task_id index redundant.
+CREATE INDEX IF NOT EXISTS idx_task_logs_task_timestamp ON task_logs(task_id, timestamp, id);
+DROP INDEX IF EXISTS idx_task_logs_task_id;
@@ -0,0 +1,22 @@
+-- sql/migrations/0003_task_log_tail.sql
+-- Support for following a task's logs: GET /api/tasks/{id}/logs/tail and /logs/events read
+-- "entries of this task after id N", and wake on a notification instead of polling.
+
+-- The tail cursor: WHERE task_id = ? AND id > ? ORDER BY id.
+CREATE INDEX IF NOT EXISTS idx_task_logs_task_id_id ON task_logs(task_id, id);
+
+-- One notification per insert statement and task (not per row), so a COPY of thousands of
+-- entries costs one NOTIFY. Payload: {"task_id", "last_id", "count"}. Delivered on commit.
+CREATE OR REPLACE FUNCTION notify_task_log_events() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('task_log_events', json_build_object('task_id', task_id, 'last_id', last_id, 'count', n)::text)
+    FROM (SELECT task_id, max(id) AS last_id, count(*) AS n FROM new_logs GROUP BY task_id) AS batch;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS task_logs_notify ON task_logs;
+CREATE TRIGGER task_logs_notify
+    AFTER INSERT ON task_logs
+    REFERENCING NEW TABLE AS new_logs
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_task_log_events();
@@ -0,0 +1,82 @@
+-- sql/migrations/0004_partition_task_logs.sql
+-- task_logs becomes range-partitioned by timestamp, so old logs leave by dropping (or detaching)
+-- whole partitions instead of row deletes. ui/dispatcher/log_partitions.py creates partitions
+-- ahead of time and applies the retention policy. Rows outside every range partition, e.g. from
+-- agent-supplied timestamps or logs written before this migration, land in task_logs_default.
+--
+-- Also dropped here:
+--   * the ON DELETE CASCADE foreign key to agent_tasks, which turned deleting a task into a delete
+--     across every partition; logs of deleted tasks now age out with their partition;
+--   * the primary key (it would have to include timestamp) and the timestamp-only index, leaving
+--     two indexes to maintain per inserted row. ids stay unique through the sequence.
+
+ALTER TABLE task_logs RENAME TO task_logs_unpartitioned;
+ALTER TABLE task_logs_unpartitioned RENAME CONSTRAINT task_logs_pkey TO task_logs_unpartitioned_pkey;
+DROP INDEX IF EXISTS idx_task_logs_timestamp;
+DROP INDEX IF EXISTS idx_task_logs_task_timestamp;
+DROP INDEX IF EXISTS idx_task_logs_task_id_id;
+DROP TRIGGER IF EXISTS task_logs_notify ON task_logs_unpartitioned;
+ALTER SEQUENCE task_logs_id_seq OWNED BY NONE;
+
+CREATE TABLE task_logs (
+    id BIGINT NOT NULL DEFAULT nextval('task_logs_id_seq'),
+    task_id INTEGER NOT NULL,
+    timestamp INTEGER NOT NULL,
+    level TEXT CHECK(level IN ('INFO', 'WARNING', 'ERROR', 'DEBUG')) NOT NULL DEFAULT 'INFO',
+    message TEXT NOT NULL
+) PARTITION BY RANGE (timestamp);
+
+CREATE TABLE task_logs_default PARTITION OF task_logs DEFAULT;
+-- Only the default partition needs this: creating a partition moves its range out of the default,
+-- and retention deletes expired rows from it.
+CREATE INDEX idx_task_logs_default_timestamp ON task_logs_default(timestamp);
+
+INSERT INTO task_logs (id, task_id, timestamp, level, message)
+SELECT id, task_id, timestamp, level, message FROM task_logs_unpartitioned;
+DROP TABLE task_logs_unpartitioned;
+
+ALTER SEQUENCE task_logs_id_seq AS BIGINT OWNED BY task_logs.id;
+
+-- Created on the parent, so every partition gets them: GET /logs ordered by timestamp, and the
+-- since_id cursor of /logs/tail and /logs/events.
+CREATE INDEX idx_task_logs_task_timestamp ON task_logs(task_id, timestamp, id);
+CREATE INDEX idx_task_logs_task_id_id ON task_logs(task_id, id);
+
+-- The timestamp range each task's logs span. Per-task log reads bound timestamp with it, so only the
+-- partitions that hold that task's logs are scanned. Maintained per insert statement, not per row.
+CREATE TABLE IF NOT EXISTS task_log_spans (
+    task_id INTEGER PRIMARY KEY REFERENCES agent_tasks(id) ON DELETE CASCADE,
+    min_unix INTEGER NOT NULL,
+    max_unix INTEGER NOT NULL
+);
+
+INSERT INTO task_log_spans (task_id, min_unix, max_unix)
+SELECT l.task_id, min(l.timestamp), max(l.timestamp)
+FROM task_logs l JOIN agent_tasks t ON t.id = l.task_id
+GROUP BY l.task_id
+ON CONFLICT (task_id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION track_task_log_spans() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO task_log_spans (task_id, min_unix, max_unix)
+    SELECT n.task_id, min(n.timestamp), max(n.timestamp)
+    FROM new_logs n JOIN agent_tasks t ON t.id = n.task_id
+    GROUP BY n.task_id
+    ON CONFLICT (task_id) DO UPDATE
+        SET min_unix = LEAST(task_log_spans.min_unix, EXCLUDED.min_unix),
+            max_unix = GREATEST(task_log_spans.max_unix, EXCLUDED.max_unix)
+        WHERE EXCLUDED.min_unix < task_log_spans.min_unix OR EXCLUDED.max_unix > task_log_spans.max_unix;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER task_logs_spans
+    AFTER INSERT ON task_logs
+    REFERENCING NEW TABLE AS new_logs
+    FOR EACH STATEMENT EXECUTE FUNCTION track_task_log_spans();
+
+-- Same notification as before (0003), now on the partitioned table.
+CREATE TRIGGER task_logs_notify
+    AFTER INSERT ON task_logs
+    REFERENCING NEW TABLE AS new_logs
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_task_log_events();
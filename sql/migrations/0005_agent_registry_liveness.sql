@@ -0,0 +1,33 @@
+-- sql/migrations/0005_agent_registry_liveness.sql
+-- Heartbeat-based agent status and change notifications for the in-memory registry
+-- (core/a2a/registry.py). Agents POST /api/agents/{name}/heartbeat with their status (idle/busy);
+-- an agent whose last heartbeat is older than AGENT_HEARTBEAT_TIMEOUT is reported offline.
+
+ALTER TABLE registry_services ADD COLUMN IF NOT EXISTS last_heartbeat_unix INTEGER;
+ALTER TABLE registry_services ADD COLUMN IF NOT EXISTS reported_status TEXT NOT NULL DEFAULT 'idle'
+    CHECK (reported_status IN ('idle', 'busy'));
+
+-- Every registry change is published so each dispatcher updates its cached copy. A heartbeat
+-- carries its new values in the payload and is applied without a query; any other change only
+-- names the row, which is then re-read (descriptions can exceed the NOTIFY payload limit).
+CREATE OR REPLACE FUNCTION notify_agent_registry_event() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('agent_registry_events', json_build_object('op', 'delete', 'id', OLD.id)::text);
+    ELSIF TG_OP = 'UPDATE'
+          AND (NEW.service_name, NEW.description, NEW.host, NEW.port, NEW.registered_unix)
+              IS NOT DISTINCT FROM (OLD.service_name, OLD.description, OLD.host, OLD.port, OLD.registered_unix) THEN
+        PERFORM pg_notify('agent_registry_events', json_build_object(
+            'op', 'heartbeat', 'id', NEW.id, 'last_heartbeat_unix', NEW.last_heartbeat_unix, 'reported_status', NEW.reported_status
+        )::text);
+    ELSE
+        PERFORM pg_notify('agent_registry_events', json_build_object('op', lower(TG_OP), 'id', NEW.id)::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS registry_services_notify ON registry_services;
+CREATE TRIGGER registry_services_notify
+    AFTER INSERT OR UPDATE OR DELETE ON registry_services
+    FOR EACH ROW EXECUTE FUNCTION notify_agent_registry_event();
@@ -0,0 +1,123 @@
+-- sql/migrations/0006_agent_load_routing.sql
+-- Inputs for routing subtasks dispatched without an assigned_agent (core/a2a/router.py):
+-- capability tags per agent, and per-agent load kept current by triggers on agent_tasks.
+
+ALTER TABLE registry_services ADD COLUMN IF NOT EXISTS capabilities TEXT[] NOT NULL DEFAULT '{}';
+
+-- As in 0005, but a change of capabilities is a full update, not a heartbeat.
+CREATE OR REPLACE FUNCTION notify_agent_registry_event() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('agent_registry_events', json_build_object('op', 'delete', 'id', OLD.id)::text);
+    ELSIF TG_OP = 'UPDATE'
+          AND (NEW.service_name, NEW.description, NEW.host, NEW.port, NEW.registered_unix, NEW.capabilities)
+              IS NOT DISTINCT FROM (OLD.service_name, OLD.description, OLD.host, OLD.port, OLD.registered_unix, OLD.capabilities) THEN
+        PERFORM pg_notify('agent_registry_events', json_build_object(
+            'op', 'heartbeat', 'id', NEW.id, 'last_heartbeat_unix', NEW.last_heartbeat_unix, 'reported_status', NEW.reported_status
+        )::text);
+    ELSE
+        PERFORM pg_notify('agent_registry_events', json_build_object('op', lower(TG_OP), 'id', NEW.id)::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Load per assigned_agent: tasks waiting (pending/approved), tasks running (in_progress), and an
+-- exponentially weighted average of claim-to-completion time over the tasks it finished. Keyed by
+-- name rather than registry id, since assigned_agent is free text and may name unregistered agents.
+CREATE TABLE IF NOT EXISTS agent_load (
+    agent TEXT PRIMARY KEY,
+    queued INTEGER NOT NULL DEFAULT 0,
+    in_flight INTEGER NOT NULL DEFAULT 0,
+    completed INTEGER NOT NULL DEFAULT 0,
+    latency_ewma REAL
+);
+
+-- Applies per-task deltas aggregated per agent (one row update per agent and statement, in agent
+-- order so concurrent statements lock rows in the same order) and publishes each agent's new
+-- totals on agent_load_events. A statement finishing several tasks of one agent contributes their
+-- average latency as a single sample.
+CREATE OR REPLACE FUNCTION apply_agent_load_deltas(agents TEXT[], queued_deltas INTEGER[], in_flight_deltas INTEGER[], latencies REAL[])
+RETURNS void AS $$
+DECLARE
+    changed agent_load;
+BEGIN
+    FOR changed IN
+        WITH d AS (
+            SELECT agent, sum(q)::int AS q, sum(f)::int AS f, count(l)::int AS c, avg(l)::real AS l
+            FROM unnest(agents, queued_deltas, in_flight_deltas, latencies) AS d(agent, q, f, l)
+            WHERE agent IS NOT NULL
+            GROUP BY agent
+            HAVING sum(q) <> 0 OR sum(f) <> 0 OR count(l) > 0
+            ORDER BY agent
+        )
+        INSERT INTO agent_load AS a (agent, queued, in_flight, completed, latency_ewma)
+        SELECT agent, q, f, c, l FROM d
+        ON CONFLICT (agent) DO UPDATE SET
+            queued = a.queued + EXCLUDED.queued,
+            in_flight = a.in_flight + EXCLUDED.in_flight,
+            completed = a.completed + EXCLUDED.completed,
+            latency_ewma = CASE WHEN EXCLUDED.latency_ewma IS NULL THEN a.latency_ewma
+                                WHEN a.latency_ewma IS NULL THEN EXCLUDED.latency_ewma
+                                ELSE 0.8 * a.latency_ewma + 0.2 * EXCLUDED.latency_ewma END
+        RETURNING a.*
+    LOOP
+        PERFORM pg_notify('agent_load_events', json_build_object(
+            'agent', changed.agent, 'queued', changed.queued, 'in_flight', changed.in_flight,
+            'completed', changed.completed, 'latency_ewma', changed.latency_ewma
+        )::text);
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION maintain_agent_load() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM apply_agent_load_deltas(
+            array_agg(assigned_agent), array_agg((status IN ('pending', 'approved'))::int),
+            array_agg((status = 'in_progress')::int), array_agg(NULL::real))
+        FROM new_rows WHERE assigned_agent IS NOT NULL;
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM apply_agent_load_deltas(
+            array_agg(assigned_agent), array_agg(-(status IN ('pending', 'approved'))::int),
+            array_agg(-(status = 'in_progress')::int), array_agg(NULL::real))
+        FROM old_rows WHERE assigned_agent IS NOT NULL;
+    ELSE
+        PERFORM apply_agent_load_deltas(array_agg(d.agent), array_agg(d.q), array_agg(d.f), array_agg(d.l))
+        FROM (
+            SELECT n.assigned_agent AS agent, (n.status IN ('pending', 'approved'))::int AS q, (n.status = 'in_progress')::int AS f,
+                   CASE WHEN n.status = 'done' AND o.status <> 'done' AND n.completed_unix IS NOT NULL AND n.claimed_unix IS NOT NULL
+                        THEN GREATEST(n.completed_unix - n.claimed_unix, 0)::real END AS l
+            FROM new_rows n JOIN old_rows o ON o.id = n.id
+            WHERE (n.status, n.assigned_agent) IS DISTINCT FROM (o.status, o.assigned_agent) AND n.assigned_agent IS NOT NULL
+            UNION ALL
+            SELECT o.assigned_agent, -(o.status IN ('pending', 'approved'))::int, -(o.status = 'in_progress')::int, NULL
+            FROM new_rows n JOIN old_rows o ON o.id = n.id
+            WHERE (n.status, n.assigned_agent) IS DISTINCT FROM (o.status, o.assigned_agent) AND o.assigned_agent IS NOT NULL
+        ) d;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS agent_tasks_agent_load_insert ON agent_tasks;
+CREATE TRIGGER agent_tasks_agent_load_insert
+    AFTER INSERT ON agent_tasks REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_agent_load();
+
+DROP TRIGGER IF EXISTS agent_tasks_agent_load_update ON agent_tasks;
+CREATE TRIGGER agent_tasks_agent_load_update
+    AFTER UPDATE ON agent_tasks REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_agent_load();
+
+DROP TRIGGER IF EXISTS agent_tasks_agent_load_delete ON agent_tasks;
+CREATE TRIGGER agent_tasks_agent_load_delete
+    AFTER DELETE ON agent_tasks REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_agent_load();
+
+-- Load of tasks assigned before this migration.
+INSERT INTO agent_load (agent, queued, in_flight)
+SELECT assigned_agent, count(*) FILTER (WHERE status IN ('pending', 'approved')), count(*) FILTER (WHERE status = 'in_progress')
+FROM agent_tasks WHERE assigned_agent IS NOT NULL
+GROUP BY assigned_agent
+ON CONFLICT (agent) DO NOTHING;
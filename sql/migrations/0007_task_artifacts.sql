@@ -0,0 +1,30 @@
+-- sql/migrations/0007_task_artifacts.sql
+-- Plans, reports and log bundles of a task, stored in the database instead of as files under
+-- docs/plans (see core/artifacts.py). Contents are content-addressed: identical artifacts share one
+-- blob, keyed by the sha256 of the uncompressed bytes.
+
+CREATE TABLE IF NOT EXISTS artifact_blobs (
+    sha256 TEXT PRIMARY KEY, -- hex digest of the uncompressed content; also the ETag
+    encoding TEXT NOT NULL CHECK (encoding IN ('identity', 'gzip')),
+    size_bytes BIGINT NOT NULL, -- uncompressed
+    content BYTEA NOT NULL,
+    created_unix INTEGER NOT NULL,
+    referenced_unix INTEGER NOT NULL -- last time an artifact was stored with this content
+);
+-- Already compressed when worth it: keep TOAST from compressing again, and let substring() read
+-- only the chunks a streamed range needs.
+ALTER TABLE artifact_blobs ALTER COLUMN content SET STORAGE EXTERNAL;
+
+CREATE TABLE IF NOT EXISTS task_artifacts (
+    task_id INTEGER NOT NULL REFERENCES agent_tasks(id) ON DELETE CASCADE,
+    kind TEXT NOT NULL CHECK (kind IN ('plan', 'report', 'logs')),
+    sha256 TEXT NOT NULL REFERENCES artifact_blobs(sha256),
+    content_type TEXT NOT NULL,
+    filename TEXT,
+    created_unix INTEGER NOT NULL,
+    updated_unix INTEGER NOT NULL,
+    PRIMARY KEY (task_id, kind)
+);
+-- Blobs no artifact references any more (replaced or deleted with their task) are removed by the
+-- dispatcher's orphan collection, which probes this index.
+CREATE INDEX IF NOT EXISTS idx_task_artifacts_sha256 ON task_artifacts (sha256);
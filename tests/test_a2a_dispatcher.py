@@ -0,0 +1,319 @@
+import json
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from core.a2a.dispatcher import A2ADispatcher, A2ADispatchError
+from core.a2a.async_dispatcher import AsyncA2ADispatcher
+from core.a2a.subtask_tracker import DependencyCycleError
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    # Every path fails with 503 the first `failures` times, then answers 200 with a JSON
+    # body.
+    failures = 2
+    calls = []
+
+    def _respond(self):
+        FlakyHandler.calls.append((self.command, self.path))
+        if len(FlakyHandler.calls) <= FlakyHandler.failures:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        body = json.dumps(
+            [{"id": 1, "status": "pending"}] if self.command == "GET" else {"id": 7}
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _respond
+    do_POST = _respond
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def flaky_server():
+    FlakyHandler.calls = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/api"
+    server.shutdown()
+    server.server_close()
+
+
+def test_sync_get_is_retried_with_backoff(flaky_server):
+    with A2ADispatcher(
+        flaky_server, max_retries=3, backoff_factor=0.01, backoff_jitter=0
+    ) as client:
+        assert client.get_subtasks_statuses(1) == [{"id": 1, "status": "pending"}]
+    assert len(FlakyHandler.calls) == 3
+
+
+def test_sync_post_is_not_retried_and_raises(flaky_server):
+    with A2ADispatcher(
+        flaky_server, max_retries=3, backoff_factor=0.01, backoff_jitter=0
+    ) as client:
+        with pytest.raises(A2ADispatchError) as excinfo:
+            client.dispatch_subtask_to_agent(1, "t", "p")
+    assert excinfo.value.status_code == 503
+    assert len(FlakyHandler.calls) == 1
+
+
+def make_transport(handler):
+    return httpx.MockTransport(handler)
+
+
+def test_async_get_retried_post_not():
+    attempts = {"GET": 0, "POST": 0}
+
+    def handler(request):
+        attempts[request.method] += 1
+        if attempts[request.method] < 3:
+            return httpx.Response(503)
+        return httpx.Response(200, json=[] if request.method == "GET" else {"id": 1})
+
+    async def run():
+        async with AsyncA2ADispatcher(
+            "http://dispatcher/api",
+            backoff_factor=0.001,
+            transport=make_transport(handler),
+        ) as client:
+            assert await client.get_subtasks_statuses(1) == []
+            with pytest.raises(A2ADispatchError):
+                await client.dispatch_subtask_to_agent(1, "t", "p")
+
+    asyncio.run(run())
+    assert attempts == {"GET": 3, "POST": 1}
+
+
+def test_async_connect_errors_are_retried_for_post():
+    attempts = []
+
+    def handler(request):
+        attempts.append(request.url.path)
+        if len(attempts) == 1:
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(201, json={"id": 5})
+
+    async def run():
+        async with AsyncA2ADispatcher(
+            "http://dispatcher/api",
+            backoff_factor=0.001,
+            transport=make_transport(handler),
+        ) as client:
+            return await client.dispatch_subtask_to_agent(1, "t", "p")
+
+    assert asyncio.run(run()) == {"id": 5}
+    assert attempts == ["/api/tasks/1/subtasks"] * 2
+
+
+def test_async_fan_out_respects_concurrency_and_keeps_order():
+    in_flight = {"now": 0, "max": 0}
+
+    async def handler(request):
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(0.005)
+        in_flight["now"] -= 1
+        title = json.loads(request.content)["title"]
+        if title == "bad":
+            return httpx.Response(400, json={"detail": "bad subtask"})
+        return httpx.Response(201, json={"title": title})
+
+    subtasks = [{"title": f"s{i}", "prompt": "p"} for i in range(40)]
+    subtasks[10]["title"] = "bad"
+
+    async def run():
+        async with AsyncA2ADispatcher(
+            "http://dispatcher/api",
+            max_concurrency=8,
+            transport=make_transport(handler),
+        ) as client:
+            return await client.dispatch_subtasks(1, subtasks)
+
+    results = asyncio.run(run())
+    assert in_flight["max"] <= 8
+    assert isinstance(results[10], A2ADispatchError) and results[10].status_code == 400
+    assert [r["title"] for i, r in enumerate(results) if i != 10] == [
+        s["title"] for i, s in enumerate(subtasks) if i != 10
+    ]
+
+
+def test_bulk_dispatch_sends_batches_and_keeps_order():
+    requests_seen = []
+
+    def handler(request):
+        batch = json.loads(request.content)["subtasks"]
+        requests_seen.append((request.url.path, len(batch)))
+        return httpx.Response(
+            201,
+            json=[
+                {"id": len(requests_seen) * 100 + i, "title": s["title"]}
+                for i, s in enumerate(batch)
+            ],
+        )
+
+    subtasks = [{"title": f"s{i}", "prompt": "p"} for i in range(25)]
+
+    async def run():
+        async with AsyncA2ADispatcher(
+            "http://dispatcher/api", transport=make_transport(handler)
+        ) as client:
+            return await client.dispatch_subtasks_bulk(3, subtasks, batch_size=10)
+
+    created = asyncio.run(run())
+    assert requests_seen == [
+        ("/api/tasks/3/subtasks/bulk", 10),
+        ("/api/tasks/3/subtasks/bulk", 10),
+        ("/api/tasks/3/subtasks/bulk", 5),
+    ]
+    assert [c["title"] for c in created] == [s["title"] for s in subtasks]
+
+
+def test_bulk_dispatch_resolves_refs_across_batches():
+    sent = []
+
+    def handler(request):
+        batch = json.loads(request.content)["subtasks"]
+        sent.append(batch)
+        start = sum(len(b) for b in sent[:-1])
+        return httpx.Response(
+            201,
+            json=[
+                {"id": 100 + start + i, "title": s["title"]}
+                for i, s in enumerate(batch)
+            ],
+        )
+
+    subtasks = [
+        {
+            "title": "report",
+            "prompt": "p",
+            "ref": "report",
+            "depends_on_refs": ["fetch", "parse"],
+        },
+        {"title": "parse", "prompt": "p", "ref": "parse", "depends_on_refs": ["fetch"]},
+        {"title": "fetch", "prompt": "p", "ref": "fetch", "depends_on": [7]},
+    ]
+
+    async def run():
+        async with AsyncA2ADispatcher(
+            "http://dispatcher/api", transport=make_transport(handler)
+        ) as client:
+            return await client.dispatch_subtasks_bulk(3, subtasks, batch_size=2)
+
+    created = asyncio.run(run())
+    assert [c["title"] for c in created] == ["report", "parse", "fetch"]
+    assert [s["title"] for s in sent[0]] == ["fetch", "parse"]
+    assert sent[0][1]["depends_on_refs"] == ["fetch"]
+    assert (
+        sent[1][0]["depends_on"] == [100, 101] and sent[1][0]["depends_on_refs"] == []
+    )
+
+
+def test_backoff_settings_reach_the_session_retry_policy():
+    with A2ADispatcher(
+        "http://dispatcher/api", max_retries=5, backoff_factor=0.2, backoff_jitter=0.1
+    ) as client:
+        retry = client.session.get_adapter("http://dispatcher/api").max_retries
+    assert (retry.total, retry.backoff_factor, retry.backoff_jitter) == (5, 0.2, 0.1)
+
+
+def test_bulk_dispatch_rejects_cycles_before_sending():
+    subtasks = [
+        {"title": "a", "prompt": "p", "ref": "a", "depends_on_refs": ["b"]},
+        {"title": "b", "prompt": "p", "ref": "b", "depends_on_refs": ["a"]},
+    ]
+    with A2ADispatcher("http://dispatcher/api") as client:
+        with pytest.raises(DependencyCycleError):
+            client.dispatch_subtasks_bulk(
+                1, subtasks
+            )  # no server is listening, so this must fail before any request
+
+
+def test_log_append_and_tail_requests():
+    seen = []
+
+    def handler(request):
+        seen.append(
+            (
+                request.method,
+                request.url.path,
+                dict(request.url.params),
+                json.loads(request.content) if request.content else None,
+            )
+        )
+        if request.method == "POST":
+            return httpx.Response(
+                201, json={"task_id": 4, "accepted": 2, "last_id": 12}
+            )
+        return httpx.Response(
+            200, json={"task_id": 4, "entries": [], "next_since_id": 12}
+        )
+
+    async def run():
+        async with AsyncA2ADispatcher(
+            "http://dispatcher/api", transport=make_transport(handler)
+        ) as client:
+            await client.append_task_logs(
+                4, [{"message": "a"}, {"message": "b", "level": "ERROR"}]
+            )
+            return await client.tail_task_logs(4, since_id=12, wait_seconds=5)
+
+    assert asyncio.run(run())["next_since_id"] == 12
+    assert seen[0] == (
+        "POST",
+        "/api/tasks/4/logs",
+        {},
+        {"entries": [{"message": "a"}, {"message": "b", "level": "ERROR"}]},
+    )
+    assert seen[1][:3] == (
+        "GET",
+        "/api/tasks/4/logs/tail",
+        {"since_id": "12", "wait": "5"},
+    )
+
+
+def test_agent_lookup_returns_none_for_a_free_port_and_heartbeat_sends_status():
+    seen = []
+
+    def handler(request):
+        seen.append(
+            (
+                request.method,
+                request.url.path,
+                dict(request.url.params),
+                json.loads(request.content) if request.content else None,
+            )
+        )
+        if request.url.path.endswith("/lookup"):
+            return httpx.Response(
+                404, json={"detail": "No agent registered with port 9000."}
+            )
+        return httpx.Response(200, json={"name": "planner", "status": "busy"})
+
+    async def run():
+        async with AsyncA2ADispatcher(
+            "http://dispatcher/api", transport=make_transport(handler)
+        ) as client:
+            return await client.lookup_agent(port=9000), await client.send_heartbeat(
+                "planner", "busy"
+            )
+
+    free, beat = asyncio.run(run())
+    assert free is None and beat["status"] == "busy"
+    assert seen == [
+        ("GET", "/api/agents/lookup", {"port": "9000"}, None),
+        ("POST", "/api/agents/planner/heartbeat", {}, {"status": "busy"}),
+    ]
@@ -0,0 +1,87 @@
+import asyncio
+
+from core.a2a.registry import (
+    AgentRecord,
+    AgentRegistry,
+    RegistryIndex,
+    AGENT_HEARTBEAT_WRITE_INTERVAL,
+)
+
+
+def record(
+    agent_id,
+    name,
+    port,
+    registered_unix=1000,
+    last_heartbeat_unix=None,
+    reported_status="idle",
+):
+    return AgentRecord(
+        agent_id,
+        name,
+        None,
+        "localhost",
+        port,
+        registered_unix,
+        last_heartbeat_unix,
+        reported_status,
+    )
+
+
+def test_status_follows_heartbeats_and_goes_offline_when_they_stop():
+    assert record(1, "a", 8001).status(now=2000, heartbeat_timeout=30) == "offline"
+    busy = record(1, "a", 8001, last_heartbeat_unix=1990, reported_status="busy")
+    assert busy.status(now=2000, heartbeat_timeout=30) == "busy"
+    assert busy.status(now=2021, heartbeat_timeout=30) == "offline"
+
+
+def test_index_lookups_follow_upserts_heartbeats_and_removals():
+    index = RegistryIndex(
+        [
+            record(1, "planner", 8001, registered_unix=1000),
+            record(2, "coder", 8002, registered_unix=2000),
+        ]
+    )
+    assert [r.name for r in index.all()] == ["coder", "planner"]
+    assert index.by_name("planner").port == 8001 and index.by_port(8002).name == "coder"
+    assert not index.port_available(8001) and index.port_available(8003)
+
+    index.upsert(
+        record(1, "planner", 8003, registered_unix=1000)
+    )  # moved to another port
+    assert index.port_available(8001) and index.by_port(8003).name == "planner"
+
+    updated = index.apply_heartbeat(2, 2500, "busy")
+    assert index.by_name("coder") is updated and index.all()[0] is updated
+    assert index.apply_heartbeat(99, 2500, "idle") is None
+
+    index.remove(2)
+    assert index.by_name("coder") is None and index.port_available(8002)
+    assert [r.name for r in index.all()] == ["planner"]
+
+
+def test_repeated_heartbeats_are_coalesced_without_a_database_write():
+    registry = AgentRegistry("postgresql://unused")
+    registry.index.upsert(
+        record(1, "planner", 8001, last_heartbeat_unix=1000, reported_status="idle")
+    )
+
+    async def beat(status, now):
+        # conn=None: any attempt to write would fail, so a returned record means it was
+        # coalesced.
+        return await registry.heartbeat(None, "planner", status, now=now)
+
+    assert (
+        asyncio.run(
+            beat("idle", 1000 + AGENT_HEARTBEAT_WRITE_INTERVAL - 1)
+        ).last_heartbeat_unix
+        == 1000
+    )
+    assert registry.coalesced_heartbeat("planner", "busy", now=1001) is None
+    assert (
+        registry.coalesced_heartbeat(
+            "planner", "idle", now=1000 + AGENT_HEARTBEAT_WRITE_INTERVAL
+        )
+        is None
+    )
+    assert registry.coalesced_heartbeat("unknown", "idle", now=1001) is None
@@ -0,0 +1,93 @@
+import random
+
+import pytest
+
+from core.a2a.registry import AgentLoad, AgentRecord, AgentRegistry
+from core.a2a.router import AgentRouter, expected_wait
+
+NOW = 10_000
+
+
+def make_registry(agents):
+    # agents: (name, capabilities, online)
+    registry = AgentRegistry("postgresql://unused")
+    for i, (name, capabilities, online) in enumerate(agents, start=1):
+        registry.index.upsert(
+            AgentRecord(
+                i,
+                name,
+                None,
+                "localhost",
+                9000 + i,
+                1000 + i,
+                NOW - 5 if online else None,
+                "idle",
+                frozenset(capabilities),
+            )
+        )
+    return registry
+
+
+def test_expected_wait_weighs_queue_depth_by_recent_latency():
+    assert expected_wait(AgentLoad(queued=3, in_flight=1, latency_ewma=10.0)) == 50.0
+    assert (
+        expected_wait(AgentLoad(queued=0, in_flight=0, latency_ewma=0.0)) == 1.0
+    )  # sub-second agents still count tasks
+    assert expected_wait(AgentLoad(), default_latency=60.0) == 60.0
+
+
+def test_least_loaded_respects_capabilities_liveness_and_counts_its_choices():
+    registry = make_registry(
+        [
+            ("cpu", {"python"}, True),
+            ("gpu", {"python", "gpu"}, True),
+            ("down", {"python", "gpu"}, False),
+        ]
+    )
+    registry.loads["cpu"] = AgentLoad(queued=5, latency_ewma=10.0)
+    registry.loads["gpu"] = AgentLoad(queued=1, latency_ewma=10.0)
+    router = AgentRouter(registry, policy="least_loaded", rng=random.Random(1))
+
+    assert router.choose(["gpu"], now=NOW) == "gpu"
+    assert registry.load_of("gpu").queued == 2
+    assert router.choose(["tpu"], now=NOW) is None
+    # Same pace, so gpu keeps getting tasks until its queue is as deep as cpu's; then
+    # they alternate.
+    assert [router.choose(now=NOW) for _ in range(3)] == ["gpu"] * 3
+    assert sorted(router.choose(now=NOW) for _ in range(2)) == ["cpu", "gpu"]
+
+
+def test_eligible_agents_follow_registry_changes():
+    registry = make_registry([("a", {"python"}, True)])
+    router = AgentRouter(registry, policy="p2c")
+    assert router.eligible(["python"]) == ["a"]
+    registry.index.upsert(
+        AgentRecord(
+            2, "b", None, "localhost", 9100, 2000, NOW, "idle", frozenset({"python"})
+        )
+    )
+    assert sorted(router.eligible(["python"])) == ["a", "b"]
+    registry.index.remove(1)
+    assert router.eligible(["python"]) == ["b"]
+
+
+def test_power_of_two_choices_avoids_overloaded_agents_in_large_pools():
+    def overloaded_share(policy):
+        registry = make_registry([(f"agent-{i}", (), True) for i in range(100)])
+        for i in range(50):
+            registry.loads[f"agent-{i}"] = AgentLoad(queued=100, latency_ewma=10.0)
+        router = AgentRouter(registry, policy=policy, rng=random.Random(7))
+        picks = [router.choose(now=NOW) for _ in range(1000)]
+        return sum(1 for name in picks if int(name.split("-")[1]) < 50) / len(picks)
+
+    # Only a draw of two overloaded agents lands there: about 1/4 of picks, against 1/2
+    # at random.
+    assert overloaded_share("p2c") < 0.3
+    assert overloaded_share("random") > 0.4
+
+
+def test_routing_can_be_disabled_and_rejects_unknown_policies():
+    registry = make_registry([("a", (), True)])
+    assert AgentRouter(registry, policy="none").choose(now=NOW) is None
+    with pytest.raises(ValueError):
+        AgentRouter(registry, policy="round_robin")
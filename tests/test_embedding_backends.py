@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from core.rag.embeddings import HashingBackend, create_embedding_backend
+from core.rag.kernel import RAGKernel
+
+
+def test_hashing_backend_is_deterministic_normalized_and_batch_independent():
+    texts = ["plan the task", "run port_guard.py", "", "plan the task", "v1.3.2 rules"]
+    batched = HashingBackend(dimension=64, batch_size=2).embed(texts)
+    whole = HashingBackend(dimension=64, batch_size=32).embed(texts)
+    assert batched.shape == (5, 64) and batched.dtype == np.float32
+    assert np.array_equal(batched, whole)
+    assert np.array_equal(batched[0], batched[3])
+    assert np.allclose(np.linalg.norm(batched[[0, 1, 3, 4]], axis=1), 1.0)
+    assert not batched[2].any()
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        create_embedding_backend("word2vec")
+
+
+def test_kernel_indexes_and_queries_with_hashing_backend(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "ports.md").write_text(
+        "# Ports\nAlways run port_guard.py before binding a port.\n"
+    )
+    (docs / "plans.md").write_text("# Plans\nWrite PLAN.md before taking any action.\n")
+    kernel = RAGKernel(
+        vector_store_path=str(tmp_path / "store"),
+        collection_name="lessons",
+        docs_path=docs,
+        embedding_backend="hashing",
+        embedding_batch_size=1,
+    )
+    assert kernel.vector_store.collection.name == "lessons_hashing"
+    assert kernel.initialize_and_embed_lessons()["chunks_added"] == 2
+    lessons = kernel.get_relevant_lessons("port_guard.py", n_results=1, mode="vector")
+    assert lessons[0]["metadata"]["source"] == "ports.md"
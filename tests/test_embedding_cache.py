@@ -0,0 +1,93 @@
+import warnings
+
+import chromadb
+import numpy as np
+from core.rag.embedding_cache import (
+    EmbeddingCache,
+    CachedEmbeddingFunction,
+    cached_embedding_function,
+    text_hash,
+)
+from core.rag.embeddings import HashingBackend, HashingFunction, embedding_function_for
+
+
+class CountingEF:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, input):
+        self.calls.append(list(input))
+        return [np.full(4, len(text), dtype=np.float32) for text in input]
+
+
+def test_only_uncached_texts_are_embedded(tmp_path):
+    inner = CountingEF()
+    ef = CachedEmbeddingFunction(
+        inner, "model-a", EmbeddingCache(str(tmp_path / "cache.sqlite"))
+    )
+    first = ef(["plan the task", "write tests"])
+    second = ef(["plan   the task\n", "new prompt"])
+    assert inner.calls == [["plan the task", "write tests"], ["new prompt"]]
+    assert np.array_equal(first[0], second[0])
+    stats = ef.stats()
+    assert (
+        stats["misses"] == 3 and stats["memory_hits"] == 1 and stats["hit_rate"] == 0.25
+    )
+
+
+def test_cache_persists_and_is_keyed_by_model(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    CachedEmbeddingFunction(CountingEF(), "model-a", EmbeddingCache(path))(
+        ["same text"]
+    )
+
+    inner = CountingEF()
+    reopened = CachedEmbeddingFunction(inner, "model-a", EmbeddingCache(path))
+    reopened(["same text"])
+    assert inner.calls == [] and reopened.stats()["disk_hits"] == 1
+
+    other_model = CountingEF()
+    CachedEmbeddingFunction(other_model, "model-b", EmbeddingCache(path))(["same text"])
+    assert other_model.calls == [["same text"]]
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = EmbeddingCache(
+        str(tmp_path / "cache.sqlite"), max_entries=10, memory_entries=2
+    )
+    for i in range(10):
+        cache.put_many("m", {text_hash(f"t{i}"): np.zeros(4)})
+    cache.get_many("m", [text_hash("t0")])  # disk hit refreshes t0
+    cache.put_many("m", {text_hash("t10"): np.zeros(4)})
+    assert len(cache) == 9
+    assert text_hash("t0") in cache.get_many("m", [text_hash("t0")])
+    assert cache.get_many("m", [text_hash("t1")]) == {}
+
+
+def test_collection_created_through_the_cache_reopens_with_its_embedding_function(
+    tmp_path,
+):
+    def open_collection():
+        function = embedding_function_for(HashingBackend(dimension=16))
+        cached = cached_embedding_function(
+            function, "hashing:16", EmbeddingCache(str(tmp_path / "cache.sqlite"))
+        )
+        return chromadb.PersistentClient(
+            path=str(tmp_path / "chroma")
+        ).get_or_create_collection("lessons", embedding_function=cached)
+
+    with warnings.catch_warnings():
+        # e.g. "legacy embedding function config" when Chroma cannot register the
+        # function
+        warnings.simplefilter("error")
+        open_collection().add(ids=["a"], documents=["plan the task"])
+        reopened = open_collection()
+        uncached = chromadb.PersistentClient(
+            path=str(tmp_path / "chroma")
+        ).get_collection("lessons")
+    assert reopened.configuration["embedding_function"].name() == "zaki_os_hashing"
+    assert reopened.query(query_texts=["plan the task"], n_results=1)["ids"] == [["a"]]
+    # Without an embedding function Chroma rebuilds the (uncached) one from the stored
+    # config.
+    rebuilt = uncached.configuration["embedding_function"]
+    assert isinstance(rebuilt, HashingFunction) and rebuilt.backend.dimension == 16
@@ -0,0 +1,56 @@
+from core.rag.lexical_index import LexicalIndex, tokenize
+from core.rag.hybrid import reciprocal_rank_fusion, rerank
+
+
+def test_tokenizer_keeps_identifiers_and_their_parts():
+    tokens = tokenize("Run port_guard.py before v1.3.2 (pending_approval).")
+    assert (
+        "port_guard.py" in tokens
+        and "v1.3.2" in tokens
+        and "pending_approval" in tokens
+    )
+    assert "port" in tokens and "guard" in tokens and "approval" in tokens
+
+
+def test_bm25_finds_exact_identifier():
+    index = LexicalIndex()
+    index.add(
+        ["a", "b", "c"],
+        [
+            "Agents must check the port before starting a service.",
+            "Use scripts/port_guard.py to verify a port is free.",
+            "Rules changed in the v1.3.2 update.",
+        ],
+    )
+    assert index.search("port_guard.py", k=1)[0][0] == "b"
+    assert index.search("v1.3.2", k=1)[0][0] == "c"
+
+
+def test_removed_and_replaced_documents_are_not_returned():
+    index = LexicalIndex()
+    index.add([f"d{i}" for i in range(8)], [f"common text {i}" for i in range(8)])
+    index.add(["d0"], ["entirely different words"])
+    index.remove(["d1", "d2"])
+    hits = {doc_id for doc_id, _ in index.search("common", k=10)}
+    assert hits == {"d3", "d4", "d5", "d6", "d7"}
+    assert len(index) == 6
+    # Enough tombstones trigger compaction; results must not change.
+    index.remove(["d3"])
+    assert {doc_id for doc_id, _ in index.search("common", k=10)} == {
+        "d4",
+        "d5",
+        "d6",
+        "d7",
+    }
+    assert index.search("different", k=1)[0][0] == "d0"
+    assert index.matching_terms("d0", ["different", "common"]) == {"different"}
+
+
+def test_rrf_and_rerank_prefer_exact_identifier_matches():
+    fused = reciprocal_rank_fusion([["x", "y"], ["y", "z"]])
+    assert fused[0][0] == "y"
+    candidates = [
+        {"id": "x", "document_content": "how to check ports", "score": 0.02},
+        {"id": "y", "document_content": "run port_guard.py first", "score": 0.019},
+    ]
+    assert rerank("port_guard.py", candidates)[0]["id"] == "y"
@@ -0,0 +1,33 @@
+import pytest
+
+from ui.dispatcher.log_partitions import (
+    partition_for,
+    apply_retention,
+    PARTITION_BOUND_PATTERN,
+)
+
+
+def test_partitions_are_aligned_to_utc_days():
+    partition = partition_for(1_792_300_000)  # 2026-10-18 05:06:40 UTC
+    assert partition.name == "task_logs_p20261018"
+    assert (partition.lower, partition.upper) == (1_792_281_600, 1_792_368_000)
+    assert partition_for(partition.upper) == partition_for(partition.upper + 86399)
+    assert (
+        partition_for(1_792_300_000, days=7).upper
+        - partition_for(1_792_300_000, days=7).lower
+        == 7 * 86400
+    )
+
+
+def test_partition_bounds_are_parsed_from_pg_get_expr():
+    match = PARTITION_BOUND_PATTERN.search(
+        "FOR VALUES FROM (1792281600) TO (1792368000)"
+    )
+    assert match.groups() == ("1792281600", "1792368000")
+    assert PARTITION_BOUND_PATTERN.search("DEFAULT") is None
+
+
+def test_retention_is_disabled_by_zero_days_and_rejects_unknown_modes():
+    assert apply_retention(conn=None, retention_days=0) == []
+    with pytest.raises(ValueError):
+        apply_retention(conn=None, retention_days=30, mode="truncate")
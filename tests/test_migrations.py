@@ -0,0 +1,27 @@
+import pytest
+
+from ui.dispatcher.migrations import discover_migrations, MigrationError, MIGRATIONS_DIR
+
+
+def test_shipped_migrations_are_numbered_consecutively():
+    versions = [m.version for m in discover_migrations(MIGRATIONS_DIR)]
+    assert versions == list(range(1, len(versions) + 1))
+
+
+def test_migrations_are_ordered_by_version(tmp_path):
+    (tmp_path / "0010_later.sql").write_text("SELECT 1;")
+    (tmp_path / "0002_earlier.sql").write_text("SELECT 2;")
+    migrations = discover_migrations(tmp_path)
+    assert [(m.version, m.name) for m in migrations] == [(2, "earlier"), (10, "later")]
+    assert migrations[0].sql == "SELECT 2;" and len(migrations[0].checksum) == 64
+
+
+def test_bad_names_and_duplicate_versions_are_rejected(tmp_path):
+    (tmp_path / "0001_first.sql").write_text("")
+    (tmp_path / "0001_again.sql").write_text("")
+    with pytest.raises(MigrationError):
+        discover_migrations(tmp_path)
+    (tmp_path / "0001_again.sql").unlink()
+    (tmp_path / "add_column.sql").write_text("")
+    with pytest.raises(MigrationError):
+        discover_migrations(tmp_path)
@@ -0,0 +1,168 @@
+import sys
+import queue
+import pathlib
+import threading
+
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "scripts"))
+
+import agent_runner  # noqa: E402
+from agent_runner import (  # noqa: E402
+    PlanPipeline,
+    _END_OF_STREAM,
+    format_lessons,
+    mark_statuses,
+    render_plan,
+    NO_RELEVANT_LESSONS,
+)
+
+
+def test_batches_take_what_is_waiting_up_to_the_limit_and_stop_at_end_of_stream():
+    pipeline = PlanPipeline(listen=False)
+    source = queue.Queue()
+    for item in (1, 2, 3, 4, 5):
+        source.put(item)
+    source.put(_END_OF_STREAM)
+    assert pipeline._take_batch(source, 3)[:2] == ([1, 2, 3], False)
+    assert pipeline._take_batch(source, 3)[:2] == ([4, 5], True)
+
+
+def test_plan_text_includes_prompt_and_formatted_lessons():
+    lessons = format_lessons(
+        [
+            {
+                "metadata": {
+                    "source": "AGENT_ONBOARDING.md",
+                    "heading_path": "Golden Rules",
+                },
+                "distance": 0.25,
+                "document_content": "Never assign a port\nwithout port_guard.py",
+            }
+        ]
+    )
+    assert lessons.startswith(
+        "- Source: AGENT_ONBOARDING.md § Golden Rules (Distance: 0.2500)"
+    )
+    assert "Never assign a port without port_guard.py..." in lessons
+    assert format_lessons([]) == NO_RELEVANT_LESSONS
+
+    plan = render_plan({"id": 7, "title": "Ports", "prompt": "Pick a port"}, lessons)
+    assert (
+        plan.startswith("# PLAN for Task 7: Ports\n")
+        and "Pick a port" in plan
+        and lessons in plan
+    )
+
+
+def test_pipeline_rejects_empty_batches_and_batched_status_updates_only_hand_off():
+    with pytest.raises(ValueError):
+        PlanPipeline(claim_batch=0, listen=False)
+    with pytest.raises(ValueError):
+        mark_statuses(
+            [1], "done", worker_id="w"
+        )  # 'done' also sets completed_unix; use mark_status
+    assert mark_statuses([], "pending_approval", worker_id="w") == []
+
+
+class _Connection:
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def _run_stubbed_pipeline(monkeypatch, tasks, failing=None, **kwargs):
+    # Runs a PlanPipeline over `tasks` with the database calls stubbed out; claiming
+    # stops once all of them are claimed. `failing` is (function name, task ids of its
+    # arguments): that function raises when called with task 3. Returns (pipeline, plans
+    # stored, ids handed off).
+    pending = list(tasks)
+    stored, handed_off = [], []
+
+    def claim_tasks(worker_id, limit=1, connection=None, **_):
+        claimed, pending[:limit] = pending[:limit], []
+        if not claimed:
+            pipeline.stop()
+        return claimed
+
+    def store_plans(plans, connection=None):
+        stored.extend(plans)
+        return [task["id"] for task, _ in plans]
+
+    def mark_statuses(task_ids, status_value, worker_id, connection=None):
+        assert status_value == "pending_approval"
+        handed_off.extend(task_ids)
+        return list(task_ids)
+
+    monkeypatch.setattr(
+        agent_runner.psycopg2, "connect", lambda *args, **kwargs: _Connection()
+    )
+    monkeypatch.setattr(agent_runner, "build_rag_kernel", lambda **kwargs: None)
+    monkeypatch.setattr(agent_runner, "claim_tasks", claim_tasks)
+    monkeypatch.setattr(agent_runner, "store_plans", store_plans)
+    monkeypatch.setattr(agent_runner, "mark_statuses", mark_statuses)
+    if failing is not None:
+        name, task_ids_of = failing
+        function = getattr(agent_runner, name)
+
+        def fail_on_task_3(*args, **kwargs):
+            if 3 in task_ids_of(*args):
+                raise RuntimeError(f"{name} failed")
+            return function(*args, **kwargs)
+
+        monkeypatch.setattr(agent_runner, name, fail_on_task_3)
+    pipeline = PlanPipeline(
+        listen=False,
+        poll_interval=0.05,
+        claim_batch=7,
+        rag_batch=5,
+        status_batch=3,
+        plan_writers=2,
+        **kwargs,
+    )
+    runner = threading.Thread(target=pipeline.run, daemon=True)
+    runner.start()
+    runner.join(timeout=20)
+    assert not runner.is_alive(), "pipeline did not finish"
+    return pipeline, stored, handed_off
+
+
+def test_pipeline_plans_and_hands_off_every_claimed_task(monkeypatch):
+    tasks = [
+        {"id": task_id, "title": f"Task {task_id}", "prompt": f"Prompt {task_id}"}
+        for task_id in range(1, 51)
+    ]
+    pipeline, stored, handed_off = _run_stubbed_pipeline(monkeypatch, tasks)
+
+    assert sorted(handed_off) == list(range(1, 51))
+    assert sorted(task["id"] for task, _ in stored) == list(range(1, 51))
+    assert all(
+        content == render_plan(task, agent_runner.NO_LESSONS_RETRIEVED)
+        for task, content in stored
+    )
+    assert (pipeline.stats.completed, pipeline.stats.failed) == (50, 0)
+    assert pipeline.leases.held() == {}
+
+
+@pytest.mark.parametrize(
+    "failing",
+    [
+        ("render_plan", lambda task, summary: [task["id"]]),
+        ("store_plans", lambda plans: [task["id"] for task, _ in plans]),
+        ("mark_statuses", lambda task_ids, status_value, worker_id: task_ids),
+    ],
+    ids=["render", "write", "handoff"],
+)
+def test_pipeline_stops_instead_of_hanging_when_a_stage_fails(monkeypatch, failing):
+    tasks = [
+        {"id": task_id, "title": f"Task {task_id}", "prompt": f"Prompt {task_id}"}
+        for task_id in range(1, 301)
+    ]
+    pipeline, _, handed_off = _run_stubbed_pipeline(
+        monkeypatch, tasks, failing=failing, queue_size=4
+    )
+
+    assert 3 not in handed_off
+    assert pipeline.stats.completed == len(handed_off) and pipeline.stats.failed >= 1
+    assert pipeline.leases.held() == {}
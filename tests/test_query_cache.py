@@ -0,0 +1,80 @@
+from core.rag.query_cache import QueryResultCache, normalize_query
+from core.rag.kernel import RAGKernel
+
+LESSON = {
+    "id": "docs/a.md#1",
+    "document_content": "x" * 100,
+    "metadata": {"source": "a.md"},
+    "distance": 0.1,
+}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_eviction_ttl_and_counters():
+    clock = FakeClock()
+    cache = QueryResultCache(max_entries=2, ttl_seconds=10, clock=clock)
+    cache.put("a", [LESSON])
+    cache.put("b", [LESSON])
+    assert cache.get("a")[0]["id"] == LESSON["id"]  # "a" is now most recently used
+    cache.put("c", [LESSON])
+    assert cache.get("b") is None
+    clock.now = 11
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert (
+        stats["hits"],
+        stats["misses"],
+        stats["evictions"],
+        stats["expirations"],
+    ) == (1, 2, 1, 1)
+
+
+def test_memory_cap_evicts_oldest_entries():
+    cache = QueryResultCache(max_entries=100, max_bytes=1000)
+    for key in "abcdef":
+        cache.put(key, [LESSON])
+    stats = cache.stats()
+    assert stats["bytes"] <= 1000 and 0 < stats["entries"] < 6
+    assert cache.get("f") is not None and cache.get("a") is None
+
+
+def test_cached_results_are_copies():
+    cache = QueryResultCache()
+    cache.put("k", [LESSON])
+    cache.get("k")[0]["distance"] = 99
+    assert cache.get("k")[0]["distance"] == 0.1
+    assert normalize_query("  Plan\\nthe   TASK ") == normalize_query("plan\\nthe task")
+
+
+def test_kernel_serves_repeats_from_cache_until_index_changes(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "ports.md").write_text(
+        "# Ports\nAlways run port_guard.py before binding a port.\n"
+    )
+    kernel = RAGKernel(
+        vector_store_path=str(tmp_path / "store"),
+        collection_name="lessons",
+        docs_path=docs,
+        embedding_backend="hashing",
+    )
+    kernel.initialize_and_embed_lessons()
+    first = kernel.get_relevant_lessons("Which port guard?", n_results=2)
+    assert kernel.get_relevant_lessons("which   PORT guard?", n_results=2) == first
+    assert kernel.query_cache_stats()["hits"] == 1
+
+    (docs / "guard.md").write_text("# Guard\nport guard details\n")
+    kernel.initialize_and_embed_lessons()
+    refreshed = kernel.get_relevant_lessons("Which port guard?", n_results=2)
+    assert kernel.query_cache_stats()["hits"] == 1
+    assert {lesson["metadata"]["source"] for lesson in refreshed} == {
+        "ports.md",
+        "guard.md",
+    }
@@ -0,0 +1,83 @@
+from core.rag.loader import chunk_markdown, split_markdown_sections
+
+DOC = (
+    """Intro line.
+
+# Guide
+
+## Setup
+Install the package.
+
+```bash
+# not a heading
+pip install zaki
+```
+
+## Usage
+"""
+    + " ".join(f"word{i}" for i in range(25))
+    + "\n"
+)
+
+
+def test_sections_follow_headings_and_skip_code_fences():
+    sections = split_markdown_sections(DOC.encode("utf-8"))
+    assert [s["headings"] for s in sections] == [
+        [],
+        ["Guide"],
+        ["Guide", "Setup"],
+        ["Guide", "Usage"],
+    ]
+
+
+def test_chunks_carry_heading_path_and_byte_offsets():
+    data = DOC.encode("utf-8")
+    chunks = chunk_markdown(
+        DOC, "guide.md", "docs/guide.md", chunk_tokens=10, chunk_overlap=3
+    )
+    # The bare "# Guide" section has no body and yields no chunk.
+    assert {c["metadata"]["heading_path"] for c in chunks} == {
+        "",
+        "Guide > Setup",
+        "Guide > Usage",
+    }
+    for chunk in chunks:
+        meta = chunk["metadata"]
+        assert (
+            data[meta["start_byte"] : meta["end_byte"]].decode("utf-8") == chunk["text"]
+        )
+    assert "# not a heading" in next(
+        c["text"] for c in chunks if c["metadata"]["heading_path"] == "Guide > Setup"
+    )
+
+
+def test_token_windows_overlap():
+    chunks = [
+        c
+        for c in chunk_markdown(
+            DOC, "guide.md", "docs/guide.md", chunk_tokens=10, chunk_overlap=3
+        )
+        if c["metadata"]["heading_path"] == "Guide > Usage"
+    ]
+    assert len(chunks) == 4
+    first, second = chunks[0]["text"].split(), chunks[1]["text"].split()
+    assert first[-3:] == second[:3]
+
+
+def test_chunk_ids_are_stable_and_unique():
+    first = chunk_markdown(
+        DOC, "guide.md", "docs/guide.md", chunk_tokens=10, chunk_overlap=3
+    )
+    edited = chunk_markdown(
+        "New preamble.\n" + DOC[DOC.index("# Guide") :],
+        "guide.md",
+        "docs/guide.md",
+        chunk_tokens=10,
+        chunk_overlap=3,
+    )
+    ids = [c["id"] for c in first]
+    assert len(ids) == len(set(ids))
+    # Editing one section leaves the IDs of the other sections untouched.
+    assert {c["id"] for c in first if c["metadata"]["heading_path"]} == {
+        c["id"] for c in edited if c["metadata"]["heading_path"]
+    }
@@ -0,0 +1,43 @@
+from core.rag.manifest import IndexManifest
+
+SETTINGS = {"collection": "lessons", "chunk_tokens": 150, "chunk_overlap": 30}
+
+
+def test_manifest_round_trip(tmp_path):
+    manifest = IndexManifest.for_store(str(tmp_path / "store"), "lessons", SETTINGS)
+    assert manifest.load() is False
+    manifest.files["docs/a.md"] = {
+        "mtime_ns": 1,
+        "size": 2,
+        "sha256": "x",
+        "chunks": {"docs/a.md#1": [0, 5, 0], "docs/a.md#2": [6, 9, 1]},
+    }
+    manifest.save()
+
+    reloaded = IndexManifest.for_store(str(tmp_path / "store"), "lessons", SETTINGS)
+    assert reloaded.load() is True
+    assert reloaded.chunk_count() == 2
+    assert sorted(reloaded.all_chunk_ids()) == ["docs/a.md#1", "docs/a.md#2"]
+
+
+def test_manifest_with_other_settings_is_not_used(tmp_path):
+    manifest = IndexManifest.for_store(str(tmp_path), "lessons", SETTINGS)
+    manifest.files["docs/a.md"] = {
+        "mtime_ns": 1,
+        "size": 2,
+        "sha256": "x",
+        "chunks": {},
+    }
+    manifest.save()
+
+    other = IndexManifest.for_store(
+        str(tmp_path), "lessons", {**SETTINGS, "chunk_tokens": 100}
+    )
+    assert other.load() is False
+    assert other.files == {}
+
+
+def test_unreadable_manifest_is_ignored(tmp_path):
+    manifest = IndexManifest.for_store(str(tmp_path), "lessons", SETTINGS)
+    (tmp_path / "index_manifest_lessons.json").write_text("{not json")
+    assert manifest.load() is False
@@ -0,0 +1,82 @@
+import pytest
+
+from core.a2a.subtask_tracker import (
+    topological_order,
+    DependencyCycleError,
+    completion_from_summary,
+    wait_for_subtask_completion,
+)
+
+
+def test_dependencies_come_first_and_input_order_is_kept():
+    dependencies = {"d": ["b", "c"], "b": ["a"], "c": ["a", "external"]}
+    order = topological_order(["d", "c", "b", "a", "e"], dependencies)
+    assert order == ["a", "e", "c", "b", "d"]
+
+
+def test_cycle_is_reported_with_its_nodes():
+    with pytest.raises(DependencyCycleError) as excinfo:
+        topological_order(
+            ["a", "b", "c", "d"], {"a": ["b"], "b": ["c"], "c": ["a"], "d": ["a"]}
+        )
+    assert excinfo.value.cycle[0] == excinfo.value.cycle[-1]
+    assert set(excinfo.value.cycle) == {"a", "b", "c"}
+
+
+def test_self_dependency_is_a_cycle():
+    with pytest.raises(DependencyCycleError):
+        topological_order([1, 2], {2: [2]})
+
+
+def test_large_chain_is_linear():
+    n = 50000
+    order = topological_order(range(n - 1, -1, -1), {i: [i - 1] for i in range(1, n)})
+    assert order == list(range(n))
+
+
+def summary(**counts):
+    base = {
+        "parent_task_id": 1,
+        "pending": 0,
+        "pending_approval": 0,
+        "approved": 0,
+        "in_progress": 0,
+        "done": 0,
+        "failed": 0,
+    }
+    base.update(counts)
+    base["total"] = sum(v for k, v in base.items() if k != "parent_task_id")
+    base["finished"] = base["done"] + base["failed"] == base["total"]
+    return base
+
+
+def test_completion_states_from_summary():
+    assert (
+        completion_from_summary(summary(done=3, in_progress=1))["status"] == "pending"
+    )
+    assert (
+        completion_from_summary(summary(done=3, failed=1))["status"]
+        == "completed_with_failures"
+    )
+    assert completion_from_summary(summary(done=4))["status"] == "all_completed"
+
+
+class FakeDispatcher:
+    def __init__(self, summaries):
+        self.summaries = list(summaries)
+        self.waits = []
+
+    def wait_for_subtasks(self, parent_task_id, wait_seconds):
+        self.waits.append(wait_seconds)
+        return self.summaries.pop(0)
+
+
+def test_wait_for_completion_long_polls_until_finished():
+    dispatcher = FakeDispatcher(
+        [summary(in_progress=2), summary(done=1, in_progress=1), summary(done=2)]
+    )
+    result = wait_for_subtask_completion(
+        1, timeout=600, dispatcher=dispatcher, poll_seconds=60
+    )
+    assert result["status"] == "all_completed"
+    assert dispatcher.waits == [60, 60, 60]
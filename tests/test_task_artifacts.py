@@ -0,0 +1,85 @@
+import os
+import gzip
+
+import pytest
+
+from core.artifacts import (
+    BlobDecoder,
+    decode_blob,
+    encode_blob,
+    make_artifact,
+    store_params,
+)
+from core.rag.kernel import discover_documents
+from ui.dispatcher.artifacts import accepts_gzip, etag_for, if_none_match_hashes
+
+
+def test_blobs_are_addressed_by_content_and_compressed_only_when_it_pays():
+    plan = "# PLAN for Task 1\n" + "- step\n" * 500
+    first, second = encode_blob(plan), encode_blob(plan.encode())
+    assert (
+        first == second and first.encoding == "gzip" and first.size_bytes == len(plan)
+    )
+    assert (
+        gzip.decompress(first.data) == plan.encode()
+    )  # clients accepting gzip get the stored bytes
+
+    noise = os.urandom(4096)
+    stored = encode_blob(noise)
+    assert stored.encoding == "identity" and stored.data == noise
+
+    decoder = BlobDecoder(first.encoding)
+    streamed = (
+        b"".join(
+            decoder.feed(first.data[i : i + 7]) for i in range(0, len(first.data), 7)
+        )
+        + decoder.flush()
+    )
+    assert streamed == decode_blob(first.data, "gzip") == plan.encode()
+
+
+def test_a_batch_stores_each_blob_once_and_the_last_artifact_per_task_and_kind():
+    artifacts = [
+        make_artifact(1, "plan", "same"),
+        make_artifact(2, "plan", "same"),
+        make_artifact(1, "plan", "newer", filename="PLAN_x_1.md"),
+    ]
+    blob_params, artifact_params = store_params(artifacts, now=100)
+    assert sorted(blob_params["sha256"]) == sorted({a.blob.sha256 for a in artifacts})
+    assert list(
+        zip(
+            artifact_params["task_id"],
+            artifact_params["kind"],
+            artifact_params["filename"],
+        )
+    ) == [(1, "plan", "PLAN_x_1.md"), (2, "plan", None)]
+    assert artifact_params["content_type"][0].startswith("text/markdown")
+    with pytest.raises(ValueError):
+        make_artifact(1, "notes", "x")
+
+
+def test_conditional_get_and_content_negotiation_headers():
+    sha = encode_blob("plan").sha256
+    assert etag_for(sha, False) == f'"{sha}"' and etag_for(sha, True) == f'"{sha}-gzip"'
+    assert if_none_match_hashes(f'W/"{sha}-gzip", "{"0" * 64}"') == (
+        {sha, "0" * 64},
+        False,
+    )
+    assert if_none_match_hashes("*") == (set(), True) and if_none_match_hashes(
+        None
+    ) == (set(), False)
+    assert accepts_gzip("br, gzip;q=0.5") and accepts_gzip("*")
+    assert (
+        not accepts_gzip("gzip;q=0")
+        and not accepts_gzip("identity")
+        and not accepts_gzip(None)
+    )
+
+
+def test_generated_plan_files_are_not_indexed(tmp_path):
+    (tmp_path / "plans").mkdir()
+    for name in ("plans/PLAN_TEMPLATE.md", "plans/PLAN_Fix_login_42.md", "rules.md"):
+        (tmp_path / name).write_text("# Doc\n")
+    assert [
+        p.relative_to(tmp_path).as_posix() for p in discover_documents(tmp_path)
+    ] == ["plans/PLAN_TEMPLATE.md", "rules.md"]
@@ -0,0 +1,44 @@
+import asyncio
+
+from ui.dispatcher.events import TaskEventHub, TASK_LOG_EVENTS_CHANNEL
+
+
+def test_publish_wakes_only_subscribers_of_that_parent():
+    async def run():
+        hub = TaskEventHub("postgresql://unused")
+        async with hub.subscribe(1) as first, hub.subscribe(2) as second:
+            assert hub.subscriber_count() == 2
+            first.clear()
+            second.clear()
+            hub.publish(1)
+            assert await first.wait(0.1) is True
+            assert await second.wait(0.05) is False
+        assert hub.subscriber_count() == 0
+
+    asyncio.run(run())
+
+
+def test_event_before_wait_is_not_lost():
+    async def run():
+        hub = TaskEventHub("postgresql://unused")
+        async with hub.subscribe(7) as subscription:
+            subscription.clear()
+            hub.publish(
+                7
+            )  # arrives after the state was read but before the caller waits
+            return await subscription.wait(0.1)
+
+    assert asyncio.run(run()) is True
+
+
+def test_log_hub_routes_by_task_id():
+    async def run():
+        hub = TaskEventHub(
+            "postgresql://unused", channel=TASK_LOG_EVENTS_CHANNEL, key_field="task_id"
+        )
+        async with hub.subscribe(5) as subscription:
+            subscription.clear()
+            hub.publish(5)
+            return hub.channel, await subscription.wait(0.1)
+
+    assert asyncio.run(run()) == ("task_log_events", True)
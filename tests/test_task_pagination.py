@@ -0,0 +1,35 @@
+import pytest
+from fastapi import HTTPException
+from ui.dispatcher.app import (
+    encode_task_cursor,
+    decode_task_cursor,
+    parse_task_fields,
+    TASK_FIELDS,
+)
+
+
+def test_task_cursor_round_trip():
+    cursor = encode_task_cursor(1717171717, 42)
+    assert decode_task_cursor(cursor) == (1717171717, 42)
+
+
+def test_invalid_task_cursor_is_rejected():
+    with pytest.raises(HTTPException) as exc_info:
+        decode_task_cursor("not-a-cursor")
+    assert exc_info.value.status_code == 400
+
+
+def test_field_projection_always_keeps_keyset_columns():
+    assert parse_task_fields("title,status") == [
+        "id",
+        "title",
+        "status",
+        "created_unix",
+    ]
+    assert parse_task_fields(None) == list(TASK_FIELDS)
+
+
+def test_unknown_projection_field_is_rejected():
+    with pytest.raises(HTTPException) as exc_info:
+        parse_task_fields("title,secret")
+    assert exc_info.value.status_code == 400
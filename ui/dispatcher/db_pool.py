@@ -0,0 +1,148 @@
+# ui/dispatcher/db_pool.py
+import os
+import time
+import weakref
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional
+
+import psycopg
+from psycopg_pool import AsyncConnectionPool, PoolTimeout
+
+logger = logging.getLogger(__name__)
+
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "20"))
+DB_POOL_TIMEOUT = float(
+    os.getenv("DB_POOL_TIMEOUT", "5")
+)  # seconds to wait for a free connection
+DB_POOL_HEALTH_CHECK_INTERVAL = float(
+    os.getenv("DB_POOL_HEALTH_CHECK_INTERVAL", "30")
+)  # seconds idle before re-checking a connection
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection became available within the checkout timeout."""
+
+
+class DBPool:
+    """Async psycopg (v3) pool with checkout timeout, idle health checks and metrics.
+
+    Checkouts never block the event loop: waiting callers are parked by psycopg_pool
+    until a connection is returned or `timeout` seconds elapse.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        min_size: int = DB_POOL_MIN_SIZE,
+        max_size: int = DB_POOL_MAX_SIZE,
+        timeout: float = DB_POOL_TIMEOUT,
+        health_check_interval: float = DB_POOL_HEALTH_CHECK_INTERVAL,
+    ):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(
+                f"Invalid pool size bounds: min_size={min_size}, max_size={max_size}"
+            )
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._pool: Optional[AsyncConnectionPool] = None
+        # Keyed weakly by the connection itself: entries go away with connections the
+        # pool discards.
+        self._last_used: "weakref.WeakKeyDictionary[psycopg.AsyncConnection, float]" = (
+            weakref.WeakKeyDictionary()
+        )
+        # Metrics
+        self._checkouts = 0
+        self._timeouts = 0
+        self._health_check_failures = 0
+        self._checkout_wait_total = 0.0
+        self._checkout_wait_max = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        return self._pool is not None and not self._pool.closed
+
+    async def open(self, wait: bool = True):
+        if self.is_open:
+            return
+        self._pool = AsyncConnectionPool(
+            self.dsn,
+            min_size=self.min_size,
+            max_size=self.max_size,
+            timeout=self.timeout,
+            check=self._check_connection,
+            open=False,
+        )
+        await self._pool.open(wait=wait, timeout=self.timeout)
+        logger.info(
+            f"Database connection pool opened (min_size={self.min_size}, "
+            f"max_size={self.max_size}, timeout={self.timeout}s)."
+        )
+
+    async def close(self):
+        if self._pool is None:
+            return
+        # AsyncConnectionPool.close waits (bounded) for checked-out connections to be
+        # returned.
+        await self._pool.close(timeout=self.timeout)
+        self._pool = None
+        self._last_used.clear()
+        logger.info("Database connection pool closed.")
+
+    async def _check_connection(self, conn: psycopg.AsyncConnection):
+        idle_for = time.monotonic() - self._last_used.get(conn, 0.0)
+        if idle_for < self.health_check_interval:
+            return
+        try:
+            # Probes in autocommit, so the connection is not handed out inside an open
+            # transaction.
+            await AsyncConnectionPool.check_connection(conn)
+        except psycopg.Error:
+            self._health_check_failures += 1
+            logger.warning("Discarding unhealthy pooled database connection.")
+            raise
+
+    @asynccontextmanager
+    async def connection(self):
+        if not self.is_open:
+            raise PoolTimeoutError("Connection pool is not open.")
+        start = time.monotonic()
+        try:
+            async with self._pool.connection() as conn:
+                waited = time.monotonic() - start
+                self._checkouts += 1
+                self._checkout_wait_total += waited
+                self._checkout_wait_max = max(self._checkout_wait_max, waited)
+                try:
+                    yield conn
+                finally:
+                    self._last_used[conn] = time.monotonic()
+        except PoolTimeout as e:
+            self._timeouts += 1
+            raise PoolTimeoutError(
+                f"Timed out after {self.timeout}s waiting for a database connection."
+            ) from e
+
+    def metrics(self) -> Dict[str, Any]:
+        stats = self._pool.get_stats() if self._pool is not None else {}
+        avg_wait_ms = (
+            (self._checkout_wait_total / self._checkouts * 1000)
+            if self._checkouts
+            else 0.0
+        )
+        return {
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "size": stats.get("pool_size", 0),
+            "in_use": stats.get("pool_size", 0) - stats.get("pool_available", 0),
+            "waiting": stats.get("requests_waiting", 0),
+            "checkouts_total": self._checkouts,
+            "checkout_timeouts_total": self._timeouts,
+            "health_check_failures_total": self._health_check_failures,
+            "checkout_latency_avg_ms": round(avg_wait_ms, 3),
+            "checkout_latency_max_ms": round(self._checkout_wait_max * 1000, 3),
+        }
@@ -0,0 +1,148 @@
+# ui/dispatcher/events.py
+import json
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Set
+
+import psycopg
+
+logger = logging.getLogger(__name__)
+
+# Channel the agent_tasks trigger (sql/migrations/0001_baseline.sql) publishes task
+# lifecycle events on.
+TASK_EVENTS_CHANNEL = "agent_task_events"
+# Channel the task_logs trigger (sql/migrations/0003_task_log_tail.sql) publishes once
+# per insert statement and task on.
+TASK_LOG_EVENTS_CHANNEL = "task_log_events"
+
+
+class Subscription:
+    """Wake-up handle for one waiter on one key (a parent's children, or a task's logs).
+
+    Callers clear() before reading the current state and then wait(), so an event that
+    arrives between the read and the wait is never lost.
+    """
+
+    def __init__(self, key: int):
+        self.key = key
+        self._event = asyncio.Event()
+
+    def notify(self):
+        self._event.set()
+
+    def clear(self):
+        self._event.clear()
+
+    async def wait(self, timeout: float) -> bool:
+        # True if woken, False on timeout.
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+class TaskEventHub:
+    """Fans out events from one LISTEN connection to in-process subscribers.
+
+    Each notification payload is routed by its `key_field`: task events by the task's
+    parent_task_id, so only waiters on that parent are woken and re-read the (O(1))
+    child counters themselves; log events by task_id. The listener reconnects with
+    backoff and wakes every subscriber after (re)connecting, since events may have been
+    missed.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        channel: str = TASK_EVENTS_CHANNEL,
+        key_field: str = "parent_task_id",
+    ):
+        self.dsn = dsn
+        self.channel = channel
+        self.key_field = key_field
+        self.notifications_received = 0
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.create_task(
+                self._listen_loop(), name=f"event-hub-{self.channel}"
+            )
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._wake_all()
+
+    @asynccontextmanager
+    async def subscribe(self, key: int):
+        subscription = Subscription(key)
+        self._subscribers.setdefault(key, set()).add(subscription)
+        try:
+            yield subscription
+        finally:
+            subscribers = self._subscribers.get(key)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[key]
+
+    def subscriber_count(self) -> int:
+        return sum(len(s) for s in self._subscribers.values())
+
+    def publish(self, key: int):
+        for subscription in self._subscribers.get(key, ()):
+            subscription.notify()
+
+    def _wake_all(self):
+        for subscribers in self._subscribers.values():
+            for subscription in subscribers:
+                subscription.notify()
+
+    async def _listen_loop(self):
+        backoff = 1.0
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    self.dsn, autocommit=True
+                ) as conn:
+                    await conn.execute(f"LISTEN {self.channel}")
+                    logger.info(f"Listening for events on channel '{self.channel}'.")
+                    backoff = 1.0
+                    self._wake_all()
+                    async for notification in conn.notifies():
+                        self.notifications_received += 1
+                        try:
+                            key = json.loads(notification.payload).get(self.key_field)
+                        except ValueError:
+                            self._wake_all()
+                            continue
+                        if key is not None:
+                            self.publish(key)
+            except asyncio.CancelledError:
+                raise
+            except psycopg.Error as e:
+                logger.warning(
+                    f"Event listener on '{self.channel}' lost its connection: {e}. "
+                    f"Reconnecting in {backoff:.0f}s."
+                )
+            except Exception as e:
+                logger.error(
+                    f"Unexpected error in event listener on '{self.channel}': {e}",
+                    exc_info=True,
+                )
+            self._wake_all()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)